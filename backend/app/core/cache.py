@@ -0,0 +1,379 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Iterable, Optional, Set, Tuple, TypeVar
+
+from app.core.config import Settings, settings
+from app.core.errors import is_upstream_failure
+from app.core.metrics import record_cache_event
+from app.core.pubsub import Draining, MemoryBroker, SlowConsumer, broker
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+MISSING: Any = object()
+
+
+class TTLCache(Generic[V]):
+    """Cache em memória limitado por tamanho (LRU) e com expiração por entrada."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class MemoryBackend:
+    """Backend em memória (LRU + TTL), local a cada worker."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self._entries: TTLCache[Any] = TTLCache(max_size=max_size, ttl=ttl)
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Any:
+        return self._entries.get(key, MISSING)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key)
+
+    async def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    async def bump_version(self, namespace: str) -> None:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    async def aclose(self) -> None:
+        self._entries.clear()
+
+
+class RedisBackend:
+    """Backend compartilhado entre workers em qualquer servidor compatível com Redis."""
+
+    def __init__(self, url: str, prefix: str = "fitsenior:cache"):
+        import redis.asyncio as redis  # dependência opcional, só necessária com CACHE_BACKEND=redis
+
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any:
+        raw = await self._redis.get(f"{self.prefix}:{key}")
+        return MISSING if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._redis.set(f"{self.prefix}:{key}", json.dumps(value, default=str), px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(f"{self.prefix}:{key}")
+
+    async def version(self, namespace: str) -> int:
+        return int(await self._redis.get(f"{self.prefix}:version:{namespace}") or 0)
+
+    async def bump_version(self, namespace: str) -> None:
+        await self._redis.incr(f"{self.prefix}:version:{namespace}")
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    invalidations: int = 0
+    stale: int = 0
+    stale_on_error: int = 0
+
+
+class ResponseCache:
+    """Read-through por namespace, com coalescência de misses concorrentes.
+
+    A invalidação incrementa a versão do namespace: entradas antigas deixam de ser
+    lidas e expiram pelo TTL, sem varrer chaves.
+
+    Com `peers` (backend em memória e broker entre workers), cada invalidação também é publicada
+    em `channel` e aplicada pelos outros workers em `watch_peers`; sem ela, só o worker que
+    atendeu a escrita deixaria de servir a resposta antiga.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        stale_if_error_ttl: float = 0.0,
+        peers: Optional[MemoryBroker] = None,
+        channel: str = "cache",
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stale_if_error_ttl = stale_if_error_ttl
+        self.peers = peers
+        self.channel = channel
+        # o worker também recebe os próprios avisos: a origem evita reaplicá-los
+        self._origin = uuid.uuid4().hex
+        self.stats: Dict[str, CacheStats] = defaultdict(CacheStats)
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._revalidations: Set["asyncio.Task[Any]"] = set()
+
+    async def get_or_fetch(
+        self,
+        namespace: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Valor em cache ou buscado com `fetch`; com `cacheable`, só guarda os valores aprovados."""
+        version = await self.backend.version(namespace)
+        full_key = f"{namespace}:{version}:{key}"
+
+        value = await self.backend.get(full_key)
+        if value is not MISSING:
+            self._count(namespace, "hits")
+            return value
+
+        ttl = self.ttl if ttl is None else ttl
+
+        async def store(value: Any) -> None:
+            if cacheable is None or cacheable(value):
+                await self.backend.set(full_key, value, ttl=ttl)
+
+        return await self._fetch(namespace, full_key, fetch, store)
+
+    async def get_or_revalidate(
+        self,
+        namespace: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, float]:
+        """Como `get_or_fetch`, mas devolve `(valor, idade)` e prefere uma resposta velha a esperar.
+
+        Vencido o TTL, a entrada ainda é servida por `stale_ttl` segundos enquanto uma única busca
+        em segundo plano a substitui (stale-while-revalidate). Se a busca falhar por causa do
+        Supabase, serve a última resposta boa da chave, de qualquer versão, por até
+        `stale_if_error_ttl` segundos (stale-if-error). A idade é 0 quando a resposta é fresca.
+        """
+        version = await self.backend.version(namespace)
+        full_key = f"{namespace}:{version}:{key}"
+        # sem versão: sobrevive a invalidações, só é lida quando o upstream falha
+        last_good_key = f"{namespace}:last-good:{key}"
+
+        async def store(value: Any) -> None:
+            entry = {"stored_at": time.time(), "value": value}
+            await self.backend.set(full_key, entry, ttl=self.ttl + self.stale_ttl)
+            if self.stale_if_error_ttl > 0:
+                await self.backend.set(last_good_key, entry, ttl=self.stale_if_error_ttl)
+
+        entry = await self.backend.get(full_key)
+        if entry is not MISSING:
+            age = time.time() - entry["stored_at"]
+            if age < self.ttl:
+                self._count(namespace, "hits")
+                return entry["value"], 0.0
+            self._count(namespace, "stale")
+            if full_key not in self._inflight:
+                task = asyncio.create_task(self._revalidate(namespace, full_key, fetch, store))
+                self._revalidations.add(task)
+                task.add_done_callback(self._revalidations.discard)
+            return entry["value"], age
+
+        try:
+            return await self._fetch(namespace, full_key, fetch, store), 0.0
+        except Exception as exc:
+            if not is_upstream_failure(exc):
+                raise
+            fallback = await self.backend.get(last_good_key)
+            if fallback is MISSING:
+                raise
+            self._count(namespace, "stale_on_error")
+            age = time.time() - fallback["stored_at"]
+            logger.warning("Supabase falhou (%r): servindo %s de %.0fs atrás", exc, namespace, age)
+            return fallback["value"], age
+
+    async def _revalidate(
+        self,
+        namespace: str,
+        full_key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        store: Callable[[Any], Awaitable[None]],
+    ) -> None:
+        try:
+            await self._fetch(namespace, full_key, fetch, store)
+        except Exception as exc:
+            # a entrada velha continua valendo até o fim da janela; a próxima leitura tenta de novo
+            logger.warning("Falha ao revalidar %s: %r", full_key, exc)
+
+    async def _fetch(
+        self,
+        namespace: str,
+        full_key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        store: Callable[[Any], Awaitable[None]],
+    ) -> Any:
+        inflight = self._inflight.get(full_key)
+        if inflight is not None:
+            self._count(namespace, "coalesced")
+            return await asyncio.shield(inflight)
+
+        self._count(namespace, "misses")
+        future = self._inflight[full_key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fetch()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # evita "exception was never retrieved" quando ninguém aguardava o mesmo miss
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # descartada durante a busca (ver `discard`): o valor pode já estar desatualizado
+            if self._inflight.get(full_key) is future:
+                await store(value)
+            return value
+        finally:
+            if self._inflight.get(full_key) is future:
+                del self._inflight[full_key]
+
+    async def invalidate(self, *namespaces: str) -> None:
+        await self._invalidate(namespaces)
+        await self._announce("invalidate", {"namespaces": list(namespaces)})
+
+    async def discard(self, namespace: str, key: str) -> None:
+        """Invalida uma única chave, sem afetar o restante do namespace."""
+        await self._discard(namespace, key)
+        await self._announce("discard", {"namespace": namespace, "key": key})
+
+    async def _invalidate(self, namespaces: Iterable[str]) -> None:
+        for namespace in namespaces:
+            self._count(namespace, "invalidations")
+            await self.backend.bump_version(namespace)
+
+    async def _discard(self, namespace: str, key: str) -> None:
+        self._count(namespace, "invalidations")
+        full_key = f"{namespace}:{await self.backend.version(namespace)}:{key}"
+        self._inflight.pop(full_key, None)
+        await self.backend.delete(full_key)
+
+    async def _announce(self, kind: str, data: Dict[str, Any]) -> None:
+        if self.peers is None:
+            return
+        try:
+            await self.peers.publish(self.channel, {"type": kind, "data": {**data, "origin": self._origin}})
+        except Exception:
+            # a escrita já foi feita: os outros workers ficam com a resposta antiga até o TTL
+            logger.exception("Falha ao anunciar invalidação de cache em %s", self.channel)
+
+    async def watch_peers(self) -> None:
+        """Aplica as invalidações publicadas pelos outros workers; não faz nada sem `peers`."""
+        if self.peers is None:
+            return
+        while True:
+            subscription = self.peers.subscribe([self.channel])
+            try:
+                while True:
+                    event = await subscription.get(timeout=settings.realtime_heartbeat_seconds)
+                    data = (event or {}).get("data") or {}
+                    if not data or data.get("origin") == self._origin:
+                        continue
+                    if event["type"] == "invalidate":
+                        await self._invalidate(data.get("namespaces") or [])
+                    elif event["type"] == "discard":
+                        await self._discard(data["namespace"], data["key"])
+            except SlowConsumer:
+                # avisos perdidos: nenhuma entrada local é confiável
+                logger.warning("Fila de invalidação de %s transbordou; descartando o cache local", self.channel)
+                await self.backend.clear()
+            except Draining:
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Falha ao aplicar invalidação de %s", self.channel)
+                await asyncio.sleep(1)
+            finally:
+                subscription.close()
+
+    def _count(self, namespace: str, event: str) -> None:
+        stats = self.stats[namespace]
+        setattr(stats, event, getattr(stats, event) + 1)
+        # os mesmos contadores no /metrics, somados entre os workers
+        record_cache_event(namespace, event)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {namespace: asdict(stats) for namespace, stats in self.stats.items()}
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+
+def build_response_cache(
+    config: Settings,
+    max_entries: Optional[int] = None,
+    ttl: Optional[float] = None,
+    prefix: str = "fitsenior:cache",
+) -> ResponseCache:
+    max_entries = config.cache_max_entries if max_entries is None else max_entries
+    ttl = config.cache_ttl_seconds if ttl is None else ttl
+    peers: Optional[MemoryBroker] = None
+    if config.cache_backend == "redis":
+        if not config.cache_redis_url:
+            raise RuntimeError("CACHE_REDIS_URL é obrigatório com CACHE_BACKEND=redis")
+        backend: Any = RedisBackend(config.cache_redis_url, prefix=prefix)
+    else:
+        backend = MemoryBackend(max_size=max_entries, ttl=ttl)
+        # cada worker tem o seu cache: as invalidações seguem pelo LISTEN/NOTIFY do realtime
+        if config.realtime_backend == "postgres":
+            peers = broker
+    return ResponseCache(
+        backend,
+        ttl=ttl,
+        stale_ttl=config.cache_stale_seconds,
+        stale_if_error_ttl=config.cache_stale_if_error_seconds,
+        peers=peers,
+        channel=prefix,
+    )
+
+
+response_cache = build_response_cache(settings)
@@ -0,0 +1,157 @@
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+# tipos que valem a pena comprimir; SSE fica de fora para não segurar eventos no buffer
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv")
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    codings: Dict[str, float] = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[name.strip().lower()] = quality
+    return codings
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    codings = parse_accept_encoding(accept_encoding)
+    wildcard = codings.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    scored = [(codings.get(name, wildcard), name) for name in candidates]
+    # em caso de empate prefere br, que comprime mais
+    quality, name = max(scored, key=lambda item: (item[0], item[1] == "br"))
+    return name if quality > 0 else None
+
+
+def strong_etag_for_encoding(etag: str, encoding: str) -> str:
+    # outra codificação é outra representação: o ETag forte precisa mudar junto
+    if etag.startswith('"') and etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            data = self._brotli.process(chunk)
+            return data + (self._brotli.finish() if final else self._brotli.flush())
+        data = self._zlib.compress(chunk)
+        return data + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Comprime respostas com br ou gzip conforme o Accept-Encoding do cliente.
+
+    Respostas menores que `minimum_size`, já codificadas (ex.: repassadas do PostgREST)
+    ou de tipos não comprimíveis seguem inalteradas.
+    """
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = MutableHeaders(raw=message["headers"])
+                if message["status"] == 304:
+                    # o 304 repete o ETag da representação que o cliente guardou (comprimida ou não)
+                    headers.add_vary_header("Accept-Encoding")
+                    etag = headers.get("etag")
+                    encoded_etag = strong_etag_for_encoding(etag, encoding) if etag else None
+                    if encoded_etag and encoded_etag in request_headers.get("if-none-match", ""):
+                        headers["ETag"] = encoded_etag
+                    passthrough = True
+                    return
+                media_type = headers.get("content-type", "").split(";")[0].strip()
+                passthrough = (
+                    "content-encoding" in headers or media_type not in COMPRESSIBLE_TYPES or message["status"] == 204
+                )
+                if not passthrough:
+                    headers.add_vary_header("Accept-Encoding")
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                initial, start = start, None
+                if passthrough or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(initial)
+                    await send(message)
+                    return
+                compressor = StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=initial["headers"])
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers:
+                    headers["ETag"] = strong_etag_for_encoding(headers["etag"], encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(initial)
+                else:
+                    body = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(initial)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            if passthrough or compressor is None:
+                await send(message)
+                return
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": compressor.compress(body, final=not more_body),
+                    "more_body": more_body,
+                }
+            )
+
+        await self.app(scope, receive, send_wrapper)
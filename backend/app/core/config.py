@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Literal, Optional
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -11,6 +11,129 @@ class Settings(BaseSettings):
     supabase_url: str = Field(..., alias="SUPABASE_URL")
     supabase_anon_key: str = Field(..., alias="SUPABASE_ANON_KEY")
     supabase_service_key: str = Field(..., alias="SUPABASE_SERVICE_KEY")
+    supabase_jwt_secret: Optional[str] = Field(None, alias="SUPABASE_JWT_SECRET")
+
+    # "local" valida assinatura/expiração do JWT no processo; "remote" consulta /auth/v1/user
+    auth_mode: Literal["local", "remote"] = "local"
+    auth_jwt_audience: str = "authenticated"
+    auth_jwks_refresh_seconds: int = 600
+    auth_cache_ttl_seconds: int = 300
+    auth_cache_max_size: int = 10_000
+
+    # pools HTTP compartilhados (GoTrue e PostgREST)
+    http_pool_http2: bool = True
+    http_pool_max_connections: int = 100
+    http_pool_max_keepalive: int = 20
+    http_pool_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 10.0
+    http_retries: int = 2
+    http_retry_backoff: float = 0.1
+    # resiliência por endpoint (app.core.resilience): o circuito abre após N falhas seguidas
+    # e libera uma sonda depois de alguns segundos
+    http_breaker_failures: int = 5
+    http_breaker_reset_seconds: float = 10.0
+    # leituras: timeout = p99 observado × multiplicador, entre o mínimo e http_read_timeout (0 desliga)
+    http_adaptive_timeout_multiplier: float = 4.0
+    http_adaptive_timeout_min: float = 1.0
+    # leituras mais lentas que esse quantil ganham uma cópia (hedge), limitadas a uma fração
+    # das leituras (0 desliga)
+    http_hedge_quantile: float = 0.95
+    http_hedge_budget: float = 0.05
+
+    # realtime (SSE): "postgres" usa LISTEN/NOTIFY para distribuir eventos entre workers
+    realtime_backend: Literal["memory", "postgres"] = "memory"
+    realtime_database_url: Optional[str] = None
+    realtime_queue_size: int = 100
+    realtime_heartbeat_seconds: float = 15.0
+    # validade do ticket de GET /realtime/stream (EventSource não envia o header Authorization)
+    realtime_ticket_ttl_seconds: int = 30
+
+    # cache de leitura do catálogo (aulas/demandas); "redis" compartilha entre workers
+    cache_backend: Literal["memory", "redis"] = "memory"
+    cache_redis_url: Optional[str] = None
+    cache_ttl_seconds: float = 30.0
+    # listagens do catálogo: depois do TTL a entrada ainda é servida (marcada como velha) enquanto
+    # é atualizada em segundo plano, e por mais tempo se o Supabase estiver falhando
+    cache_stale_seconds: float = 60.0
+    cache_stale_if_error_seconds: float = 600.0
+    cache_max_entries: int = 1_000
+
+    # uploads em /me (Supabase Storage): o arquivo é repassado em pedaços conforme chega, sem ser
+    # carregado inteiro na memória; corpos acima do limite são recusados com 413
+    upload_avatar_max_bytes: int = 5 * 1024 * 1024
+    upload_certificate_max_bytes: int = 10 * 1024 * 1024
+    upload_timeout_seconds: float = 60.0
+    # miniatura quadrada (WebP) usada como avatar_url; gerada num pool de processos por worker
+    upload_thumbnail_size: int = 256
+    upload_thumbnail_quality: int = 80
+    upload_image_workers: int = 1
+    # imagens com mais pixels são recusadas antes de decodificar (bombas de descompressão)
+    upload_image_max_pixels: int = 40_000_000
+
+    # snapshot de perfil e papéis por usuário; invalidado nas escritas (trigger notify_identity_change)
+    identity_cache_ttl_seconds: float = 300.0
+    identity_cache_max_entries: int = 10_000
+
+    # limites de requisição (token bucket), no formato "N/second", "N/minute" ou "N/hour".
+    # IP: antes da autenticação; usuário: bucket padrão, ou um por rota ("MÉTODO /caminho", sem o api_prefix)
+    # em rate_limit_routes. "redis" compartilha os buckets entre workers; a cota de
+    # requisições simultâneas por usuário é sempre por worker.
+    rate_limit_enabled: bool = True
+    rate_limit_backend: Literal["memory", "redis"] = "memory"
+    rate_limit_redis_url: Optional[str] = None
+    rate_limit_max_keys: int = 100_000
+    rate_limit_ip: str = "600/minute"
+    rate_limit_user: str = "240/minute"
+    rate_limit_routes: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "GET /messages/{other_user_id}": "60/minute",
+            "POST /messages": "30/minute",
+            "POST /forum/posts": "10/minute",
+            "POST /forum/posts/{post_id}/replies": "30/minute",
+            "GET /classes/search": "60/minute",
+            "GET /demands/search": "60/minute",
+            "POST /demands/bulk": "10/minute",
+            "POST /attendance/bulk": "30/minute",
+            "POST /realtime/ticket": "10/minute",
+            "GET /realtime/stream": "10/minute",
+            "PUT /me/avatar": "10/minute",
+            "PUT /me/health-certificate": "10/minute",
+        }
+    )
+    rate_limit_user_concurrency: int = 10
+    # streams SSE abertos ao mesmo tempo por usuário (por worker), fora da cota de simultâneas
+    rate_limit_user_streams: int = 3
+    # atrás de um proxy confiável, usa o primeiro endereço de X-Forwarded-For como IP do cliente
+    rate_limit_trust_forwarded: bool = False
+
+    # métricas Prometheus em /metrics; Server-Timing só para depuração (expõe tempos internos)
+    metrics_enabled: bool = True
+    metrics_server_timing: bool = False
+
+    # compressão br/gzip negociada com o cliente; respostas menores que o mínimo seguem sem compressão
+    compression_enabled: bool = True
+    compression_min_size: int = 1_024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # serviço em produção (python -m app.serve): gunicorn com workers uvicorn (uvloop + httptools).
+    # WEB_CONCURRENCY ausente: um worker por CPU disponível (respeitando o limite do cgroup)
+    web_concurrency: Optional[int] = Field(None, alias="WEB_CONCURRENCY")
+    # mais de um worker só com invalidação compartilhada (CACHE_BACKEND=redis ou
+    # REALTIME_BACKEND=postgres), senão o launcher não sobe; false aceita, com um aviso no log,
+    # caches divergentes até o TTL (ex.: benchmarks)
+    serve_require_shared_invalidation: bool = True
+    serve_host: str = "0.0.0.0"
+    serve_preload: bool = True
+    serve_graceful_timeout: int = 30
+    serve_keepalive_seconds: int = 5
+    serve_backlog: int = 2_048
+    # reinicia o worker após N requisições (0 desliga), com variação aleatória de até 10%
+    serve_max_requests: int = 0
+    serve_access_log: bool = False
+    # abre as conexões com o Supabase (e busca o JWKS) antes de aceitar a primeira requisição
+    serve_warmup: bool = True
 
     api_prefix: str = "/api"
     backend_port: int = Field(8000, alias="BACKEND_PORT")
@@ -1,12 +1,230 @@
-from typing import Any
+import base64
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Query, Request, Response, status
+
+from app.core.errors import upstream_exception
+from app.core.etag import CACHE_PRIVATE, conditional_bytes, conditional_response
+from app.core.metrics import record_rows
 
 
 def handle_response(response: Any) -> Any:
+    # maybe_single() devolve None quando nenhuma linha é encontrada
+    if response is None:
+        return None
     error = getattr(response, "error", None)
     if error:
-        detail = getattr(error, "message", str(error))
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail)
-    return response.data
+        message = getattr(error, "message", str(error))
+        raise upstream_exception({"code": getattr(error, "code", None), "message": message})
+    data = response.data
+    record_rows(len(data) if isinstance(data, list) else int(data is not None))
+    return data
+
+
+def handle_single_response(response: Any) -> Any:
+    # insert/update retornam a representação como lista; a rota expõe apenas a linha afetada
+    data = handle_response(response)
+    if isinstance(data, list):
+        return data[0] if data else None
+    return data
+
+
+def flatten_count(row: Dict[str, Any], relation: str, key: str) -> Dict[str, Any]:
+    """Converte o agregado embutido `relation(count)` (``[{"count": n}]``) em ``row[key] = n``."""
+    if relation in row:
+        aggregate = row.pop(relation) or [{}]
+        row[key] = aggregate[0].get("count", 0)
+    return row
+
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+HAS_MORE_HEADER = "X-Has-More"
+# colunas usadas pelo cursor: sempre incluídas numa projeção via `fields=`
+CURSOR_COLUMNS = ("id", "created_at")
+# ordem do cursor das listagens: (created_at, id); nas buscas: (score, id)
+KEYSET_COLUMNS = ("created_at", "id")
+SEARCH_KEYSET_COLUMNS = ("score", "id")
+
+# tamanho máximo dos lotes nos endpoints de escrita em massa
+BULK_MAX_ITEMS = 100
+
+_FIELD_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+@dataclass
+class PageParams:
+    limit: int
+    cursor: Optional[str]
+    fields: Optional[str]
+
+    def cache_key(self) -> str:
+        return f"{self.limit}:{self.cursor or ''}:{self.fields or ''}"
+
+
+def get_page_params(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+) -> PageParams:
+    return PageParams(limit=limit, cursor=cursor, fields=fields)
+
+
+def encode_cursor(row: Dict[str, Any], columns: Sequence[str] = KEYSET_COLUMNS) -> str:
+    raw = json.dumps([row[column] for column in columns], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _load_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        first, second = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return first, second
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    created_at, row_id = _load_cursor(cursor)
+    values = (created_at, row_id)
+    if not all(isinstance(value, str) and '"' not in value and "\\" not in value for value in values):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return created_at, row_id
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str]:
+    score, row_id = _load_cursor(cursor)
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not isinstance(row_id, str):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return float(score), row_id
+
+
+def select_columns(
+    fields: Optional[str],
+    default: str,
+    embeds: Optional[Dict[str, str]] = None,
+    required: Sequence[str] = CURSOR_COLUMNS,
+) -> str:
+    """Monta o `select` do PostgREST a partir de `fields=`, mantendo `default` quando não informado.
+
+    `embeds` mapeia nomes aceitos em `fields` para o recurso embutido correspondente,
+    por exemplo ``{"professionals": "professionals(full_name)"}``.
+    """
+    if not fields:
+        return default
+
+    embeds = embeds or {}
+    columns = list(required)
+    for name in (field.strip() for field in fields.split(",")):
+        if not name or name in columns:
+            continue
+        if name in embeds:
+            columns.append(embeds[name])
+        elif _FIELD_PATTERN.match(name):
+            columns.append(name)
+        else:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Campo inválido: {name}")
+    return ", ".join(columns)
+
+
+def keyset_paginate(query: Any, page: PageParams, desc: bool = True, relation: Optional[str] = None) -> Any:
+    """Ordena por (created_at, id) e aplica o cursor; busca uma linha extra para saber se há próxima página.
+
+    Com `relation`, pagina o recurso embutido com esse nome (ou alias) em vez da tabela principal.
+    """
+    direction = ".desc" if desc else ""
+    if relation:
+        query.params = query.params.add(f"{relation}.order", f"created_at{direction},id{direction}")
+    else:
+        query = query.order("created_at", desc=desc).order("id", desc=desc)
+    query = query.limit(page.limit + 1, foreign_table=relation)
+    if page.cursor:
+        created_at, row_id = decode_cursor(page.cursor)
+        query = query.or_(keyset_condition("lt" if desc else "gt", created_at, row_id), reference_table=relation)
+    return query
+
+
+def keyset_condition(op: str, created_at: str, row_id: Optional[str] = None) -> str:
+    """Filtro `or` das linhas depois (`gt`) ou antes (`lt`) de (created_at, id).
+
+    Sem `row_id` compara só o created_at; com ele, linhas com o mesmo timestamp são desempatadas
+    pelo id, como na ordenação das listagens.
+    """
+    if row_id is None:
+        return f'created_at.{op}."{created_at}"'
+    return f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}."{row_id}")'
+
+
+def finish_page(
+    rows: Optional[List[Dict[str, Any]]],
+    page: PageParams,
+    response: Response,
+    cursor_columns: Sequence[str] = KEYSET_COLUMNS,
+) -> List[Dict[str, Any]]:
+    rows = rows or []
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1], cursor_columns)
+    return rows
+
+
+def page_response(
+    rows: Optional[List[Dict[str, Any]]],
+    page: PageParams,
+    request: Request,
+    response: Response,
+    cursor_columns: Sequence[str] = KEYSET_COLUMNS,
+    cache_control: str = CACHE_PRIVATE,
+) -> Response:
+    """`finish_page` já serializado com orjson, sem passar pelo jsonable_encoder do FastAPI,
+    com ETag da página e 304 quando o cliente já a tem (ver `conditional_response`)."""
+    rows = finish_page(rows, page, response, cursor_columns)
+    return conditional_response(request, response, rows, cache_control)
+
+
+PASSTHROUGH_HEADERS = ("content-range",)
+
+
+async def passthrough(
+    query: Any,
+    request: Request,
+    not_found: Optional[str] = None,
+    cache_control: str = CACHE_PRIVATE,
+) -> Response:
+    """Repassa ao cliente o corpo da resposta do PostgREST sem decodificar o JSON.
+
+    Não é streaming: o corpo do upstream é lido inteiro em memória, porque o ETag (e o 304) é o
+    hash dos bytes recebidos. O ganho é não decodificar nem reserializar o JSON. Só serve para
+    rotas que devolvem exatamente o que o PostgREST responde e não passam pelo cache de respostas.
+    Com `not_found`, a consulta é de um único objeto e nenhuma linha vira 404 com essa mensagem.
+    """
+    headers = dict(query.headers)
+    if not_found:
+        headers["Accept"] = "application/vnd.pgrst.object+json"
+    # corpo sem compressão: o ETag não depende da codificação escolhida pelo upstream, e a
+    # compressão para o cliente final fica com o CompressionMiddleware
+    headers["Accept-Encoding"] = "identity"
+    upstream = await query.session.request(
+        query.http_method, query.path, params=query.params, headers=headers, json=query.json
+    )
+
+    if upstream.is_error:
+        if not_found and upstream.status_code == 406:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+        try:
+            error = upstream.json()
+        except ValueError:
+            error = {"message": upstream.text}
+        # sem código do PostgREST (erro do gateway): vale o status HTTP
+        raise upstream_exception({**error, "code": error.get("code") or upstream.status_code})
 
+    return conditional_bytes(
+        request,
+        upstream.content,
+        {key: upstream.headers[key] for key in PASSTHROUGH_HEADERS if key in upstream.headers},
+        cache_control,
+    )
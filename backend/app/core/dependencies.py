@@ -1,10 +1,12 @@
 from typing import Annotated, Any, Dict
 
-import httpx
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Header, HTTPException, Query, status
 
 from app.core.config import settings
-from app.core.supabase import supabase_client
+from app.core.errors import UPSTREAM_UNAVAILABLE
+from app.core.http import connections
+from app.core.security import InvalidToken, RemoteCheckRequired, read_stream_ticket, token_verifier
+from app.core.supabase import get_postgrest_client
 
 
 async def get_current_user(authorization: Annotated[str | None, Header(alias="Authorization")] = None) -> Dict[str, Any]:
@@ -12,14 +14,45 @@ async def get_current_user(authorization: Annotated[str | None, Header(alias="Au
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token não fornecido")
 
     token = authorization.split(" ", maxsplit=1)[1]
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "apikey": settings.supabase_anon_key,
-    }
+    return await authenticate_token(token)
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.get(f"{settings.supabase_url}/auth/v1/user", headers=headers)
 
+async def get_stream_user(
+    authorization: Annotated[str | None, Header(alias="Authorization")] = None,
+    ticket: Annotated[str | None, Query()] = None,
+) -> Dict[str, Any]:
+    # EventSource não envia headers: streams aceitam na query string um ticket de POST
+    # /realtime/ticket, que expira em segundos, e nunca o access token (que iria para os logs)
+    if authorization is None and ticket:
+        try:
+            return read_stream_ticket(ticket)
+        except InvalidToken:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Ticket inválido ou expirado")
+    return await get_current_user(authorization)
+
+
+async def authenticate_token(token: str) -> Dict[str, Any]:
+    if settings.auth_mode == "remote":
+        return await fetch_remote_user(token)
+
+    try:
+        return await token_verifier.verify(token)
+    except RemoteCheckRequired:
+        # projeto com segredo HS256 que não foi configurado: mesmo caminho do modo remote, mas o
+        # resultado entra no cache do verificador e as próximas requisições não vão ao GoTrue
+        user = await fetch_remote_user(token)
+        token_verifier.remember(token, user)
+        return user
+    except InvalidToken:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido ou expirado")
+
+
+async def fetch_remote_user(token: str) -> Dict[str, Any]:
+    response = await connections.get("auth").get("/user", headers={"Authorization": f"Bearer {token}"})
+
+    if response.status_code >= 500:
+        # GoTrue fora do ar não é token inválido: o cliente não deve descartar a sessão
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=UPSTREAM_UNAVAILABLE)
     if response.status_code != status.HTTP_200_OK:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido ou expirado")
 
@@ -32,5 +65,5 @@ async def get_current_user(authorization: Annotated[str | None, Header(alias="Au
 
 
 def get_supabase():
-    return supabase_client
+    return get_postgrest_client()
 
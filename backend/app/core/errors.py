@@ -0,0 +1,94 @@
+import logging
+import math
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from postgrest.exceptions import APIError
+
+from app.core.resilience import CircuitOpen
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_UNAVAILABLE = "Serviço temporariamente indisponível, tente novamente em instantes"
+UPSTREAM_TIMEOUT = "O banco de dados demorou para responder"
+UPSTREAM_FAILED = "Falha ao consultar o banco de dados"
+
+# SQLSTATE -> status, seguindo em linhas gerais a tabela do próprio PostgREST; erros do servidor
+# viram 502/503/504 (a falha é do upstream, não desta API)
+SQLSTATE_STATUS = {
+    "23503": status.HTTP_409_CONFLICT,
+    "23505": status.HTTP_409_CONFLICT,
+    "42501": status.HTTP_403_FORBIDDEN,
+    "57014": status.HTTP_504_GATEWAY_TIMEOUT,  # statement_timeout
+    "P0001": status.HTTP_400_BAD_REQUEST,  # RAISE EXCEPTION numa função
+}
+SQLSTATE_CLASS_STATUS = {
+    "08": status.HTTP_503_SERVICE_UNAVAILABLE,  # conexão
+    "22": status.HTTP_400_BAD_REQUEST,  # dado inválido (ex.: uuid malformado)
+    "23": status.HTTP_400_BAD_REQUEST,  # restrição (not null, check)
+    "40": status.HTTP_503_SERVICE_UNAVAILABLE,  # serialização/deadlock: vale repetir
+    "53": status.HTTP_503_SERVICE_UNAVAILABLE,  # recursos esgotados
+    "57": status.HTTP_503_SERVICE_UNAVAILABLE,  # banco reiniciando
+}
+POSTGREST_STATUS = {
+    "PGRST0": status.HTTP_503_SERVICE_UNAVAILABLE,  # PostgREST sem conexão com o banco
+    "PGRST1": status.HTTP_400_BAD_REQUEST,  # parâmetros da requisição
+    "PGRST2": status.HTTP_400_BAD_REQUEST,  # coluna/relação inexistente
+}
+
+
+def upstream_status(code: Any) -> int:
+    code = str(code or "")
+    if code.isdigit():
+        # corpo não JSON (gateway do Supabase): o postgrest-py põe o status HTTP no código
+        status_code = int(code)
+        return status_code if status_code in (503, 504) else status.HTTP_502_BAD_GATEWAY
+    if code == "PGRST116":
+        # nenhuma (ou mais de uma) linha numa consulta de objeto único
+        return status.HTTP_404_NOT_FOUND
+    if code in SQLSTATE_STATUS:
+        return SQLSTATE_STATUS[code]
+    if code.startswith("PGRST"):
+        return POSTGREST_STATUS.get(code[:6], status.HTTP_502_BAD_GATEWAY)
+    return SQLSTATE_CLASS_STATUS.get(code[:2], status.HTTP_502_BAD_GATEWAY)
+
+
+def upstream_exception(error: Dict[str, Any], status_code: Optional[int] = None) -> HTTPException:
+    """HTTPException para um erro do PostgREST; a mensagem só é repassada nos erros 4xx."""
+    status_code = status_code or upstream_status(error.get("code"))
+    if status_code < 500:
+        return HTTPException(status_code=status_code, detail=error.get("message") or UPSTREAM_FAILED)
+    logger.warning("Erro do PostgREST (%s): %s", error.get("code"), error.get("message"))
+    detail = UPSTREAM_TIMEOUT if status_code == status.HTTP_504_GATEWAY_TIMEOUT else UPSTREAM_FAILED
+    if status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+        detail = UPSTREAM_UNAVAILABLE
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Falhas do upstream (e não da requisição), que justificam servir uma resposta velha."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, APIError):
+        return upstream_status(exc.code) >= 500
+    return isinstance(exc, HTTPException) and exc.status_code >= 500
+
+
+def _error_response(exc: HTTPException, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+async def postgrest_error_handler(request: Request, exc: APIError) -> ORJSONResponse:
+    return _error_response(upstream_exception(exc.json()))
+
+
+async def transport_error_handler(request: Request, exc: httpx.TransportError) -> ORJSONResponse:
+    if isinstance(exc, CircuitOpen):
+        retry_after = {"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+        return _error_response(HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, UPSTREAM_UNAVAILABLE), retry_after)
+    logger.warning("Falha de comunicação com o Supabase: %r", exc)
+    if isinstance(exc, httpx.TimeoutException):
+        return _error_response(HTTPException(status.HTTP_504_GATEWAY_TIMEOUT, UPSTREAM_TIMEOUT))
+    return _error_response(HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, UPSTREAM_UNAVAILABLE))
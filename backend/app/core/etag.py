@@ -0,0 +1,73 @@
+import hashlib
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request, Response, status
+
+# Políticas de Cache-Control: todas as respostas dependem do usuário autenticado, então só
+# o cache do próprio cliente pode guardá-las.
+# Catálogo (aulas, demandas, fórum): pode ser reutilizado por alguns segundos sem revalidar.
+CACHE_CATALOG = "private, max-age=30, stale-while-revalidate=30"
+# Dados do próprio usuário (perfil, inscrições, mensagens): sempre revalida com If-None-Match.
+CACHE_PRIVATE = "private, no-cache"
+
+# resposta servida do cache depois do TTL (ver ResponseCache.get_or_revalidate)
+STALE_WARNING = '110 - "Response is Stale"'
+
+# sufixos que o CompressionMiddleware acrescenta ao ETag da representação comprimida
+ENCODING_SUFFIXES = ('-gzip"', '-br"')
+
+
+def etag_for_bytes(body: bytes) -> str:
+    # ETag forte: hash do corpo exatamente como é enviado
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _strip_encoding(etag: str) -> str:
+    for suffix in ENCODING_SUFFIXES:
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # comparação fraca (RFC 9110): ignora W/ e a codificação usada na resposta anterior
+    candidates = {_strip_encoding(value.strip().removeprefix("W/")) for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def mark_stale(response: Response, age: float) -> None:
+    if age > 0:
+        response.headers["Age"] = str(int(age))
+        response.headers["Warning"] = STALE_WARNING
+
+
+def conditional_bytes(
+    request: Request,
+    body: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    cache_control: str = CACHE_PRIVATE,
+) -> Response:
+    """Resposta JSON com ETag e Cache-Control; 304 vazio se o cliente já tem essa versão."""
+    etag = etag_for_bytes(body)
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    payload: Any,
+    cache_control: str = CACHE_PRIVATE,
+) -> Response:
+    """`conditional_bytes` para um payload ainda não serializado.
+
+    Uma Response devolvida pela rota ignora os headers do `response` injetado,
+    então eles são copiados aqui (cursor, X-Has-More etc.).
+    """
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return conditional_bytes(request, orjson.dumps(payload), headers, cache_control)
@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+
+from app.core.config import Settings, settings
+from app.core.metrics import MeteredStream, record_upstream, record_upstream_event
+from app.core.resilience import (
+    CLOSED,
+    CircuitOpen,
+    EndpointHealth,
+    ResiliencePolicy,
+    endpoint_key,
+)
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUS_CODES = {502, 503, 504}
+# rajada máxima de hedges acumulada pelo orçamento
+HEDGE_TOKEN_CAP = 10.0
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    hedges: int = 0
+    rejected: int = 0
+
+
+@dataclass
+class PoolSpec:
+    base_url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    # rota barata usada para abrir a primeira conexão antes do tráfego real
+    warmup_path: str = "/"
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Reenvia com backoff exponencial falhas de conexão e 502/503/504 em métodos idempotentes.
+
+    Cada endpoint tem um circuit breaker e um histórico de latência (ver app.core.resilience):
+    com o circuito aberto a chamada falha na hora com CircuitOpen, e as leituras usam um
+    timeout proporcional ao p99 observado e disparam uma cópia quando passam do p95.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        transport: httpx.AsyncHTTPTransport,
+        retries: int,
+        backoff: float,
+        stats: PoolStats,
+        policy: ResiliencePolicy,
+        endpoints: Dict[str, EndpointHealth],
+        base_path: str = "",
+    ):
+        self.name = name
+        self.transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = stats
+        self.policy = policy
+        self.endpoints = endpoints
+        self.base_path = base_path
+        self._hedge_tokens = 0.0
+
+    def _endpoint(self, request: httpx.Request) -> Tuple[str, EndpointHealth]:
+        key = endpoint_key(request.method, request.url.path, self.base_path)
+        health = self.endpoints.get(key)
+        if health is None:
+            health = self.endpoints[key] = EndpointHealth(self.policy.failure_threshold, self.policy.reset_timeout)
+        return key, health
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in IDEMPOTENT_METHODS
+        endpoint, health = self._endpoint(request)
+        started = time.perf_counter()
+        self.stats.requests += 1
+        self.stats.in_flight += 1
+        try:
+            attempt = 0
+            while True:
+                if not health.breaker.allow():
+                    self.stats.rejected += 1
+                    record_upstream_event(self.name, "rejected")
+                    raise CircuitOpen(endpoint, health.breaker.retry_after(), request=request)
+                try:
+                    response = await self._attempt(request, health, idempotent)
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    health.breaker.record_failure()
+                    # a requisição não chegou a ser enviada: seguro repetir qualquer método
+                    if attempt >= self.retries:
+                        raise
+                except httpx.TransportError:
+                    health.breaker.record_failure()
+                    raise
+                else:
+                    if response.status_code >= 500:
+                        health.breaker.record_failure()
+                    else:
+                        health.breaker.record_success()
+                    if not (idempotent and response.status_code in RETRY_STATUS_CODES and attempt < self.retries):
+                        return self._metered(request, response, started)
+                    await response.aclose()
+
+                self.stats.retries += 1
+                await asyncio.sleep(self.backoff * (2**attempt) * random.uniform(0.5, 1.5))
+                attempt += 1
+        except Exception as exc:
+            self.stats.errors += 1
+            outcome = "circuit_open" if isinstance(exc, CircuitOpen) else "error"
+            record_upstream(self.name, request.method, outcome, time.perf_counter() - started, 0)
+            raise
+        finally:
+            self.stats.in_flight -= 1
+
+    async def _attempt(self, request: httpx.Request, health: EndpointHealth, idempotent: bool) -> httpx.Response:
+        # escritas mantêm o timeout configurado: cortá-las cedo não impede que sejam aplicadas
+        if not idempotent:
+            return await self._send(request, health)
+
+        policy = self.policy
+        p99 = health.latency.quantile(0.99) if policy.timeout_multiplier else None
+        if p99 is not None:
+            timeout = dict(request.extensions.get("timeout", {}))
+            adaptive = max(policy.timeout_min, p99 * policy.timeout_multiplier)
+            if timeout.get("read") is None or adaptive < timeout["read"]:
+                timeout["read"] = adaptive
+                request.extensions["timeout"] = timeout
+
+        # orçamento de hedge: cada leitura rende uma fração de ficha, cada cópia gasta uma inteira
+        self._hedge_tokens = min(HEDGE_TOKEN_CAP, self._hedge_tokens + policy.hedge_budget)
+        delay = health.latency.quantile(policy.hedge_quantile) if policy.hedge_quantile else None
+        if delay is None or self._hedge_tokens < 1 or health.breaker.state != CLOSED:
+            return await self._send(request, health)
+        return await self._hedged(request, health, delay)
+
+    async def _send(self, request: httpx.Request, health: EndpointHealth) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        # só respostas boas entram no histórico: erros rápidos baixariam o timeout adaptativo
+        if response.status_code < 500:
+            health.latency.observe(time.perf_counter() - started)
+        return response
+
+    async def _hedged(self, request: httpx.Request, health: EndpointHealth, delay: float) -> httpx.Response:
+        primary = asyncio.ensure_future(self._send(request, health))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self._hedge_tokens -= 1
+        self.stats.hedges += 1
+        record_upstream_event(self.name, "hedged")
+        pending = {primary, asyncio.ensure_future(self._send(request, health))}
+        winner: Optional[httpx.Response] = None
+        error: Optional[BaseException] = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task.result()
+                    else:
+                        await task.result().aclose()
+        finally:
+            for task in pending:
+                task.cancel()
+        if winner is None:
+            raise error  # type: ignore[misc]
+        return winner
+
+    def _metered(self, request: httpx.Request, response: httpx.Response, started: float) -> httpx.Response:
+        # a duração vai até o corpo ser lido por completo, incluindo as tentativas anteriores
+        def on_close(size: int) -> None:
+            elapsed = time.perf_counter() - started
+            record_upstream(self.name, request.method, str(response.status_code), elapsed, size)
+
+        response.stream = MeteredStream(response.stream, on_close)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    def connection_stats(self) -> Dict[str, int]:
+        pool = getattr(self.transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "connections": len(connections),
+            "idle_connections": sum(1 for connection in connections if connection.is_idle()),
+        }
+
+
+class ConnectionPools:
+    """Clientes HTTP de longa duração (keep-alive/HTTP2) para o GoTrue, o PostgREST e o Storage."""
+
+    def __init__(self, config: Settings):
+        self.config = config
+        self.specs = {
+            "auth": PoolSpec(
+                base_url=f"{config.supabase_url}/auth/v1",
+                headers={"apikey": config.supabase_anon_key},
+                warmup_path="/health",
+            ),
+            "postgrest": PoolSpec(
+                base_url=f"{config.supabase_url}/rest/v1",
+                headers={
+                    **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                    "Accept-Profile": "public",
+                    "Content-Profile": "public",
+                    "apikey": config.supabase_service_key,
+                    "Authorization": f"Bearer {config.supabase_service_key}",
+                },
+            ),
+            "storage": PoolSpec(
+                base_url=f"{config.supabase_url}/storage/v1",
+                headers={
+                    "apikey": config.supabase_service_key,
+                    "Authorization": f"Bearer {config.supabase_service_key}",
+                },
+                warmup_path="/status",
+            ),
+        }
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, RetryTransport] = {}
+        self._stats: Dict[str, PoolStats] = {name: PoolStats() for name in self.specs}
+        # circuitos e latências sobrevivem à recriação dos clientes
+        self._endpoints: Dict[str, Dict[str, EndpointHealth]] = {name: {} for name in self.specs}
+        self.policy = ResiliencePolicy(
+            failure_threshold=config.http_breaker_failures,
+            reset_timeout=config.http_breaker_reset_seconds,
+            timeout_multiplier=config.http_adaptive_timeout_multiplier,
+            timeout_min=config.http_adaptive_timeout_min,
+            hedge_quantile=config.http_hedge_quantile,
+            hedge_budget=config.http_hedge_budget,
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._build(name)
+        return client
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        spec = self.specs[name]
+        config = self.config
+        transport = RetryTransport(
+            name,
+            httpx.AsyncHTTPTransport(
+                http2=config.http_pool_http2,
+                limits=httpx.Limits(
+                    max_connections=config.http_pool_max_connections,
+                    max_keepalive_connections=config.http_pool_max_keepalive,
+                    keepalive_expiry=config.http_pool_keepalive_expiry,
+                ),
+            ),
+            retries=config.http_retries,
+            backoff=config.http_retry_backoff,
+            stats=self._stats[name],
+            policy=self.policy,
+            endpoints=self._endpoints[name],
+            base_path=httpx.URL(spec.base_url).path,
+        )
+        self._transports[name] = transport
+        return httpx.AsyncClient(
+            base_url=spec.base_url,
+            headers=spec.headers,
+            transport=transport,
+            timeout=httpx.Timeout(config.http_read_timeout, connect=config.http_connect_timeout),
+            follow_redirects=True,
+        )
+
+    def open(self) -> None:
+        for name in self.specs:
+            self.get(name)
+
+    async def warm_up(self) -> None:
+        """Abre uma conexão com cada upstream (TCP, TLS e HTTP/2) antes da primeira requisição."""
+
+        async def touch(name: str) -> None:
+            try:
+                response = await self.get(name).head(self.specs[name].warmup_path)
+                await response.aclose()
+            except httpx.HTTPError as exc:
+                # só adianta trabalho: se falhar, a primeira requisição abre a conexão normalmente
+                logger.warning("Falha ao aquecer a conexão com %s: %s", name, exc)
+
+        await asyncio.gather(*(touch(name) for name in self.specs))
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        self._transports = {}
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        result = {}
+        for name, stats in self._stats.items():
+            transport = self._transports.get(name)
+            result[name] = {
+                **asdict(stats),
+                **(transport.connection_stats() if transport else {"connections": 0, "idle_connections": 0}),
+                "open_circuits": sorted(
+                    endpoint for endpoint, health in self._endpoints[name].items() if health.breaker.state != CLOSED
+                ),
+            }
+        return result
+
+
+connections = ConnectionPools(settings)
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional
+
+from fastapi import Depends, Request
+
+from app.core.cache import build_response_cache
+from app.core.config import settings
+from app.core.db import handle_response
+from app.core.dependencies import get_current_user, get_supabase
+from app.core.pubsub import IDENTITY_CHANNEL, Draining, SlowConsumer, broker
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_NAMESPACE = "identity"
+
+# cache próprio: o snapshot de cada usuário não disputa espaço com o catálogo
+identity_cache = build_response_cache(
+    settings,
+    max_entries=settings.identity_cache_max_entries,
+    ttl=settings.identity_cache_ttl_seconds,
+    prefix="fitsenior:identity",
+)
+
+
+@dataclass(frozen=True)
+class Identity:
+    user_id: str
+    roles: FrozenSet[str]
+    professional_id: Optional[str] = None
+    student_id: Optional[str] = None
+    profile: Optional[Dict[str, Any]] = field(default=None, compare=False, hash=False)
+
+    @property
+    def is_professional(self) -> bool:
+        return self.professional_id is not None
+
+    @property
+    def is_student(self) -> bool:
+        return self.student_id is not None
+
+
+def has_role(data: Dict[str, Any]) -> bool:
+    return bool(data.get("professional_id") or data.get("student_id"))
+
+
+async def load_identity(user_id: str, supabase: Any, fresh: bool = False) -> Identity:
+    """Identidade do usuário; com `fresh`, o snapshot em cache é descartado e relido do banco."""
+
+    async def fetch():
+        # perfil, papéis e vínculos numa única chamada (ver public.get_identity)
+        response = await supabase.rpc("get_identity", {"_user_id": user_id}).execute()
+        return handle_response(response) or {}
+
+    if fresh:
+        await invalidate_identity(user_id)
+    # sem papel (cadastro em andamento) não vai para o cache: o papel novo vale na hora
+    data: Dict[str, Any] = await identity_cache.get_or_fetch(IDENTITY_NAMESPACE, user_id, fetch, cacheable=has_role)
+    return Identity(
+        user_id=user_id,
+        roles=frozenset(data.get("roles") or []),
+        professional_id=data.get("professional_id"),
+        student_id=data.get("student_id"),
+        profile=data.get("profile"),
+    )
+
+
+async def invalidate_identity(user_id: str) -> None:
+    await identity_cache.discard(IDENTITY_NAMESPACE, user_id)
+
+
+async def get_identity(request: Request, user=Depends(get_current_user), supabase=Depends(get_supabase)) -> Identity:
+    # resolvida no máximo uma vez por requisição, mesmo se usada por vários dependentes
+    identity = getattr(request.state, "identity", None)
+    if identity is None or identity.user_id != user["id"]:
+        identity = request.state.identity = await load_identity(user["id"], supabase)
+    return identity
+
+
+async def recheck_identity(request: Request, identity: Identity, supabase: Any) -> Identity:
+    """Relê a identidade do banco antes de negar acesso por falta de papel.
+
+    O snapshot pode ser de antes de o usuário virar profissional ou aluno; a releitura só
+    acontece no caminho da negação, e as escritas conferem a posse no próprio banco.
+    """
+    identity = request.state.identity = await load_identity(identity.user_id, supabase, fresh=True)
+    return identity
+
+
+async def watch_identity_changes() -> None:
+    """Descarta o snapshot do usuário quando o banco avisa que perfil ou papéis mudaram.
+
+    Cobre as escritas feitas fora da API (o frontend grava professionals/students direto
+    no Supabase). Com REALTIME_BACKEND=memory os avisos do banco não chegam, e o snapshot
+    expira pelo IDENTITY_CACHE_TTL_SECONDS.
+    """
+    while True:
+        subscription = broker.subscribe([IDENTITY_CHANNEL])
+        try:
+            while True:
+                event = await subscription.get(timeout=settings.realtime_heartbeat_seconds)
+                user_id = ((event or {}).get("data") or {}).get("user_id")
+                if user_id:
+                    await invalidate_identity(user_id)
+        except SlowConsumer:
+            # avisos perdidos: nenhum snapshot é confiável
+            logger.warning("Fila de invalidação de identidades transbordou; descartando o cache")
+            await identity_cache.invalidate(IDENTITY_NAMESPACE)
+        except Draining:
+            # o worker está desligando: resubscrever só repetiria o Draining
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # ex.: backend do cache indisponível; tenta de novo sem derrubar o watcher
+            logger.exception("Falha ao processar invalidação de identidade")
+            await asyncio.sleep(1)
+        finally:
+            subscription.close()
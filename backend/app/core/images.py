@@ -0,0 +1,58 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.thumbnails import render_thumbnail
+
+
+class ImagePool:
+    """Pool de processos para o processamento de imagens de um worker.
+
+    Decodificar e redimensionar é CPU pura: no event loop atrasaria todas as requisições do
+    worker, e numa thread disputaria o GIL com ele. O pool é criado no primeiro uso, dentro do
+    worker (nunca no mestre do gunicorn), e os processos nascem com spawn: não herdam o event
+    loop, os sockets nem as threads do worker, e além do módulo principal só importam
+    app.core.thumbnails.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def thumbnail(self, path: str) -> bytes:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get(),
+                render_thumbnail,
+                path,
+                settings.upload_thumbnail_size,
+                settings.upload_thumbnail_quality,
+                settings.upload_image_max_pixels,
+            )
+        except BrokenProcessPool:
+            # um processo morreu (ex.: OOM killer): o pool é recriado no próximo upload
+            self._executor = None
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Não foi possível processar a imagem agora"
+            )
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # espera os processos saírem: o uvicorn encerra o worker com o próprio sinal depois do
+            # lifespan, sem os handlers de atexit, e um processo do pool ficaria órfão
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+image_pool = ImagePool(settings.upload_image_workers)
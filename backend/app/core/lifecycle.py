@@ -0,0 +1,30 @@
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Estado de desligamento do worker: ao receber SIGTERM, avisa quem segura conexões longas."""
+
+    def __init__(self) -> None:
+        self.draining = False
+        self._on_drain: List[Callable[[], None]] = []
+
+    def on_drain(self, callback: Callable[[], None]) -> None:
+        self._on_drain.append(callback)
+
+    def begin_drain(self) -> None:
+        # chamado no loop do worker (ver app.serve); as requisições curtas terminam sozinhas,
+        # mas streams SSE só acabam se forem avisados
+        if self.draining:
+            return
+        self.draining = True
+        for callback in self._on_drain:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Falha ao iniciar a drenagem")
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,225 @@
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+registry = CollectorRegistry()
+
+SIZE_BUCKETS = (256, 1_024, 4_096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 200, 500, 1_000)
+
+REQUEST_LATENCY = Histogram(
+    "fitsenior_http_request_duration_seconds",
+    "Latência das requisições por rota",
+    ["method", "route", "status"],
+    registry=registry,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "fitsenior_http_requests_in_progress",
+    "Requisições em andamento",
+    # com vários workers, soma só os processos vivos
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+RESPONSE_SIZE = Histogram(
+    "fitsenior_http_response_size_bytes",
+    "Tamanho do corpo das respostas por rota",
+    ["route"],
+    buckets=SIZE_BUCKETS,
+    registry=registry,
+)
+UPSTREAM_LATENCY = Histogram(
+    "fitsenior_upstream_request_duration_seconds",
+    "Duração das chamadas ao Supabase, até o fim do corpo da resposta",
+    ["upstream", "method", "status"],
+    registry=registry,
+)
+UPSTREAM_RESPONSE_SIZE = Histogram(
+    "fitsenior_upstream_response_size_bytes",
+    "Tamanho do corpo das respostas do Supabase",
+    ["upstream"],
+    buckets=SIZE_BUCKETS,
+    registry=registry,
+)
+UPSTREAM_CALLS_PER_REQUEST = Histogram(
+    "fitsenior_upstream_calls_per_request",
+    "Chamadas ao Supabase feitas por requisição",
+    ["route", "upstream"],
+    buckets=COUNT_BUCKETS,
+    registry=registry,
+)
+ROWS_RETURNED = Histogram(
+    "fitsenior_db_rows_returned",
+    "Linhas devolvidas pelo PostgREST por consulta",
+    ["route"],
+    buckets=ROW_BUCKETS,
+    registry=registry,
+)
+RATE_LIMITED = Counter(
+    "fitsenior_rate_limited_total",
+    "Requisições recusadas com 429, por tipo de limite",
+    ["scope"],
+    registry=registry,
+)
+
+UPSTREAM_EVENTS = Counter(
+    "fitsenior_upstream_events_total",
+    "Hedges disparados e chamadas recusadas por circuito aberto",
+    ["upstream", "event"],
+    registry=registry,
+)
+CACHE_EVENTS = Counter(
+    "fitsenior_cache_events_total",
+    "Eventos dos caches de respostas e identidades (hits, misses, stale...), por namespace",
+    ["namespace", "event"],
+    registry=registry,
+)
+
+UPSTREAMS = ("auth", "postgrest")
+
+
+@dataclass
+class UpstreamTiming:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class RequestTimings:
+    """Tempos acumulados da requisição atual, usados nas métricas por rota e no Server-Timing."""
+
+    started: float = field(default_factory=time.perf_counter)
+    upstreams: Dict[str, UpstreamTiming] = field(default_factory=dict)
+    rows: List[int] = field(default_factory=list)
+
+    def add_upstream(self, upstream: str, seconds: float) -> None:
+        timing = self.upstreams.setdefault(upstream, UpstreamTiming())
+        timing.calls += 1
+        timing.seconds += seconds
+
+    def server_timing(self) -> str:
+        entries = [f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}"]
+        for upstream, timing in self.upstreams.items():
+            entries.append(f'{upstream};dur={timing.seconds * 1000:.1f};desc="{timing.calls} calls"')
+        return ", ".join(entries)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def record_upstream(upstream: str, method: str, status: str, seconds: float, size: int) -> None:
+    UPSTREAM_LATENCY.labels(upstream, method, status).observe(seconds)
+    UPSTREAM_RESPONSE_SIZE.labels(upstream).observe(size)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add_upstream(upstream, seconds)
+
+
+def record_rows(count: int) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.rows.append(count)
+
+
+def record_rate_limited(scope: str) -> None:
+    RATE_LIMITED.labels(scope).inc()
+
+
+def record_upstream_event(upstream: str, event: str) -> None:
+    UPSTREAM_EVENTS.labels(upstream, event).inc()
+
+
+def record_cache_event(namespace: str, event: str) -> None:
+    CACHE_EVENTS.labels(namespace, event).inc()
+
+
+class MeteredStream(httpx.AsyncByteStream):
+    """Conta os bytes do corpo e registra a chamada quando a resposta é fechada."""
+
+    def __init__(self, stream: Any, on_close: Callable[[int], None]):
+        self.stream = stream
+        self.on_close = on_close
+        self.size = 0
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.size += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self.on_close(self.size)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    # o template da rota (ex.: /api/classes/{class_id}) mantém a cardinalidade baixa
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI puro: não bufferiza o corpo, então também serve para os streams SSE."""
+
+    def __init__(self, app: Callable[..., Awaitable[None]], server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            current_timings.reset(token)
+            route = route_label(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_code)).observe(
+                time.perf_counter() - timings.started
+            )
+            RESPONSE_SIZE.labels(route).observe(body_size)
+            for upstream in UPSTREAMS:
+                timing = timings.upstreams.get(upstream)
+                UPSTREAM_CALLS_PER_REQUEST.labels(route, upstream).observe(timing.calls if timing else 0)
+            for count in timings.rows:
+                ROWS_RETURNED.labels(route).observe(count)
+
+
+def render_metrics() -> bytes:
+    # com PROMETHEUS_MULTIPROC_DIR (definido por app.serve antes do import), cada worker grava seus
+    # valores em arquivos no diretório e qualquer um deles responde com o agregado de todos
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        aggregated = CollectorRegistry()
+        multiprocess.MultiProcessCollector(aggregated)
+        return generate_latest(aggregated)
+    return generate_latest(registry)
+
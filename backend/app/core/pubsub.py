@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.core.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+# limite do payload do NOTIFY é 8000 bytes; acima disso publica só a referência
+NOTIFY_PAYLOAD_LIMIT = 7500
+NOTIFY_CHANNEL = "app_events"
+# evento interno que acorda as inscrições quando o worker começa a desligar
+DRAIN_MARKER: Dict[str, Any] = {"type": "drain"}
+
+
+class SlowConsumer(Exception):
+    pass
+
+
+class Draining(Exception):
+    """O worker está desligando: o cliente deve reconectar (em outro worker)."""
+
+
+class Subscription:
+    """Fila limitada de eventos de um cliente; se ela enche, a inscrição é encerrada."""
+
+    def __init__(self, broker: "MemoryBroker", channels: Iterable[str], max_queue: int):
+        self.broker = broker
+        self.channels = set(channels)
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+        self.draining = False
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # cliente lento: em vez de acumular memória, derruba o stream;
+            # ao reconectar ele ressincroniza pelos cursores (after=)
+            self.overflowed = True
+
+    def drain(self) -> None:
+        self.draining = True
+        try:
+            # acorda quem está esperando no get; com a fila cheia ele já não espera
+            self.queue.put_nowait(DRAIN_MARKER)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        if self.draining:
+            raise Draining()
+        if self.overflowed and self.queue.empty():
+            raise SlowConsumer()
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is DRAIN_MARKER:
+            raise Draining()
+        return event
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    """Pub/sub no próprio processo: atende a um único worker."""
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.draining = False
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        self._subscriptions.clear()
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(self, channels, self.max_queue)
+        for channel in subscription.channels:
+            self._subscriptions[channel].add(subscription)
+        if self.draining:
+            subscription.drain()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for channel in subscription.channels:
+            subscribers = self._subscriptions.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[channel]
+
+    def _all_subscriptions(self) -> Set[Subscription]:
+        return {subscription for subscribers in self._subscriptions.values() for subscription in subscribers}
+
+    def drain(self) -> None:
+        self.draining = True
+        for subscription in self._all_subscriptions():
+            subscription.drain()
+
+    def subscriber_count(self) -> int:
+        return len(self._all_subscriptions())
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        self._fan_out(channel, event)
+
+    def _fan_out(self, channel: str, event: Dict[str, Any]) -> None:
+        for subscription in list(self._subscriptions.get(channel, ())):
+            subscription.deliver(event)
+
+
+class PostgresBroker(MemoryBroker):
+    """Distribui eventos entre workers via LISTEN/NOTIFY; a entrega local continua em memória."""
+
+    def __init__(self, dsn: str, max_queue: int):
+        super().__init__(max_queue)
+        self.dsn = dsn
+        self._listener: Any = None
+        self._publishers: Any = None
+
+    async def start(self) -> None:
+        import asyncpg  # dependência opcional, só necessária com REALTIME_BACKEND=postgres
+
+        # a conexão do LISTEN fica dedicada; publicações usam um pool pequeno à parte
+        self._listener = await asyncpg.connect(self.dsn)
+        await self._listener.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        self._publishers = await asyncpg.create_pool(self.dsn, min_size=1, max_size=4)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+        if self._publishers is not None:
+            await self._publishers.close()
+            self._publishers = None
+        await super().stop()
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        payload = json.dumps({"channel": channel, "event": event}, default=str)
+        if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+            reference = {"type": event.get("type"), "data": {"id": (event.get("data") or {}).get("id")}}
+            payload = json.dumps({"channel": channel, "event": reference}, default=str)
+        await self._publishers.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Payload de NOTIFY inválido ignorado")
+            return
+        self._fan_out(message["channel"], message["event"])
+
+
+def build_broker(config: Settings) -> MemoryBroker:
+    if config.realtime_backend == "postgres":
+        if not config.realtime_database_url:
+            raise RuntimeError("REALTIME_DATABASE_URL é obrigatório com REALTIME_BACKEND=postgres")
+        return PostgresBroker(config.realtime_database_url, config.realtime_queue_size)
+    return MemoryBroker(config.realtime_queue_size)
+
+
+# mudanças de perfil/papéis, publicadas pelo trigger notify_identity_change no banco
+IDENTITY_CHANNEL = "identity"
+
+
+def user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def post_channel(post_id: str) -> str:
+    return f"post:{post_id}"
+
+
+broker = build_broker(settings)
@@ -0,0 +1,247 @@
+import logging
+import math
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Tuple
+
+import orjson
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.cache import TTLCache
+from app.core.config import Settings, settings
+from app.core.dependencies import get_current_user, get_stream_user
+from app.core.metrics import record_rate_limited
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket: até `capacity` requisições seguidas, repostas a `rate` por segundo."""
+
+    capacity: float
+    rate: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        # formato "N/período", ex.: "120/minute"
+        count, _, period = value.partition("/")
+        if period not in PERIODS or not count.strip().isdigit() or int(count) <= 0:
+            raise ValueError(f"Limite inválido: {value!r} (use N/second, N/minute ou N/hour)")
+        return cls(capacity=float(count), rate=int(count) / PERIODS[period])
+
+
+def take_token(tokens: float, updated_at: float, now: float, limit: RateLimit) -> Tuple[float, float]:
+    """Retorna (tokens restantes, espera em segundos); espera 0 quando a requisição passa."""
+    tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.rate
+
+
+class MemoryRateLimitStore:
+    """Buckets no próprio processo: cada worker aplica o limite separadamente."""
+
+    def __init__(self, max_keys: int):
+        # um bucket parado até encher de novo equivale a um bucket novo, então expira
+        self._buckets: TTLCache[Tuple[float, float]] = TTLCache(max_size=max_keys, ttl=0)
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key) or (limit.capacity, now)
+        tokens, wait = take_token(tokens, updated_at, now, limit)
+        self._buckets.set(key, (tokens, now), ttl=limit.capacity / limit.rate)
+        return wait
+
+    async def aclose(self) -> None:
+        self._buckets.clear()
+
+
+# mesmo cálculo de `take_token`, atômico no Redis e com o relógio do servidor Redis
+REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitStore:
+    """Buckets compartilhados entre workers em qualquer servidor compatível com Redis."""
+
+    def __init__(self, url: str, prefix: str = "fitsenior:ratelimit"):
+        import redis.asyncio as redis  # dependência opcional, só necessária com RATE_LIMIT_BACKEND=redis
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(REDIS_TOKEN_BUCKET)
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        return float(await self._script(keys=[f"{self.prefix}:{key}"], args=[limit.capacity, limit.rate]))
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+
+class TooManyRequests(HTTPException):
+    def __init__(self, retry_after: float, detail: str = "Muitas requisições; tente novamente em instantes"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class RateLimiter:
+    """Limites por IP (antes da autenticação) e por usuário e rota, mais as cotas de
+    requisições simultâneas e de streams abertos de cada usuário (sempre por worker)."""
+
+    def __init__(self, store: Any, config: Settings):
+        self.store = store
+        self.ip_limit = RateLimit.parse(config.rate_limit_ip)
+        self.user_limit = RateLimit.parse(config.rate_limit_user)
+        self.route_limits = {route: RateLimit.parse(value) for route, value in config.rate_limit_routes.items()}
+        self.user_concurrency = config.rate_limit_user_concurrency
+        self.user_streams = config.rate_limit_user_streams
+        self.trust_forwarded = config.rate_limit_trust_forwarded
+        self.api_prefix = config.api_prefix
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._streams: Dict[str, int] = defaultdict(int)
+
+    async def _hit(self, scope: str, key: str, limit: RateLimit) -> None:
+        try:
+            wait = await self.store.hit(key, limit)
+        except Exception as exc:
+            # backend compartilhado fora do ar: melhor deixar passar do que derrubar a API
+            logger.warning("Falha ao consultar o limite de requisições: %s", exc)
+            return
+        if wait > 0:
+            record_rate_limited(scope)
+            raise TooManyRequests(wait)
+
+    def client_ip(self, scope: Dict[str, Any]) -> str:
+        if self.trust_forwarded:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def check_ip(self, scope: Dict[str, Any]) -> None:
+        await self._hit("ip", f"ip:{self.client_ip(scope)}", self.ip_limit)
+
+    async def check_user(self, request: Request, user_id: str) -> None:
+        route = getattr(request.scope.get("route"), "path", "").removeprefix(self.api_prefix)
+        route_key = f"{request.method} {route}"
+        limit = self.route_limits.get(route_key)
+        if limit is None:
+            # rotas sem limite próprio compartilham o bucket padrão do usuário
+            await self._hit("user", f"user:{user_id}", self.user_limit)
+        else:
+            await self._hit("route", f"user:{user_id}:{route_key}", limit)
+
+    @asynccontextmanager
+    async def concurrency(self, user_id: str) -> AsyncIterator[None]:
+        if self._in_flight[user_id] >= self.user_concurrency:
+            record_rate_limited("concurrency")
+            raise TooManyRequests(1, "Requisições simultâneas demais para este usuário")
+        self._in_flight[user_id] += 1
+        try:
+            yield
+        finally:
+            self._in_flight[user_id] -= 1
+            if not self._in_flight[user_id]:
+                del self._in_flight[user_id]
+
+    def open_stream(self, user_id: str) -> None:
+        # o stream dura mais que a requisição (e que as dependências): quem abre chama close_stream
+        if self._streams[user_id] >= self.user_streams:
+            record_rate_limited("streams")
+            raise TooManyRequests(5, "Streams abertos demais para este usuário")
+        self._streams[user_id] += 1
+
+    def close_stream(self, user_id: str) -> None:
+        self._streams[user_id] -= 1
+        if not self._streams[user_id]:
+            del self._streams[user_id]
+
+    async def aclose(self) -> None:
+        await self.store.aclose()
+
+
+def build_rate_limiter(config: Settings) -> RateLimiter:
+    if config.rate_limit_backend == "redis":
+        if not config.rate_limit_redis_url:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL é obrigatório com RATE_LIMIT_BACKEND=redis")
+        store: Any = RedisRateLimitStore(config.rate_limit_redis_url)
+    else:
+        store = MemoryRateLimitStore(max_keys=config.rate_limit_max_keys)
+    return RateLimiter(store, config)
+
+
+rate_limiter = build_rate_limiter(settings)
+
+
+class RateLimitMiddleware:
+    """Limite por IP nas rotas da API, aplicado antes da autenticação: um cliente em loop
+    não chega a gerar chamadas ao GoTrue nem ao PostgREST."""
+
+    def __init__(self, app: Callable[..., Awaitable[None]], limiter: RateLimiter, path_prefix: str = ""):
+        self.app = app
+        self.limiter = limiter
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.limiter.check_ip(scope)
+        except TooManyRequests as exc:
+            body = orjson.dumps({"detail": exc.detail})
+            headers = [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", exc.headers["Retry-After"].encode()),
+            ]
+            await send({"type": "http.response.start", "status": exc.status_code, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+        await self.app(scope, receive, send)
+
+
+async def enforce_user_limits(request: Request, user=Depends(get_current_user)) -> AsyncIterator[None]:
+    """Dependência dos routers da API: limite por usuário e rota e cota de simultâneas.
+
+    Reaproveita o `get_current_user` da rota (o FastAPI resolve a dependência uma vez só).
+    """
+    if not settings.rate_limit_enabled:
+        yield
+        return
+    await rate_limiter.check_user(request, user["id"])
+    async with rate_limiter.concurrency(user["id"]):
+        yield
+
+
+async def enforce_stream_limits(request: Request, user=Depends(get_stream_user)) -> None:
+    # streams SSE ficam abertos por muito tempo: contam no limite de conexões e na cota de streams
+    # abertos (ver realtime.stream), não na cota de simultâneas
+    if settings.rate_limit_enabled:
+        await rate_limiter.check_user(request, user["id"])
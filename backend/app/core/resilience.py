@@ -0,0 +1,106 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# o quantil é recalculado a cada N amostras novas, não a cada requisição
+QUANTILE_REFRESH_SAMPLES = 20
+
+
+class CircuitOpen(httpx.TransportError):
+    """Chamada recusada sem ir ao upstream: o endpoint está falhando (ver CircuitBreaker)."""
+
+    def __init__(self, endpoint: str, retry_after: float, request: Optional[httpx.Request] = None):
+        super().__init__(f"Circuito aberto para {endpoint}", request=request)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Abre após `failure_threshold` falhas seguidas; depois de `reset_timeout` deixa passar
+    uma sonda por vez, e a primeira resposta boa fecha o circuito de novo."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            return False
+        # a sonda reinicia o relógio: se ela travar ou for cancelada, outra passa no próximo ciclo
+        self.state = HALF_OPEN
+        self.opened_at = now
+        return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Latências recentes (até os headers da resposta) de um endpoint, para timeout e hedge."""
+
+    def __init__(self, size: int = 200, min_samples: int = QUANTILE_REFRESH_SAMPLES):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+        self._sorted: List[float] = []
+        self._pending = 0
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self._pending += 1
+        if self._pending >= QUANTILE_REFRESH_SAMPLES:
+            self._sorted = sorted(self.samples)
+            self._pending = 0
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        if len(self._sorted) < self.min_samples:
+            return None
+        return self._sorted[min(len(self._sorted) - 1, int(fraction * len(self._sorted)))]
+
+
+@dataclass
+class ResiliencePolicy:
+    failure_threshold: int
+    reset_timeout: float
+    # 0 desliga o timeout adaptativo / o hedge
+    timeout_multiplier: float
+    timeout_min: float
+    hedge_quantile: float
+    hedge_budget: float
+
+
+class EndpointHealth:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyTracker()
+
+
+def endpoint_key(method: str, path: str, base_path: str) -> str:
+    # até dois segmentos depois da base: "GET classes", "POST rpc/enroll_student";
+    # ids nunca entram no caminho do PostgREST (vão nos filtros da query string)
+    relative = path[len(base_path) :] if path.startswith(base_path) else path
+    segments = [segment for segment in relative.split("/") if segment][:2]
+    return f"{method} {'/'.join(segments)}"
+
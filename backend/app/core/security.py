@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import jwt
+
+from app.core.cache import TTLCache
+from app.core.config import Settings, settings
+from app.core.http import connections
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
+# audiência própria: um ticket de stream não vale como access token, nem o contrário
+STREAM_TICKET_AUDIENCE = "fitsenior-stream"
+# intervalo mínimo entre refreshes forçados por `kid` desconhecido
+JWKS_MIN_REFRESH_SECONDS = 30
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class RemoteCheckRequired(Exception):
+    """Token HS256 sem SUPABASE_JWT_SECRET configurado: só o GoTrue consegue validá-lo."""
+
+
+class JWKSCache:
+    """Chaves públicas do GoTrue, renovadas em segundo plano quando ficam velhas."""
+
+    def __init__(self, jwks_path: str, refresh_interval: float):
+        self.jwks_path = jwks_path
+        self.refresh_interval = refresh_interval
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _age(self) -> float:
+        return time.monotonic() - self._fetched_at
+
+    async def get_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        if not self._keys:
+            await self.refresh()
+        elif self._age() > self.refresh_interval:
+            self._schedule_refresh()
+
+        key = self._keys.get(kid or "")
+        if key is None and self._age() > JWKS_MIN_REFRESH_SECONDS:
+            # rotação de chave: tenta uma vez buscar o conjunto novo
+            await self.refresh()
+            key = self._keys.get(kid or "")
+        return key
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            if self._keys and self._age() < JWKS_MIN_REFRESH_SECONDS:
+                return
+            try:
+                response = await connections.get("auth").get(self.jwks_path)
+                response.raise_for_status()
+                jwk_set = jwt.PyJWKSet.from_dict(response.json())
+            except (httpx.HTTPError, jwt.PyJWKSetError, ValueError) as exc:
+                logger.warning("Falha ao atualizar JWKS: %s", exc)
+                return
+            self._keys = {key.key_id or "": key for key in jwk_set.keys}
+            self._fetched_at = time.monotonic()
+
+
+class TokenVerifier:
+    """Valida access tokens do Supabase localmente, com cache das claims por token."""
+
+    def __init__(self, config: Settings):
+        self.secret = config.supabase_jwt_secret
+        if config.auth_mode == "local" and not self.secret:
+            logger.warning("SUPABASE_JWT_SECRET ausente: tokens HS256 serão validados em /auth/v1/user")
+        self.audience = config.auth_jwt_audience
+        self.jwks = JWKSCache(
+            "/.well-known/jwks.json",
+            refresh_interval=config.auth_jwks_refresh_seconds,
+        )
+        self.cache: TTLCache[Dict[str, Any]] = TTLCache(
+            max_size=config.auth_cache_max_size,
+            ttl=config.auth_cache_ttl_seconds,
+        )
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        user = self.cache.get(token)
+        if user is not None:
+            return user
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.secret:
+                raise RemoteCheckRequired()
+            key: Any = self.secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            jwk = await self.jwks.get_key(header.get("kid"))
+            if jwk is None:
+                raise InvalidToken("Chave de assinatura desconhecida")
+            key = jwk.key
+        else:
+            raise InvalidToken(f"Algoritmo não suportado: {algorithm}")
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.InvalidTokenError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+        user = user_from_claims(claims)
+        self.cache.set(token, user, ttl=min(self.cache.ttl, claims["exp"] - time.time()))
+        return user
+
+    def remember(self, token: str, user: Dict[str, Any]) -> None:
+        """Guarda no cache um usuário confirmado pelo GoTrue (HS256 sem segredo configurado).
+
+        A assinatura já foi conferida em /auth/v1/user; do token só se lê o exp, para a entrada
+        não sobreviver a ele.
+        """
+        try:
+            expires_at = jwt.decode(token, options={"verify_signature": False})["exp"]
+        except (jwt.InvalidTokenError, KeyError):
+            return
+        self.cache.set(token, user, ttl=min(self.cache.ttl, expires_at - time.time()))
+
+
+def user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    # mesmo formato (campos principais) do usuário retornado por /auth/v1/user
+    return {
+        "id": claims["sub"],
+        "aud": claims.get("aud"),
+        "role": claims.get("role"),
+        "email": claims.get("email"),
+        "phone": claims.get("phone"),
+        "app_metadata": claims.get("app_metadata", {}),
+        "user_metadata": claims.get("user_metadata", {}),
+        "session_id": claims.get("session_id"),
+    }
+
+
+def issue_stream_ticket(user_id: str) -> str:
+    """Ticket curto para abrir o stream SSE, no lugar do access token na query string.
+
+    Assinado com a service key, que todos os workers conhecem: o ticket emitido num worker vale
+    nos outros. Se aparecer num log de acesso, expira em REALTIME_TICKET_TTL_SECONDS.
+    """
+    claims = {
+        "sub": user_id,
+        "aud": STREAM_TICKET_AUDIENCE,
+        "exp": int(time.time()) + settings.realtime_ticket_ttl_seconds,
+    }
+    return jwt.encode(claims, settings.supabase_service_key, algorithm="HS256")
+
+
+def read_stream_ticket(ticket: str) -> Dict[str, Any]:
+    try:
+        claims = jwt.decode(
+            ticket,
+            settings.supabase_service_key,
+            algorithms=["HS256"],
+            audience=STREAM_TICKET_AUDIENCE,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.InvalidTokenError as exc:
+        raise InvalidToken(str(exc)) from exc
+    return {"id": claims["sub"]}
+
+
+token_verifier = TokenVerifier(settings)
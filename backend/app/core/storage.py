@@ -0,0 +1,98 @@
+import logging
+from typing import AsyncIterable, List, Union
+
+import httpx
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.errors import upstream_exception
+from app.core.http import connections
+
+logger = logging.getLogger(__name__)
+
+# buckets criados pela migração inicial; as policies exigem a pasta `<user_id>/`
+AVATARS_BUCKET = "avatars"
+CERTIFICATES_BUCKET = "health-certificates"
+
+# objetos com nome único nunca mudam de conteúdo: o CDN do Storage pode guardá-los por um ano
+IMMUTABLE_MAX_AGE = 31_536_000
+
+
+def public_url(bucket: str, path: str) -> str:
+    return f"{settings.supabase_url}/storage/v1/object/public/{bucket}/{path}"
+
+
+def authenticated_url(bucket: str, path: str) -> str:
+    # bucket privado: o download exige o JWT do dono (policy "Users can view their own ...")
+    return f"{settings.supabase_url}/storage/v1/object/authenticated/{bucket}/{path}"
+
+
+def raise_for_storage(response: httpx.Response) -> None:
+    if response.is_success:
+        return
+    try:
+        error = response.json()
+    except ValueError:
+        error = {}
+    if response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Arquivo grande demais")
+    # com a service key, um 4xx do Storage (bucket inexistente, caminho inválido) é falha desta
+    # API, não do cliente: vira 502 como os erros do servidor
+    message = error.get("message") or error.get("error") or response.reason_phrase
+    raise upstream_exception({"code": str(response.status_code), "message": message})
+
+
+async def upload_object(
+    bucket: str,
+    path: str,
+    content: Union[bytes, AsyncIterable[bytes]],
+    content_type: str,
+    upsert: bool = False,
+    max_age: int = 3_600,
+) -> None:
+    """Envia um objeto ao Storage; com um iterável assíncrono o corpo segue em streaming."""
+    response = await connections.get("storage").post(
+        f"/object/{bucket}/{path}",
+        content=content,
+        headers={
+            "Content-Type": content_type,
+            "Cache-Control": f"max-age={max_age}",
+            "x-upsert": "true" if upsert else "false",
+        },
+        # o Storage só responde depois de gravar o arquivo inteiro
+        timeout=httpx.Timeout(settings.upload_timeout_seconds, connect=settings.http_connect_timeout),
+    )
+    raise_for_storage(response)
+
+
+async def list_objects(bucket: str, folder: str) -> List[str]:
+    response = await connections.get("storage").post(
+        f"/object/list/{bucket}", json={"prefix": folder, "limit": 1_000, "offset": 0}
+    )
+    raise_for_storage(response)
+    return [f"{folder}/{item['name']}" for item in response.json()]
+
+
+async def delete_objects(bucket: str, paths: List[str]) -> None:
+    if not paths:
+        return
+    response = await connections.get("storage").request("DELETE", f"/object/{bucket}", json={"prefixes": paths})
+    raise_for_storage(response)
+
+
+async def discard_objects(bucket: str, paths: List[str]) -> None:
+    """`delete_objects` sem garantia: é só limpeza, os erros vão para o log."""
+    try:
+        await delete_objects(bucket, paths)
+    except (HTTPException, httpx.HTTPError) as exc:
+        logger.warning("Falha ao remover objetos de %s: %s", bucket, exc)
+
+
+async def prune_folder(bucket: str, folder: str, keep: List[str]) -> None:
+    """Remove (sem garantia) os objetos de `folder` que não estão em `keep`."""
+    try:
+        paths = await list_objects(bucket, folder)
+    except (HTTPException, httpx.HTTPError) as exc:
+        logger.warning("Falha ao listar %s/%s: %s", bucket, folder, exc)
+        return
+    await discard_objects(bucket, [path for path in paths if path not in keep])
@@ -1,12 +1,51 @@
-from app.core import httpx_compat  # noqa: F401  # garante patch do httpx antes do supabase
-from supabase import Client, create_client
+from functools import lru_cache
+from typing import Any, Optional
 
-from app.core.config import settings
+import httpx
+from httpx import Headers, QueryParams
+from postgrest import AsyncRequestBuilder, AsyncRPCFilterRequestBuilder
+from postgrest.types import CountMethod
 
+from app.core.http import connections
 
-def build_supabase_client() -> Client:
-    return create_client(settings.supabase_url, settings.supabase_service_key)
 
+class PooledPostgrestClient:
+    """Cliente PostgREST assíncrono sobre o pool compartilhado de `connections`.
 
-supabase_client: Client = build_supabase_client()
+    Envolve o pool em vez de herdar de AsyncPostgrestClient: o cliente é único no processo, e
+    `auth()`, `schema()` e `aclose()` herdados alterariam ou fechariam a sessão de todas as
+    requisições. A URL base, os headers e os timeouts vêm do pool "postgrest", consultado a cada
+    uso porque o lifespan o recria.
+    """
 
+    @property
+    def session(self) -> httpx.AsyncClient:
+        return connections.get("postgrest")
+
+    def from_(self, table: str) -> AsyncRequestBuilder:
+        return AsyncRequestBuilder(self.session, f"/{table}")
+
+    def table(self, table: str) -> AsyncRequestBuilder:
+        return self.from_(table)
+
+    def rpc(
+        self,
+        func: str,
+        params: dict,
+        count: Optional[CountMethod] = None,
+        head: bool = False,
+        get: bool = False,
+    ) -> AsyncRPCFilterRequestBuilder[Any]:
+        # mesma montagem de AsyncPostgrestClient.rpc
+        method = "HEAD" if head else "GET" if get else "POST"
+        headers = Headers({"Prefer": f"count={count}"}) if count else Headers()
+        return AsyncRPCFilterRequestBuilder(self.session, f"/rpc/{func}", method, headers, QueryParams(), json=params)
+
+    async def aclose(self) -> None:
+        # o pool é fechado só no lifespan (connections.aclose)
+        pass
+
+
+@lru_cache
+def get_postgrest_client() -> PooledPostgrestClient:
+    return PooledPostgrestClient()
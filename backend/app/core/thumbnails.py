@@ -0,0 +1,50 @@
+"""Geração de miniaturas, executada nos processos do pool de app.core.images.
+
+Módulo separado e sem dependências do app: é o que cada processo do pool importa para
+desserializar a tarefa, então carregar FastAPI ou as configurações aqui custaria memória em
+todos eles.
+"""
+import io
+import warnings
+
+
+class InvalidImage(ValueError):
+    """Arquivo que o Pillow não consegue decodificar (corrompido ou truncado)."""
+
+
+class ImageTooLarge(InvalidImage):
+    """Imagem com mais pixels que o limite: recusada antes de decodificar."""
+
+
+def render_thumbnail(path: str, size: int, quality: int, max_pixels: int) -> bytes:
+    """Miniatura quadrada em WebP, recortada no centro; `max_pixels` é o limite exato."""
+    from PIL import Image, ImageOps
+
+    # o Pillow só recusa acima de 2× MAX_IMAGE_PIXELS (entre 1× e 2× apenas avisa): aqui ele
+    # barra as bombas no open, e o limite exato é conferido logo depois, pelo cabeçalho
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            image = Image.open(path)
+    except Image.DecompressionBombError as exc:
+        raise ImageTooLarge(str(exc)) from None
+    except (OSError, SyntaxError, ValueError) as exc:
+        # a exceção volta ao worker por pickle: só a mensagem, sem tipos do Pillow
+        raise InvalidImage(str(exc)) from None
+    width, height = image.size
+    if width * height > max_pixels:
+        image.close()
+        raise ImageTooLarge(f"{width}x{height} pixels, acima do limite de {max_pixels}")
+    try:
+        with image:
+            # JPEG: decodifica direto numa escala reduzida (1/2 a 1/8), com bem menos memória e CPU
+            image.draft("RGB", (size * 2, size * 2))
+            image = ImageOps.exif_transpose(image)
+            mode = "RGBA" if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info else "RGB"
+            thumbnail = ImageOps.fit(image.convert(mode), (size, size), Image.Resampling.LANCZOS)
+    except (OSError, SyntaxError, ValueError) as exc:
+        raise InvalidImage(str(exc)) from None
+    output = io.BytesIO()
+    thumbnail.save(output, "WEBP", quality=quality)
+    return output.getvalue()
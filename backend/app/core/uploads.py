@@ -0,0 +1,186 @@
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+IMAGE_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+CERTIFICATE_TYPES = {**IMAGE_TYPES, "application/pdf": "pdf"}
+
+# folga sobre o limite do arquivo para boundaries, headers das partes e campos de texto
+MULTIPART_OVERHEAD = 16 * 1024
+# bytes lidos antes de decidir o tipo do arquivo
+SNIFF_BYTES = 12
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Tipo real do arquivo pelos primeiros bytes; o Content-Type da parte vem do cliente."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    return None
+
+
+class MultipartUpload:
+    """Campo de arquivo de um corpo multipart/form-data, lido em streaming.
+
+    Diferente do `request.form()` do Starlette, que grava o corpo inteiro antes de entregar o
+    primeiro byte, `open()` lê só até o começo do arquivo (para identificar o tipo) e `chunks()`
+    repassa o resto conforme chega do cliente. O Content-Length acima do limite é recusado antes
+    de qualquer leitura; sem ele (chunked), o 413 sai assim que o limite é ultrapassado.
+    """
+
+    def __init__(self, request: Request, max_bytes: int, allowed_types: Dict[str, str], field: str = "file"):
+        self.request = request
+        self.max_bytes = max_bytes
+        self.allowed_types = allowed_types
+        self.field = field
+        self.filename: Optional[str] = None
+        self.content_type = ""
+        self.extension = ""
+        self.size = 0
+        self._head = b""
+        self._events: Optional[AsyncIterator[Tuple[str, Any]]] = None
+        self._finished = False
+
+    def _too_large(self) -> HTTPException:
+        limit = self.max_bytes / (1024 * 1024)
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"O arquivo deve ter no máximo {limit:g} MB"
+        )
+
+    async def open(self) -> "MultipartUpload":
+        media_type, params = parse_options_header(self.request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Envie o arquivo como multipart/form-data"
+            )
+        declared = self.request.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > self.max_bytes + MULTIPART_OVERHEAD:
+            # recusado sem ler o corpo: com Expect: 100-continue o cliente nem chega a enviá-lo
+            raise self._too_large()
+
+        self._events = self._parse(boundary)
+        found = False
+        async for kind, payload in self._events:
+            if kind == "begin":
+                found = True
+                self.filename = payload
+            elif kind == "data":
+                self._head += payload
+                if len(self._head) >= SNIFF_BYTES:
+                    break
+            else:
+                self._finished = True
+                break
+        if not found:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Campo '{self.field}' não enviado")
+        if not self._head:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo vazio")
+
+        content_type = sniff_content_type(self._head)
+        if content_type not in self.allowed_types:
+            accepted = ", ".join(sorted(set(self.allowed_types.values())))
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"Formato não aceito (use {accepted})"
+            )
+        self.content_type = content_type
+        self.extension = self.allowed_types[content_type]
+        return self
+
+    async def chunks(self, copy_to: Optional[BinaryIO] = None) -> AsyncIterator[bytes]:
+        """Os bytes do arquivo; com `copy_to` cada pedaço também é gravado nesse arquivo."""
+        async for chunk in self._remaining():
+            if copy_to is not None:
+                await run_in_threadpool(copy_to.write, chunk)
+            yield chunk
+
+    async def _remaining(self) -> AsyncIterator[bytes]:
+        head, self._head = self._head, b""
+        yield head
+        if self._finished:
+            return
+        async for kind, payload in self._events:
+            if kind == "data":
+                yield payload
+            elif kind == "end":
+                return
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corpo multipart incompleto")
+
+    async def _parse(self, boundary: bytes) -> AsyncIterator[Tuple[str, Any]]:
+        """Eventos ("begin", nome do arquivo), ("data", bytes) e ("end", None) da parte `field`."""
+        events: List[Tuple[str, Any]] = []
+        headers: Dict[bytes, bytes] = {}
+        header_field = bytearray()
+        header_value = bytearray()
+        target = False
+        seen = False
+
+        def on_part_begin() -> None:
+            headers.clear()
+
+        def on_header_field(data: bytes, start: int, end: int) -> None:
+            header_field.extend(data[start:end])
+
+        def on_header_value(data: bytes, start: int, end: int) -> None:
+            header_value.extend(data[start:end])
+
+        def on_header_end() -> None:
+            headers[bytes(header_field).lower()] = bytes(header_value)
+            header_field.clear()
+            header_value.clear()
+
+        def on_headers_finished() -> None:
+            nonlocal target, seen
+            _, options = parse_options_header(headers.get(b"content-disposition", b""))
+            # só a primeira parte com esse nome; campos de texto são ignorados
+            target = not seen and options.get(b"name") == self.field.encode() and b"filename" in options
+            if target:
+                seen = True
+                events.append(("begin", options[b"filename"].decode("utf-8", "replace")))
+
+        def on_part_data(data: bytes, start: int, end: int) -> None:
+            if target:
+                events.append(("data", data[start:end]))
+
+        def on_part_end() -> None:
+            nonlocal target
+            if target:
+                events.append(("end", None))
+                target = False
+
+        parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": on_part_begin,
+                "on_header_field": on_header_field,
+                "on_header_value": on_header_value,
+                "on_header_end": on_header_end,
+                "on_headers_finished": on_headers_finished,
+                "on_part_data": on_part_data,
+                "on_part_end": on_part_end,
+            },
+        )
+        received = 0
+        async for chunk in self.request.stream():
+            received += len(chunk)
+            if received > self.max_bytes + MULTIPART_OVERHEAD:
+                raise self._too_large()
+            try:
+                parser.write(chunk)
+            except MultipartParseError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corpo multipart inválido")
+            for event in events:
+                if event[0] == "data":
+                    self.size += len(event[1])
+                    if self.size > self.max_bytes:
+                        raise self._too_large()
+                yield event
+            events.clear()
@@ -1,18 +1,90 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from postgrest.exceptions import APIError
+from prometheus_client import CONTENT_TYPE_LATEST
 
+from app.core.cache import response_cache
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.routers import classes, demands, enrollments, forum, me, messages
+from app.core.db import HAS_MORE_HEADER, NEXT_CURSOR_HEADER
+from app.core.errors import postgrest_error_handler, transport_error_handler
+from app.core.http import connections
+from app.core.identity import identity_cache, watch_identity_changes
+from app.core.images import image_pool
+from app.core.lifecycle import lifecycle
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.pubsub import broker
+from app.core.ratelimit import RateLimitMiddleware, enforce_stream_limits, enforce_user_limits, rate_limiter
+from app.core.security import token_verifier
+from app.routers import attendance, classes, dashboard, demands, enrollments, forum, me, messages, realtime
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connections.open()
+    await broker.start()
+    if settings.serve_warmup:
+        warmups = [connections.warm_up()]
+        # com o segredo HS256 os tokens do projeto são validados sem o JWKS
+        if settings.auth_mode == "local" and not settings.supabase_jwt_secret:
+            warmups.append(token_verifier.jwks.refresh())
+        await asyncio.gather(*warmups)
+    watchers = [
+        asyncio.create_task(watch_identity_changes()),
+        # invalidações vindas dos outros workers (caches em memória com REALTIME_BACKEND=postgres)
+        asyncio.create_task(response_cache.watch_peers()),
+        asyncio.create_task(identity_cache.watch_peers()),
+    ]
+    yield
+    for watcher in watchers:
+        watcher.cancel()
+    await broker.stop()
+    await response_cache.aclose()
+    await identity_cache.aclose()
+    await rate_limiter.aclose()
+    await connections.aclose()
+    image_pool.shutdown()
 
-app = FastAPI(title="FitSenior API", version="2.0.0")
 
+# no SIGTERM (app.serve), os streams SSE são encerrados para o worker não esperar o timeout
+lifecycle.on_drain(broker.drain)
+
+app = FastAPI(
+    title="FitSenior API",
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# o limite por IP fica dentro do CORS, para que o navegador consiga ler o 429
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, path_prefix=settings.api_prefix)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, HAS_MORE_HEADER, "ETag", "Server-Timing", "Age", "Warning", "Retry-After"],
 )
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.metrics_server_timing)
+
+# erros do Supabase viram 4xx/502/503/504 em vez do 500 genérico (ver app.core.errors)
+app.add_exception_handler(APIError, postgrest_error_handler)
+app.add_exception_handler(httpx.TransportError, transport_error_handler)
 
 
 @app.get("/")
@@ -28,14 +100,33 @@ def root():
 
 
 @app.get("/health")
-def health_check():
-    return {"status": "ok"}
+def health_check(response: Response):
+    if lifecycle.draining:
+        # o balanceador tira o worker da rotação enquanto ele conclui as requisições em curso
+        response.status_code = 503
+    return {
+        "status": "draining" if lifecycle.draining else "ok",
+        "pools": connections.stats(),
+        "cache": {**response_cache.snapshot(), **identity_cache.snapshot()},
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
-app.include_router(me.router, prefix=settings.api_prefix)
-app.include_router(demands.router, prefix=settings.api_prefix)
-app.include_router(classes.router, prefix=settings.api_prefix)
-app.include_router(enrollments.router, prefix=settings.api_prefix)
-app.include_router(forum.router, prefix=settings.api_prefix)
-app.include_router(messages.router, prefix=settings.api_prefix)
+# limite por usuário e rota e cota de simultâneas (ver app.core.ratelimit)
+user_limits = [Depends(enforce_user_limits)]
+app.include_router(me.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(demands.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(classes.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(enrollments.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(attendance.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(dashboard.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(forum.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(messages.router, prefix=settings.api_prefix, dependencies=user_limits)
+app.include_router(realtime.router, prefix=settings.api_prefix, dependencies=[Depends(enforce_stream_limits)])
 
@@ -1,10 +1,13 @@
-from . import classes, demands, enrollments, forum, me, messages
+from . import attendance, classes, dashboard, demands, enrollments, forum, me, messages, realtime
 
 __all__ = [
+    "attendance",
     "classes",
+    "dashboard",
     "demands",
     "enrollments",
     "forum",
     "me",
     "messages",
+    "realtime",
 ]
@@ -0,0 +1,56 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
+
+from app.core.db import BULK_MAX_ITEMS, handle_response
+from app.core.dependencies import get_supabase
+from app.core.identity import Identity, get_identity, recheck_identity
+
+router = APIRouter(prefix="/attendance", tags=["attendance"])
+
+# status devolvidos pela função public.record_attendance
+ATTENDANCE_ERRORS = {
+    "class_not_found": (status.HTTP_404_NOT_FOUND, "Aula não encontrada"),
+    "forbidden": (status.HTTP_403_FORBIDDEN, "Sem permissão para registrar presença nesta aula"),
+}
+
+
+@router.post("/bulk")
+async def record_attendance_bulk(
+    request: Request,
+    class_id: str = Body(...),
+    records: List[Dict[str, Any]] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    class_date: Optional[date] = Body(None, alias="date", description="Data da aula; padrão: hoje"),
+    identity: Identity = Depends(get_identity),
+    supabase=Depends(get_supabase),
+):
+    if not identity.is_professional:
+        identity = await recheck_identity(request, identity, supabase)
+    if not identity.is_professional:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Apenas profissionais registram presença")
+    for index, record in enumerate(records):
+        if not isinstance(record.get("enrollment_id"), str) or not isinstance(record.get("present", False), bool):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Registro {index}: enrollment_id (texto) e present (booleano) são obrigatórios",
+            )
+
+    # dono da aula, inscrições da aula e upsert de todas as presenças numa única chamada; a posse é
+    # conferida contra classes.professional_id, que um snapshot antigo não consegue forjar
+    response = await supabase.rpc(
+        "record_attendance",
+        {
+            "_professional_id": identity.professional_id,
+            "_class_id": class_id,
+            "_date": class_date.isoformat() if class_date else None,
+            "_records": records,
+        },
+    ).execute()
+    result = handle_response(response) or {}
+
+    error = ATTENDANCE_ERRORS.get(result.get("status"))
+    if error:
+        status_code, detail = error
+        raise HTTPException(status_code=status_code, detail=detail)
+    return result.get("results") or []
@@ -1,146 +1,178 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from typing import Optional
 
-from app.core.db import handle_response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from app.core.cache import response_cache
+from app.core.db import (
+    CURSOR_COLUMNS,
+    SEARCH_KEYSET_COLUMNS,
+    PageParams,
+    decode_search_cursor,
+    flatten_count,
+    get_page_params,
+    handle_response,
+    handle_single_response,
+    keyset_paginate,
+    page_response,
+    select_columns,
+)
 from app.core.dependencies import get_current_user, get_supabase
+from app.core.etag import CACHE_CATALOG, conditional_response, mark_stale
+from app.core.identity import Identity, get_identity, recheck_identity
 
 router = APIRouter(prefix="/classes", tags=["classes"])
 
 
 @router.get("")
-async def list_classes(user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("classes")
-        .select("*, professionals(full_name)")
-        .order("created_at", desc=False)
-        .execute()
+async def list_classes(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    columns = select_columns(
+        page.fields,
+        default="*, professionals(full_name), enrollments(count)",
+        embeds={
+            "professionals": "professionals(full_name)",
+            "enrollment_count": "enrollments(count)",
+        },
     )
-    return handle_response(response)
 
+    async def fetch():
+        query = supabase.table("classes").select(columns)
+        result = await keyset_paginate(query, page, desc=False).execute()
+        return [flatten_count(row, "enrollments", "enrollment_count") for row in handle_response(result) or []]
 
-@router.get("/{class_id}")
-async def retrieve_class(class_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("classes")
-        .select("*, professionals(full_name, user_id)")
-        .eq("id", class_id)
-        .single()
-        .execute()
+    # Supabase lento ou fora do ar: serve a última página boa, marcada como velha
+    rows, age = await response_cache.get_or_revalidate("classes", f"list:{page.cache_key()}", fetch)
+    mark_stale(response, age)
+    return page_response(rows, page, request, response, cache_control=CACHE_CATALOG)
+
+
+@router.get("/search")
+async def search_classes(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, max_length=200, description="Texto livre: atividade, descrição ou local"),
+    schedule: Optional[str] = Query(None, max_length=100, description="Trecho do horário, ex.: 'Seg' ou '9h'"),
+    location: Optional[str] = Query(None, max_length=200),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    page: PageParams = Depends(get_page_params),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="min_price maior que max_price")
+
+    params = {
+        "_query": q,
+        "_schedule": schedule,
+        "_location": location,
+        "_min_price": min_price,
+        "_max_price": max_price,
+        "_limit": page.limit + 1,
+    }
+    if page.cursor:
+        params["_after_score"], params["_after_id"] = decode_search_cursor(page.cursor)
+
+    async def fetch():
+        # ranking e filtros no banco (ver search_classes): índices GIN de texto e trigramas
+        query = supabase.rpc("search_classes", params)
+        if page.fields:
+            query = query.select(
+                select_columns(page.fields, default="*", required=(*CURSOR_COLUMNS, "score"))
+            )
+        result = await query.execute()
+        return handle_response(result) or []
+
+    key = json.dumps(params, sort_keys=True, default=str)
+    rows = await response_cache.get_or_fetch("classes", f"search:{key}:{page.fields or ''}", fetch)
+    return page_response(
+        rows, page, request, response, cursor_columns=SEARCH_KEYSET_COLUMNS, cache_control=CACHE_CATALOG
     )
-    data = handle_response(response)
+
+
+@router.get("/{class_id}")
+async def retrieve_class(
+    class_id: str,
+    request: Request,
+    response: Response,
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    async def fetch():
+        result = await (
+            supabase.table("classes")
+            .select("*, professionals(full_name, user_id), enrollments(count)")
+            .eq("id", class_id)
+            .maybe_single()
+            .execute()
+        )
+        data = handle_response(result)
+        return flatten_count(data, "enrollments", "enrollment_count") if data else None
+
+    data = await response_cache.get_or_fetch("classes", f"detail:{class_id}", fetch)
     if not data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aula não encontrada")
-    
-    # Buscar contagem de enrollments separadamente
-    enrollments_response = (
-        supabase.table("enrollments")
-        .select("id")
-        .eq("class_id", class_id)
-        .execute()
-    )
-    enrollment_count = len(handle_response(enrollments_response) or [])
-    data["enrollment_count"] = enrollment_count
-    
-    return data
+    return conditional_response(request, response, data, CACHE_CATALOG)
+
+
+# campos definidos pelo servidor: ignorados no corpo do PUT
+CLASS_SERVER_COLUMNS = ("id", "professional_id", "created_at")
+
+
+def raise_class_error(result: dict, forbidden_detail: str) -> None:
+    outcome = result.get("status")
+    if outcome == "class_not_found":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aula não encontrada")
+    if outcome == "forbidden":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden_detail)
+    if outcome == "invalid_columns":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Campos inválidos: {', '.join(result['columns'])}"
+        )
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def create_class(payload: dict, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    # Buscar o professional_id do usuário logado
-    professional_response = (
-        supabase.table("professionals")
-        .select("id")
-        .eq("user_id", user["id"])
-        .single()
-        .execute()
-    )
-    professional_data = handle_response(professional_response)
-    if not professional_data:
+async def create_class(
+    payload: dict, request: Request, identity: Identity = Depends(get_identity), supabase=Depends(get_supabase)
+):
+    if not identity.is_professional:
+        identity = await recheck_identity(request, identity, supabase)
+    if not identity.is_professional:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profissional não encontrado. Complete seu cadastro primeiro.")
-    
-    response = (
+
+    # o professional_id do snapshot não muda de dono; se o cadastro foi removido, a FK recusa
+    response = await (
         supabase.table("classes")
-        .insert([{**payload, "professional_id": professional_data["id"]}])
-        .select("*")
-        .single()
+        .insert([{**payload, "professional_id": identity.professional_id}])
         .execute()
     )
-    return handle_response(response)
+    data = handle_single_response(response)
+    await response_cache.invalidate("classes")
+    return data
 
 
 @router.put("/{class_id}")
 async def update_class(class_id: str, payload: dict, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    # Verificar se o usuário é o profissional dono da aula
-    class_response = (
-        supabase.table("classes")
-        .select("professional_id")
-        .eq("id", class_id)
-        .single()
-        .execute()
-    )
-    class_data = handle_response(class_response)
-    if not class_data:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aula não encontrada")
-    
-    # Verificar se o profissional pertence ao usuário logado
-    professional_response = (
-        supabase.table("professionals")
-        .select("id")
-        .eq("id", class_data["professional_id"])
-        .eq("user_id", user["id"])
-        .single()
-        .execute()
-    )
-    professional_data = handle_response(professional_response)
-    if not professional_data:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para atualizar esta aula")
-    
-    response = (
-        supabase.table("classes")
-        .update(payload)
-        .eq("id", class_id)
-        .select("*")
-        .single()
-        .execute()
-    )
-    data = handle_response(response)
-    if not data:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aula não encontrada")
-    return data
+    # posse conferida no próprio UPDATE, por professionals.user_id (ver public.update_own_class)
+    changes = {key: value for key, value in payload.items() if key not in CLASS_SERVER_COLUMNS}
+    response = await supabase.rpc(
+        "update_own_class", {"_user_id": user["id"], "_class_id": class_id, "_changes": changes}
+    ).execute()
+    result = handle_response(response) or {}
+    raise_class_error(result, "Sem permissão para atualizar esta aula")
+    await response_cache.invalidate("classes")
+    return result.get("class")
 
 
 @router.delete("/{class_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_class(class_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    # Verificar se o usuário é o profissional dono da aula
-    class_response = (
-        supabase.table("classes")
-        .select("professional_id")
-        .eq("id", class_id)
-        .single()
-        .execute()
-    )
-    class_data = handle_response(class_response)
-    if not class_data:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aula não encontrada")
-    
-    # Verificar se o profissional pertence ao usuário logado
-    professional_response = (
-        supabase.table("professionals")
-        .select("id")
-        .eq("id", class_data["professional_id"])
-        .eq("user_id", user["id"])
-        .single()
-        .execute()
-    )
-    professional_data = handle_response(professional_response)
-    if not professional_data:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para deletar esta aula")
-    
-    response = (
-        supabase.table("classes")
-        .delete()
-        .eq("id", class_id)
-        .execute()
-    )
-    handle_response(response)
+    response = await supabase.rpc("delete_own_class", {"_user_id": user["id"], "_class_id": class_id}).execute()
+    raise_class_error(handle_response(response) or {}, "Sem permissão para deletar esta aula")
+    await response_cache.invalidate("classes")
     return {}
-
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from app.core.db import handle_response
+from app.core.dependencies import get_supabase
+from app.core.etag import conditional_response
+from app.core.identity import Identity, get_identity, recheck_identity
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+MAX_DASHBOARD_MONTHS = 36
+
+
+@router.get("")
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    months: int = Query(12, ge=1, le=MAX_DASHBOARD_MONTHS, description="Meses da série de faturamento"),
+    pending_limit: int = Query(20, ge=0, le=100, description="Pagamentos pendentes mais antigos listados"),
+    identity: Identity = Depends(get_identity),
+    supabase=Depends(get_supabase),
+):
+    """Faturamento por mês, pendências, frequência e ocupação das aulas do profissional."""
+    if not identity.is_professional:
+        # antes de negar, confere no banco: o snapshot pode ser de antes do cadastro como profissional
+        identity = await recheck_identity(request, identity, supabase)
+    if not identity.is_professional:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Apenas profissionais têm painel")
+
+    # totais lidos das tabelas de resumo mantidas por trigger (ver professional_dashboard)
+    result = await supabase.rpc(
+        "professional_dashboard",
+        {"_professional_id": identity.professional_id, "_months": months, "_pending_limit": pending_limit},
+    ).execute()
+    return conditional_response(request, response, handle_response(result) or {})
@@ -1,69 +1,194 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from typing import Any, Dict, List, Optional
 
-from app.core.db import handle_response
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+
+from app.core.cache import response_cache
+from app.core.db import (
+    BULK_MAX_ITEMS,
+    CURSOR_COLUMNS,
+    SEARCH_KEYSET_COLUMNS,
+    PageParams,
+    decode_search_cursor,
+    get_page_params,
+    handle_response,
+    handle_single_response,
+    keyset_paginate,
+    page_response,
+    select_columns,
+)
 from app.core.dependencies import get_current_user, get_supabase
+from app.core.etag import CACHE_CATALOG, conditional_response, mark_stale
 
 router = APIRouter(prefix="/demands", tags=["demands"])
 
+DEMAND_REQUIRED_FIELDS = ("activity", "neighborhood", "schedule", "location")
+# campos definidos pelo servidor: ignorados no corpo (user_id sempre vem do token)
+DEMAND_SERVER_COLUMNS = ("id", "user_id", "created_at")
+# colunas de public.demands que o cliente preenche
+DEMAND_COLUMNS = (*DEMAND_REQUIRED_FIELDS, "num_interested")
+
+
+def demand_row(payload: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    row = {key: value for key, value in payload.items() if key not in DEMAND_SERVER_COLUMNS}
+    return {**row, "user_id": user_id}
+
+
+def bulk_item_errors(item: Dict[str, Any]) -> Optional[str]:
+    """Validação de cada item de POST /demands/bulk, para que um item ruim não derrube o INSERT."""
+    missing = [field for field in DEMAND_REQUIRED_FIELDS if not item.get(field)]
+    if missing:
+        return f"Campos obrigatórios ausentes: {', '.join(missing)}"
+    unknown = sorted(set(item) - set(DEMAND_COLUMNS) - set(DEMAND_SERVER_COLUMNS))
+    if unknown:
+        return f"Campos inválidos: {', '.join(unknown)}"
+    return None
+
 
 @router.get("")
-async def list_demands(user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("demands")
-        .select("*, profiles(full_name, avatar_url)")
-        .order("created_at", desc=True)
-        .execute()
+async def list_demands(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    columns = select_columns(
+        page.fields,
+        default="*, profiles(full_name, avatar_url)",
+        embeds={"profiles": "profiles(full_name, avatar_url)"},
     )
-    return handle_response(response)
 
+    async def fetch():
+        query = supabase.table("demands").select(columns)
+        result = await keyset_paginate(query, page, desc=True).execute()
+        return handle_response(result) or []
 
-@router.get("/{demand_id}")
-async def retrieve_demand(demand_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("demands")
-        .select("*, profiles(full_name, avatar_url)")
-        .eq("id", demand_id)
-        .single()
-        .execute()
+    # Supabase lento ou fora do ar: serve a última página boa, marcada como velha
+    rows, age = await response_cache.get_or_revalidate("demands", f"list:{page.cache_key()}", fetch)
+    mark_stale(response, age)
+    return page_response(rows, page, request, response, cache_control=CACHE_CATALOG)
+
+
+@router.get("/search")
+async def search_demands(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, max_length=200, description="Texto livre: atividade, bairro ou local"),
+    schedule: Optional[str] = Query(None, max_length=100, description="Trecho do horário, ex.: 'Seg' ou '9h'"),
+    neighborhood: Optional[str] = Query(None, max_length=200),
+    page: PageParams = Depends(get_page_params),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    params = {
+        "_query": q,
+        "_schedule": schedule,
+        "_neighborhood": neighborhood,
+        "_limit": page.limit + 1,
+    }
+    if page.cursor:
+        params["_after_score"], params["_after_id"] = decode_search_cursor(page.cursor)
+
+    async def fetch():
+        query = supabase.rpc("search_demands", params)
+        if page.fields:
+            query = query.select(
+                select_columns(page.fields, default="*", required=(*CURSOR_COLUMNS, "score"))
+            )
+        result = await query.execute()
+        return handle_response(result) or []
+
+    key = json.dumps(params, sort_keys=True, default=str)
+    rows = await response_cache.get_or_fetch("demands", f"search:{key}:{page.fields or ''}", fetch)
+    return page_response(
+        rows, page, request, response, cursor_columns=SEARCH_KEYSET_COLUMNS, cache_control=CACHE_CATALOG
     )
-    data = handle_response(response)
+
+
+@router.get("/{demand_id}")
+async def retrieve_demand(
+    demand_id: str,
+    request: Request,
+    response: Response,
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    async def fetch():
+        result = await (
+            supabase.table("demands")
+            .select("*, profiles(full_name, avatar_url)")
+            .eq("id", demand_id)
+            .maybe_single()
+            .execute()
+        )
+        return handle_response(result)
+
+    data = await response_cache.get_or_fetch("demands", f"detail:{demand_id}", fetch)
     if not data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Demanda não encontrada")
-    return data
+    return conditional_response(request, response, data, CACHE_CATALOG)
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_demand(payload: dict, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("demands")
-        .insert([{**payload, "user_id": user["id"]}])
-        .select("*")
-        .single()
+        .insert([demand_row(payload, user["id"])])
         .execute()
     )
-    return handle_response(response)
+    data = handle_single_response(response)
+    await response_cache.invalidate("demands")
+    return data
+
+
+@router.post("/bulk")
+async def create_demands_bulk(
+    items: List[Dict[str, Any]] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    # valida item a item; os válidos vão num único INSERT com várias linhas
+    results: List[Dict[str, Any]] = []
+    rows = []
+    for index, item in enumerate(items):
+        detail = bulk_item_errors(item)
+        if detail:
+            results.append({"index": index, "status": "invalid", "detail": detail})
+            continue
+        results.append({"index": index, "status": "created"})
+        rows.append(demand_row(item, user["id"]))
+
+    if rows:
+        # itens com colunas diferentes: as que faltam num item ficam com o DEFAULT da tabela, não NULL
+        response = await supabase.table("demands").insert(rows, default_to_null=False).execute()
+        created = iter(handle_response(response) or [])
+        for result in results:
+            if result["status"] == "created":
+                result["data"] = next(created, None)
+        await response_cache.invalidate("demands")
+    return results
 
 
 @router.put("/{demand_id}")
 async def update_demand(demand_id: str, payload: dict, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("demands")
         .update(payload)
         .eq("id", demand_id)
         .eq("user_id", user["id"])
-        .select("*")
-        .single()
         .execute()
     )
-    data = handle_response(response)
+    data = handle_single_response(response)
     if not data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Demanda não encontrada ou sem permissão")
+    await response_cache.invalidate("demands")
     return data
 
 
 @router.delete("/{demand_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_demand(demand_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("demands")
         .delete()
         .eq("id", demand_id)
@@ -71,5 +196,5 @@ async def delete_demand(demand_id: str, user=Depends(get_current_user), supabase
         .execute()
     )
     handle_response(response)
+    await response_cache.invalidate("demands")
     return {}
-
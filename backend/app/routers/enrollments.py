@@ -1,32 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-
-from app.core.db import handle_response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from app.core.cache import response_cache
+from app.core.db import (
+    PageParams,
+    get_page_params,
+    handle_response,
+    keyset_paginate,
+    page_response,
+    passthrough,
+    select_columns,
+)
 from app.core.dependencies import get_current_user, get_supabase
 
 router = APIRouter(prefix="/enrollments", tags=["enrollments"])
 
+# status devolvidos pela função public.enroll_student
+ENROLLMENT_ERRORS = {
+    "already_enrolled": (status.HTTP_400_BAD_REQUEST, "Já inscrito nesta aula"),
+    "class_not_found": (status.HTTP_404_NOT_FOUND, "Aula não encontrada"),
+    "class_full": (status.HTTP_400_BAD_REQUEST, "Aula lotada"),
+}
+
 
 @router.get("")
-async def list_my_enrollments(user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("enrollments")
-        .select("*, classes(*, professionals(full_name))")
-        .eq("student_id", user["id"])
-        .order("created_at", desc=True)
-        .execute()
+async def list_my_enrollments(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    columns = select_columns(
+        page.fields,
+        default="*, classes(*, professionals(full_name))",
+        embeds={"classes": "classes(*, professionals(full_name))"},
     )
-    return handle_response(response)
+    query = supabase.table("enrollments").select(columns).eq("student_id", user["id"])
+    result = await keyset_paginate(query, page, desc=True).execute()
+    return page_response(handle_response(result), page, request, response)
 
 
 @router.get("/class/{class_id}")
-async def list_enrollments_for_class(class_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("enrollments")
-        .select("*, students(full_name, avatar_url)")
-        .eq("class_id", class_id)
-        .execute()
-    )
-    return handle_response(response)
+async def list_enrollments_for_class(
+    class_id: str,
+    request: Request,
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    query = supabase.table("enrollments").select("*, students(full_name, avatar_url)").eq("class_id", class_id)
+    return await passthrough(query, request)
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
@@ -35,55 +57,24 @@ async def create_enrollment(payload: dict, user=Depends(get_current_user), supab
     if not class_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="class_id é obrigatório")
 
-    existing_response = (
-        supabase.table("enrollments")
-        .select("id")
-        .eq("student_id", user["id"])
-        .eq("class_id", class_id)
-        .limit(1)
-        .execute()
-    )
-    existing = handle_response(existing_response)
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Já inscrito nesta aula")
+    # duplicidade, capacidade e inserção numa única transação (ver migration enroll_student)
+    response = await supabase.rpc(
+        "enroll_student", {"_class_id": class_id, "_student_id": user["id"]}
+    ).execute()
+    result = handle_response(response) or {}
 
-    class_response = (
-        supabase.table("classes")
-        .select("max_students")
-        .eq("id", class_id)
-        .single()
-        .execute()
-    )
-    class_data = handle_response(class_response)
-    if not class_data:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aula não encontrada")
-
-    capacity = class_data.get("max_students")
-
-    enrollment_count_response = (
-        supabase.table("enrollments")
-        .select("id")
-        .eq("class_id", class_id)
-        .execute()
-    )
-    enrollment_count = len(handle_response(enrollment_count_response) or [])
-
-    if capacity is not None and enrollment_count >= capacity:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Aula lotada")
-
-    response = (
-        supabase.table("enrollments")
-        .insert([{"student_id": user["id"], "class_id": class_id}])
-        .select("*")
-        .single()
-        .execute()
-    )
-    return handle_response(response)
+    error = ENROLLMENT_ERRORS.get(result.get("status"))
+    if error:
+        status_code, detail = error
+        raise HTTPException(status_code=status_code, detail=detail)
+    # a ocupação (enrollment_count) faz parte das respostas cacheadas de aulas
+    await response_cache.invalidate("classes")
+    return result.get("enrollment")
 
 
 @router.delete("/{enrollment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_enrollment(enrollment_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("enrollments")
         .delete()
         .eq("id", enrollment_id)
@@ -91,5 +82,5 @@ async def delete_enrollment(enrollment_id: str, user=Depends(get_current_user),
         .execute()
     )
     handle_response(response)
+    await response_cache.invalidate("classes")
     return {}
-
@@ -1,73 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 
-from app.core.db import handle_response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from app.core.cache import response_cache
+from app.core.db import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    PageParams,
+    finish_page,
+    flatten_count,
+    get_page_params,
+    handle_response,
+    handle_single_response,
+    keyset_paginate,
+    page_response,
+    select_columns,
+)
 from app.core.dependencies import get_current_user, get_supabase
+from app.core.etag import CACHE_CATALOG, conditional_response, mark_stale
+from app.core.pubsub import broker, post_channel
 
 router = APIRouter(prefix="/forum", tags=["forum"])
 
 
 @router.get("/posts")
-async def list_posts(user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("forum_posts")
-        .select("*, profiles(full_name, avatar_url), forum_replies(count)")
-        .order("created_at", desc=True)
-        .execute()
+async def list_posts(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    columns = select_columns(
+        page.fields,
+        default="*, profiles(full_name, avatar_url), forum_replies(count)",
+        embeds={
+            "profiles": "profiles(full_name, avatar_url)",
+            "forum_replies": "forum_replies(count)",
+        },
     )
-    return handle_response(response)
+
+    async def fetch():
+        query = supabase.table("forum_posts").select(columns)
+        result = await keyset_paginate(query, page, desc=True).execute()
+        return handle_response(result) or []
+
+    # Supabase lento ou fora do ar: serve a última página boa, marcada como velha
+    rows, age = await response_cache.get_or_revalidate("forum", f"posts:{page.cache_key()}", fetch)
+    mark_stale(response, age)
+    return page_response(rows, page, request, response, cache_control=CACHE_CATALOG)
 
 
 @router.get("/posts/{post_id}")
-async def retrieve_post(post_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    post_response = (
+async def retrieve_post(
+    post_id: str,
+    request: Request,
+    response: Response,
+    replies_after: Optional[str] = Query(None, description="Cursor da página de respostas (X-Next-Cursor)"),
+    replies_limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    replies_page = PageParams(limit=replies_limit, cursor=replies_after, fields=None)
+    # post, primeira página de respostas e total de respostas numa única consulta
+    query = (
         supabase.table("forum_posts")
-        .select("*, profiles(full_name, avatar_url)")
+        .select(
+            "*, profiles(full_name, avatar_url), "
+            "replies:forum_replies(*, profiles(full_name, avatar_url)), "
+            "reply_count:forum_replies(count)"
+        )
         .eq("id", post_id)
-        .single()
-        .execute()
     )
-    post = handle_response(post_response)
+    result = await keyset_paginate(query, replies_page, desc=False, relation="replies").maybe_single().execute()
+    post = handle_response(result)
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post não encontrado")
 
-    replies_response = (
-        supabase.table("forum_replies")
-        .select("*, profiles(full_name, avatar_url)")
-        .eq("post_id", post_id)
-        .order("created_at", desc=False)
-        .execute()
-    )
-    replies = handle_response(replies_response) or []
-    return {**post, "replies": replies}
+    post["replies"] = finish_page(post.get("replies"), replies_page, response)
+    return conditional_response(request, response, flatten_count(post, "reply_count", "reply_count"), CACHE_CATALOG)
 
 
 @router.post("/posts", status_code=status.HTTP_201_CREATED)
 async def create_post(payload: dict, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("forum_posts")
         .insert([{**payload, "user_id": user["id"]}])
-        .select("*")
-        .single()
         .execute()
     )
-    return handle_response(response)
+    post = handle_single_response(response)
+    await response_cache.invalidate("forum")
+    return post
 
 
 @router.post("/posts/{post_id}/replies", status_code=status.HTTP_201_CREATED)
 async def reply_post(post_id: str, payload: dict, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("forum_replies")
         .insert([{**payload, "post_id": post_id, "user_id": user["id"]}])
-        .select("*")
-        .single()
         .execute()
     )
-    return handle_response(response)
+    reply = handle_single_response(response)
+    # a listagem de posts traz a contagem de respostas
+    await response_cache.invalidate("forum")
+    if reply:
+        await broker.publish(post_channel(post_id), {"type": "forum_reply", "data": reply})
+    return reply
 
 
 @router.delete("/posts/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(post_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("forum_posts")
         .delete()
         .eq("id", post_id)
@@ -75,5 +118,5 @@ async def delete_post(post_id: str, user=Depends(get_current_user), supabase=Dep
         .execute()
     )
     handle_response(response)
+    await response_cache.invalidate("forum")
     return {}
-
@@ -1,35 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import tempfile
+import time
 
-from app.core.db import handle_response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+
+from app.core.config import settings
+from app.core.db import handle_single_response
 from app.core.dependencies import get_current_user, get_supabase
+from app.core.etag import conditional_response
+from app.core.identity import Identity, get_identity, invalidate_identity, recheck_identity
+from app.core.images import image_pool
+from app.core.storage import (
+    AVATARS_BUCKET,
+    CERTIFICATES_BUCKET,
+    IMMUTABLE_MAX_AGE,
+    authenticated_url,
+    discard_objects,
+    prune_folder,
+    public_url,
+    upload_object,
+)
+from app.core.thumbnails import ImageTooLarge, InvalidImage
+from app.core.uploads import CERTIFICATE_TYPES, IMAGE_TYPES, MultipartUpload
 
 router = APIRouter(prefix="/me", tags=["me"])
 
 
 @router.get("")
-async def get_profile(user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
-        supabase.table("profiles")
-        .select("*")
-        .eq("id", user["id"])
-        .single()
-        .execute()
-    )
-    data = handle_response(response)
-    if not data:
+async def get_profile(request: Request, response: Response, identity: Identity = Depends(get_identity)):
+    # o perfil vem do snapshot em cache, carregado junto com os papéis
+    if identity.profile is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil não encontrado")
-    return data
+    return conditional_response(request, response, identity.profile)
 
 
 @router.put("")
 async def update_profile(payload: dict, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("profiles")
         .update(payload)
         .eq("id", user["id"])
-        .select("*")
-        .single()
         .execute()
     )
-    return handle_response(response)
+    data = handle_single_response(response)
+    await invalidate_identity(user["id"])
+    return data
+
+
+@router.put("/avatar")
+async def upload_avatar(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    identity: Identity = Depends(get_identity),
+    supabase=Depends(get_supabase),
+):
+    # multipart com o campo "file"; o original vai ao Storage enquanto chega, e uma cópia em
+    # disco alimenta a miniatura, gerada fora do event loop (app.core.images)
+    upload = await MultipartUpload(request, settings.upload_avatar_max_bytes, IMAGE_TYPES).open()
+    # nome novo a cada troca: a URL pública muda e o CDN não serve a foto antiga
+    stem = f"{identity.user_id}/{int(time.time() * 1000)}"
+    original_path = f"{stem}.{upload.extension}"
+    thumbnail_path = f"{stem}-{settings.upload_thumbnail_size}.webp"
 
+    with tempfile.NamedTemporaryFile(prefix="fitsenior-avatar-") as spool:
+        await upload_object(
+            AVATARS_BUCKET, original_path, upload.chunks(copy_to=spool), upload.content_type, max_age=IMMUTABLE_MAX_AGE
+        )
+        spool.flush()
+        try:
+            thumbnail = await image_pool.thumbnail(spool.name)
+        except ImageTooLarge:
+            await discard_objects(AVATARS_BUCKET, [original_path])
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Imagem acima de {settings.upload_image_max_pixels} pixels",
+            )
+        except InvalidImage:
+            await discard_objects(AVATARS_BUCKET, [original_path])
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Imagem inválida ou corrompida")
+    await upload_object(AVATARS_BUCKET, thumbnail_path, thumbnail, "image/webp", max_age=IMMUTABLE_MAX_AGE)
+
+    avatar_url = public_url(AVATARS_BUCKET, thumbnail_path)
+    updates = [supabase.table("profiles").update({"avatar_url": avatar_url}).eq("id", identity.user_id).execute()]
+    # a tela de perfil do frontend ainda lê a foto de students/professionals
+    if identity.is_student:
+        updates.append(
+            supabase.table("students").update({"avatar_url": avatar_url}).eq("user_id", identity.user_id).execute()
+        )
+    if identity.is_professional:
+        updates.append(
+            supabase.table("professionals").update({"avatar_url": avatar_url}).eq("user_id", identity.user_id).execute()
+        )
+    responses = await asyncio.gather(*updates)
+    profile = handle_single_response(responses[0])
+    await invalidate_identity(identity.user_id)
+
+    # fotos anteriores (inclusive as enviadas direto pelo frontend) saem depois da resposta
+    background_tasks.add_task(prune_folder, AVATARS_BUCKET, identity.user_id, [original_path, thumbnail_path])
+    return {
+        "avatar_url": avatar_url,
+        "original_url": public_url(AVATARS_BUCKET, original_path),
+        "size": upload.size,
+        "profile": profile,
+    }
+
+
+@router.put("/health-certificate")
+async def upload_health_certificate(
+    request: Request,
+    identity: Identity = Depends(get_identity),
+    supabase=Depends(get_supabase),
+):
+    if not identity.is_student:
+        identity = await recheck_identity(request, identity, supabase)
+    if not identity.is_student:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Apenas alunos enviam atestado de saúde")
+
+    # repassado ao Storage em streaming, sem cópia em disco nem em memória
+    upload = await MultipartUpload(request, settings.upload_certificate_max_bytes, CERTIFICATE_TYPES).open()
+    # mesmo caminho do cadastro no frontend: um novo envio substitui o anterior
+    path = f"{identity.user_id}/certificate.{upload.extension}"
+    await upload_object(CERTIFICATES_BUCKET, path, upload.chunks(), upload.content_type, upsert=True, max_age=0)
+
+    response = await (
+        supabase.table("students")
+        .update({"health_certificate_url": authenticated_url(CERTIFICATES_BUCKET, path)})
+        .eq("user_id", identity.user_id)
+        .execute()
+    )
+    return handle_single_response(response)
@@ -1,51 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional, Tuple
 
-from app.core.db import handle_response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from app.core.db import (
+    DEFAULT_PAGE_LIMIT,
+    HAS_MORE_HEADER,
+    MAX_PAGE_LIMIT,
+    PageParams,
+    decode_cursor,
+    get_page_params,
+    handle_response,
+    handle_single_response,
+    keyset_condition,
+    page_response,
+    select_columns,
+)
 from app.core.dependencies import get_current_user, get_supabase
+from app.core.etag import conditional_response
+from app.core.pubsub import broker, user_channel
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
 
 @router.get("/conversations")
-async def list_conversations(user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+async def list_conversations(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    params = {"_user_id": user["id"], "_limit": page.limit + 1}
+    if page.cursor:
+        params["_before_created_at"], params["_before_id"] = decode_cursor(page.cursor)
+
+    # uma linha por interlocutor, com a última mensagem e o total de não lidas (ver conversation_summaries)
+    query = supabase.rpc("conversation_summaries", params)
+    if page.fields:
+        query = query.select(select_columns(page.fields, default="*"))
+    result = await query.execute()
+    return page_response(handle_response(result), page, request, response)
+
+
+async def resolve_sync_point(value: str, thread_filter: str, supabase) -> Tuple[str, Optional[str]]:
+    """Aceita um timestamp ISO ou o id de uma mensagem da conversa; devolve (created_at, id).
+
+    Com um id, o ponto é a própria mensagem: as que têm o mesmo created_at são desempatadas pelo
+    id, na ordem da listagem. Com um timestamp, o id fica None e a comparação é só pelo horário.
+    """
+    try:
+        return datetime.fromisoformat(value).isoformat(), None
+    except ValueError:
+        pass
+
+    response = await (
         supabase.table("messages")
-        .select(
-            "*, sender:profiles!messages_sender_id_fkey(id, full_name, avatar_url), "
-            "recipient:profiles!messages_recipient_id_fkey(id, full_name, avatar_url)"
-        )
-        .or_(f"sender_id.eq.{user['id']},recipient_id.eq.{user['id']}")
-        .order("created_at", desc=True)
+        .select("created_at, id")
+        .eq("id", value)
+        .or_(thread_filter)
+        .maybe_single()
         .execute()
     )
-    messages = handle_response(response) or []
-
-    conversations = {}
-    for message in messages:
-        other_user_id = message["recipient_id"] if message["sender_id"] == user["id"] else message["sender_id"]
-        if other_user_id not in conversations:
-            conversations[other_user_id] = message
-
-    return list(conversations.values())
+    data = handle_response(response)
+    if not data:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Mensagem de referência não encontrada")
+    return data["created_at"], data["id"]
 
 
 @router.get("/{other_user_id}")
-async def list_messages_with_user(other_user_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+async def list_messages_with_user(
+    other_user_id: str,
+    request: Request,
+    response: Response,
+    after: Optional[str] = Query(None, description="Apenas mensagens posteriores (id ou timestamp)"),
+    before: Optional[str] = Query(None, description="Página anterior a esta mensagem (id ou timestamp)"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    thread_filter = (
+        f"and(sender_id.eq.{user['id']},recipient_id.eq.{other_user_id}),"
+        f"and(sender_id.eq.{other_user_id},recipient_id.eq.{user['id']})"
+    )
+    query = (
         supabase.table("messages")
         .select(
             "*, sender:profiles!messages_sender_id_fkey(full_name, avatar_url), "
             "recipient:profiles!messages_recipient_id_fkey(full_name, avatar_url)"
         )
-        .or_(
-            f"and(sender_id.eq.{user['id']},recipient_id.eq.{other_user_id}),"
-            f"and(sender_id.eq.{other_user_id},recipient_id.eq.{user['id']})"
-        )
-        .order("created_at", desc=True)
-        .execute()
+        .or_(thread_filter)
     )
-    data = handle_response(response) or []
-    return list(reversed(data))
+
+    if after:
+        # sincronização incremental: novas mensagens em ordem cronológica
+        query = query.or_(keyset_condition("gt", *await resolve_sync_point(after, thread_filter, supabase)))
+        query = query.order("created_at", desc=False).order("id", desc=False)
+    else:
+        if before:
+            query = query.or_(keyset_condition("lt", *await resolve_sync_point(before, thread_filter, supabase)))
+        query = query.order("created_at", desc=True).order("id", desc=True)
+
+    result = await query.limit(limit + 1).execute()
+    data = handle_response(result) or []
+    response.headers[HAS_MORE_HEADER] = "true" if len(data) > limit else "false"
+    data = data[:limit]
+    if not after:
+        data.reverse()
+    return conditional_response(request, response, data)
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
@@ -56,7 +118,7 @@ async def send_message(payload: dict, user=Depends(get_current_user), supabase=D
     if not recipient_id or not content:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="recipient_id e content são obrigatórios")
 
-    response = (
+    response = await (
         supabase.table("messages")
         .insert(
             [
@@ -67,26 +129,51 @@ async def send_message(payload: dict, user=Depends(get_current_user), supabase=D
                 }
             ]
         )
-        .select("*")
-        .single()
         .execute()
     )
-    return handle_response(response)
+    message = handle_single_response(response)
+    if message:
+        event = {"type": "message", "data": message}
+        await broker.publish(user_channel(recipient_id), event)
+        await broker.publish(user_channel(user["id"]), event)
+    return message
+
+
+@router.put("/conversations/{counterpart_id}/read")
+async def mark_conversation_as_read(
+    counterpart_id: str,
+    up_to: Optional[str] = Query(None, description="Id da última mensagem lida; sem ele, marca todas"),
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    # uma única atualização no banco no lugar de um PUT por mensagem (ver mark_conversation_read)
+    response = await supabase.rpc(
+        "mark_conversation_read",
+        {"_user_id": user["id"], "_counterpart_id": counterpart_id, "_up_to_id": up_to},
+    ).execute()
+    result = handle_response(response) or {}
+    if result.get("status") == "message_not_found":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mensagem não encontrada")
+
+    ids = result.get("ids") or []
+    if ids:
+        await broker.publish(
+            user_channel(counterpart_id),
+            {"type": "messages_read", "data": {"reader_id": user["id"], "ids": ids}},
+        )
+    return {"updated": len(ids), "ids": ids}
 
 
 @router.put("/{message_id}/read")
 async def mark_message_as_read(message_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
-    response = (
+    response = await (
         supabase.table("messages")
         .update({"read": True})
         .eq("id", message_id)
         .eq("recipient_id", user["id"])
-        .select("*")
-        .single()
         .execute()
     )
-    data = handle_response(response)
+    data = handle_single_response(response)
     if not data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mensagem não encontrada")
     return data
-
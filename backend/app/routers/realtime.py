@@ -0,0 +1,71 @@
+import json
+import random
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.dependencies import get_current_user, get_stream_user
+from app.core.pubsub import Draining, SlowConsumer, broker, post_channel, user_channel
+from app.core.ratelimit import rate_limiter
+from app.core.security import issue_stream_ticket
+
+router = APIRouter(prefix="/realtime", tags=["realtime"])
+
+MAX_POST_SUBSCRIPTIONS = 20
+
+
+def format_event(event: dict) -> str:
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event.get('data'), default=str)}\n\n"
+
+
+@router.post("/ticket")
+async def create_ticket(user=Depends(get_current_user)):
+    """Ticket de poucos segundos para `GET /realtime/stream?ticket=...`."""
+    return {"ticket": issue_stream_ticket(user["id"]), "expires_in": settings.realtime_ticket_ttl_seconds}
+
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    posts: Optional[str] = Query(None, description="Ids de posts do fórum separados por vírgula"),
+    user=Depends(get_stream_user),
+):
+    """Server-Sent Events com novas mensagens do usuário e respostas dos posts informados."""
+    channels = [user_channel(user["id"])]
+    if posts:
+        post_ids = [post_id.strip() for post_id in posts.split(",") if post_id.strip()]
+        channels += [post_channel(post_id) for post_id in post_ids[:MAX_POST_SUBSCRIPTIONS]]
+
+    limited = settings.rate_limit_enabled
+    if limited:
+        rate_limiter.open_stream(user["id"])
+    subscription = broker.subscribe(channels)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await subscription.get(timeout=settings.realtime_heartbeat_seconds)
+                except SlowConsumer:
+                    yield "event: overflow\ndata: {}\n\n"
+                    break
+                except Draining:
+                    # worker desligando: fecha o stream para não segurar o shutdown; o retry
+                    # curto e aleatório espalha as reconexões entre os workers restantes
+                    yield f"retry: {random.randint(250, 2_000)}\nevent: reconnect\ndata: {{}}\n\n"
+                    break
+                # sem eventos no intervalo: comentário SSE mantém a conexão viva em proxies
+                yield format_event(event) if event is not None else ": ping\n\n"
+        finally:
+            subscription.close()
+            if limited:
+                rate_limiter.close_stream(user["id"])
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,193 @@
+"""Servidor de produção: gunicorn supervisionando workers uvicorn (uvloop + httptools).
+
+    python -m app.serve
+
+Um worker por CPU disponível (WEB_CONCURRENCY sobrescreve). Mais de um worker exige que as
+invalidações de cache cheguem a todos: CACHE_BACKEND=redis ou REALTIME_BACKEND=postgres (sem
+eles o launcher não sobe, a menos que SERVE_REQUIRE_SHARED_INVALIDATION=false). Com SERVE_PRELOAD o
+app é importado uma vez no mestre e compartilhado por copy-on-write; clientes HTTP, broker e caches só nascem no
+lifespan, dentro de cada worker, então nenhum socket ou event loop atravessa o fork. No SIGTERM
+os streams SSE são encerrados (app.core.lifecycle) e as requisições em curso concluídas dentro do
+SERVE_GRACEFUL_TIMEOUT. Em desenvolvimento continue com `uvicorn app.main:app --reload`.
+"""
+import asyncio
+import glob
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, Optional
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+# só config e lifecycle aqui: o prometheus_client não pode ser importado antes de
+# PROMETHEUS_MULTIPROC_DIR estar definido (ver prepare_multiprocess_metrics)
+from app.core.config import Settings, settings
+from app.core.lifecycle import lifecycle
+
+# folga entre o fim da espera pelas requisições e o SIGKILL do gunicorn, para o lifespan fechar
+# pools e broker
+SHUTDOWN_MARGIN_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """CPUs utilizáveis pelo processo, respeitando a afinidade e a cota de CPU do cgroup (contêiner)."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as handle:
+            quota, period = handle.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def graceful_shutdown_timeout(graceful_timeout: int) -> float:
+    return max(graceful_timeout * 0.8, graceful_timeout - SHUTDOWN_MARGIN_SECONDS)
+
+
+class DrainingServer(Server):
+    """Servidor uvicorn que inicia a drenagem do app assim que recebe o sinal de desligamento."""
+
+    async def serve(self, sockets: Optional[list] = None) -> None:
+        self._loop = asyncio.get_running_loop()
+        await super().serve(sockets=sockets)
+
+    def handle_exit(self, sig: int, frame: Any) -> None:
+        if not self.should_exit:
+            # o handler roda entre bytecodes do próprio loop: agenda em vez de mexer nas filas aqui
+            self._loop.call_soon_threadsafe(lifecycle.begin_drain)
+        super().handle_exit(sig, frame)
+
+
+class Worker(UvicornWorker):
+    # loop/http "auto" já escolhem uvloop e httptools quando instalados
+    CONFIG_KWARGS = {
+        "loop": "auto",
+        "http": "auto",
+        "lifespan": "on",
+        "server_header": False,
+        "access_log": settings.serve_access_log,
+    }
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # o UvicornWorker não repassa o graceful_timeout: sem isso o uvicorn espera para sempre
+        # e quem encerra é o SIGKILL do mestre, sem rodar o shutdown do lifespan
+        self.config.timeout_graceful_shutdown = graceful_shutdown_timeout(self.cfg.graceful_timeout)
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def prepare_multiprocess_metrics() -> None:
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        # arquivos de uma execução anterior somariam contadores de processos que já não existem
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="fitsenior-metrics-")
+
+
+def child_exit(server: Arbiter, worker: Any) -> None:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        # tira os gauges "livesum" do worker morto do total
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server: Arbiter) -> None:
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+    if os.path.basename(directory).startswith("fitsenior-metrics-"):
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def shares_invalidations(config: Settings) -> bool:
+    """Se uma escrita num worker invalida os caches (catálogo e identidades) dos demais."""
+    return config.cache_backend == "redis" or config.realtime_backend == "postgres"
+
+
+def worker_count(config: Settings) -> int:
+    workers = config.web_concurrency or available_cpus()
+    if workers > 1 and not shares_invalidations(config):
+        # o mesmo tratamento para WEB_CONCURRENCY e para o padrão de um worker por CPU: nunca
+        # sobe com menos workers do que o pedido sem avisar
+        source = f"WEB_CONCURRENCY={workers}" if config.web_concurrency else f"{workers} workers (um por CPU)"
+        if config.serve_require_shared_invalidation:
+            raise SystemExit(
+                f"{source}: com caches em memória, vários workers só ficam coerentes com "
+                "CACHE_BACKEND=redis ou REALTIME_BACKEND=postgres; defina um deles, WEB_CONCURRENCY=1 "
+                "ou SERVE_REQUIRE_SHARED_INVALIDATION=false"
+            )
+        logger.warning(
+            "%s sem invalidação compartilhada: os caches de cada worker não são compartilhados e "
+            "podem servir respostas antigas até o TTL",
+            source,
+        )
+    return workers
+
+
+def gunicorn_options(config: Settings) -> Dict[str, Any]:
+    return {
+        "bind": f"{config.serve_host}:{config.backend_port}",
+        "workers": worker_count(config),
+        "worker_class": Worker,
+        "preload_app": config.serve_preload,
+        "graceful_timeout": config.serve_graceful_timeout,
+        "keepalive": config.serve_keepalive_seconds,
+        "backlog": config.serve_backlog,
+        "max_requests": config.serve_max_requests,
+        "max_requests_jitter": config.serve_max_requests // 10,
+        "accesslog": "-" if config.serve_access_log else None,
+        "errorlog": "-",
+        # o heartbeat dos workers é um arquivo tocado a cada poucos segundos; em tmpfs ele não
+        # trava quando o disco do contêiner está lento
+        "worker_tmp_dir": "/dev/shm" if os.path.isdir("/dev/shm") else None,
+        "child_exit": child_exit,
+        "on_exit": on_exit,
+    }
+
+
+class Application(BaseApplication):
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from app.main import app
+
+        return app
+
+
+def main() -> None:
+    options = gunicorn_options(settings)
+    if settings.metrics_enabled and options["workers"] > 1:
+        prepare_multiprocess_metrics()
+    Application(options).run()
+
+
+if __name__ == "__main__":
+    main()
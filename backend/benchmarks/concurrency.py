@@ -0,0 +1,126 @@
+"""
+Compara o throughput da API com o cliente PostgREST síncrono (bloqueando o
+event loop, como era antes) e com a camada de dados assíncrona.
+
+O PostgREST é simulado com latência fixa, então o ganho medido é apenas o de
+sobreposição de I/O entre requisições concorrentes.
+
+Uso (a partir de backend/):
+    python -m benchmarks.concurrency --requests 200 --concurrency 50 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_ANON_KEY", "bench")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench")
+
+import httpx  # noqa: E402
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient  # noqa: E402
+
+from app.core.dependencies import get_current_user, get_supabase  # noqa: E402
+from app.main import app  # noqa: E402
+
+FAKE_ROWS = [{"id": str(i), "activity": "Yoga", "created_at": "2025-01-01T00:00:00+00:00"} for i in range(20)]
+REST_URL = "http://postgrest.local/rest/v1"
+
+
+def build_async_client(latency: float) -> AsyncPostgrestClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json=FAKE_ROWS)
+
+    client = AsyncPostgrestClient(REST_URL)
+    client.session = httpx.AsyncClient(base_url=REST_URL, transport=httpx.MockTransport(handler))
+    return client
+
+
+class BlockingClient:
+    """Expõe o cliente síncrono com `execute` aguardável, reproduzindo o bloqueio do loop."""
+
+    def __init__(self, client: SyncPostgrestClient):
+        self._client = client
+
+    def table(self, name: str):
+        return _BlockingBuilder(self._client.table(name))
+
+
+class _BlockingBuilder:
+    def __init__(self, builder):
+        self._builder = builder
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if name == "execute":
+            async def execute():
+                return attr()
+
+            return execute
+        if callable(attr):
+            return lambda *args, **kwargs: _BlockingBuilder(attr(*args, **kwargs))
+        return attr
+
+
+def build_blocking_client(latency: float) -> BlockingClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency)
+        return httpx.Response(200, json=FAKE_ROWS)
+
+    client = SyncPostgrestClient(REST_URL)
+    client.session = httpx.Client(base_url=REST_URL, transport=httpx.MockTransport(handler))
+    return BlockingClient(client)
+
+
+async def drive(supabase, total: int, concurrency: int) -> dict:
+    app.dependency_overrides[get_current_user] = lambda: {"id": "bench-user"}
+    app.dependency_overrides[get_supabase] = lambda: supabase
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://api.local") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get("/api/classes")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    app.dependency_overrides.clear()
+    return {"seconds": round(elapsed, 3), "requests_per_second": round(total / elapsed, 1)}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    blocking = await drive(build_blocking_client(latency), args.requests, args.concurrency)
+    non_blocking = await drive(build_async_client(latency), args.requests, args.concurrency)
+    print(
+        json.dumps(
+            {
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "upstream_latency_ms": args.latency_ms,
+                "sync_client": blocking,
+                "async_client": non_blocking,
+                "speedup": round(blocking["seconds"] / non_blocking["seconds"], 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,230 @@
+"""
+Latência de public.professional_dashboard (tabelas de resumo mantidas por trigger) contra a
+mesma agregação feita direto sobre payments/attendance, à medida que o histórico cresce.
+
+Popula o banco com profissionais, aulas e alunos sintéticos e acrescenta o histórico de
+pagamentos mensais e presenças semanais em blocos, do mais recente para o mais antigo.
+Após cada bloco (ex.: 1, 3 e 5 anos de histórico) mede p50/p95 das duas consultas para um
+profissional e confere se os totais coincidem.
+
+Uso (a partir de backend/):
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.dashboard --years 1 3 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Sequence
+
+import asyncpg
+
+from benchmarks.pg import create_user, default_dsn, reset_database
+
+# agregação equivalente sem os resumos: o que o frontend faria puxando as linhas brutas
+RAW_DASHBOARD_SQL = """
+WITH own_classes AS (
+  SELECT c.id, c.max_students FROM public.classes c WHERE c.professional_id = $1
+),
+first_month AS (
+  SELECT (date_trunc('month', CURRENT_DATE) - make_interval(months => $2 - 1))::DATE AS month
+)
+SELECT jsonb_build_object(
+  'revenue_by_month', (
+    SELECT coalesce(jsonb_agg(jsonb_build_object('month', to_char(r.month, 'YYYY-MM'), 'paid_amount', r.paid)
+      ORDER BY r.month), '[]'::jsonb)
+    FROM (
+      SELECT date_trunc('month', coalesce(p.payment_date, p.created_at::DATE)) AS month,
+             coalesce(sum(p.amount) FILTER (WHERE p.status = 'paid'), 0) AS paid
+      FROM public.payments p
+      JOIN own_classes c ON c.id = p.class_id
+      WHERE coalesce(p.payment_date, p.created_at::DATE) >= (SELECT month FROM first_month)
+      GROUP BY 1
+    ) r
+  ),
+  'pending_payments', (
+    SELECT jsonb_build_object('count', count(*), 'amount', coalesce(sum(p.amount), 0))
+    FROM public.payments p
+    JOIN own_classes c ON c.id = p.class_id
+    WHERE p.status = 'pending'
+  ),
+  'attendance', (
+    SELECT jsonb_build_object('records', count(*), 'present', count(*) FILTER (WHERE a.present))
+    FROM own_classes c
+    JOIN public.enrollments e ON e.class_id = c.id
+    JOIN public.attendance a ON a.enrollment_id = e.id
+  )
+)
+"""
+
+
+async def seed_catalog(
+    conn: asyncpg.Connection, professionals: int, classes_per_professional: int, students: int
+) -> List[str]:
+    professional_ids = []
+    for index in range(professionals):
+        user_id = await create_user(conn, f"pro{index}@bench.local")
+        professional_ids.append(
+            str(
+                await conn.fetchval(
+                    """
+                    INSERT INTO public.professionals (user_id, cref, full_name, birth_date, specialty, cpf)
+                    VALUES ($1, $2, $3, '1980-01-01', 'Educação física', $4)
+                    RETURNING id
+                    """,
+                    user_id,
+                    f"CREF-{index}",
+                    f"Profissional {index}",
+                    f"{index:011d}",
+                )
+            )
+        )
+    student_ids = [await create_user(conn, f"aluno{index}@bench.local") for index in range(students)]
+
+    await conn.execute(
+        """
+        INSERT INTO public.classes (professional_id, activity, schedule, max_students, location, price)
+        SELECT p.id, 'Hidroginástica', 'Seg e Qua 9h', $2 + 5, 'Clube Pinheiros', 60 + n
+        FROM unnest($1::uuid[]) AS p(id), generate_series(1, $3) AS n
+        """,
+        professional_ids,
+        students,
+        classes_per_professional,
+    )
+    await conn.execute(
+        """
+        INSERT INTO public.enrollments (class_id, student_id)
+        SELECT c.id, s.id FROM public.classes c, unnest($1::uuid[]) AS s(id)
+        """,
+        student_ids,
+    )
+    return professional_ids
+
+
+async def seed_history(conn: asyncpg.Connection, from_month: int, to_month: int) -> None:
+    """Pagamentos mensais e presenças semanais dos meses [from_month, to_month) atrás."""
+    await conn.execute("SELECT setseed(0.42)")
+    await conn.execute(
+        """
+        INSERT INTO public.payments (class_id, enrollment_id, amount, status, payment_date, created_at)
+        SELECT
+          e.class_id,
+          e.id,
+          c.price,
+          CASE WHEN r.pending THEN 'pending' ELSE 'paid' END,
+          CASE WHEN r.pending THEN NULL ELSE m.start::DATE + 4 END,
+          m.start
+        FROM public.enrollments e
+        JOIN public.classes c ON c.id = e.class_id
+        CROSS JOIN LATERAL (
+          SELECT ago, date_trunc('month', CURRENT_DATE) - make_interval(months => ago) AS start
+          FROM generate_series($1, $2 - 1) AS ago
+        ) AS m
+        -- só os dois últimos meses têm pendências
+        CROSS JOIN LATERAL (SELECT m.ago < 2 AND random() < 0.3 AS pending) AS r
+        """,
+        from_month,
+        to_month,
+    )
+    await conn.execute(
+        """
+        INSERT INTO public.attendance (enrollment_id, date, present)
+        SELECT e.id, CURRENT_DATE - w.ago * 7, random() < 0.8
+        FROM public.enrollments e
+        CROSS JOIN generate_series($1, $2 - 1) AS w(ago)
+        """,
+        from_month * 52 // 12,
+        to_month * 52 // 12,
+    )
+    # a carga em lote atualiza as mesmas linhas de resumo milhares de vezes; o VACUUM
+    # remove as versões mortas, como o autovacuum faria com a escrita espalhada no tempo
+    await conn.execute("VACUUM ANALYZE")
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure(conn: asyncpg.Connection, sql: str, arguments: Sequence[Any], repetitions: int) -> Dict[str, Any]:
+    timings = []
+    result = None
+    for _ in range(repetitions):
+        started = time.perf_counter()
+        result = await conn.fetchval(sql, *arguments)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "result": json.loads(result),
+    }
+
+
+def consistent(summary: Dict[str, Any], raw: Dict[str, Any]) -> bool:
+    paid = {row["month"]: float(row["paid_amount"]) for row in summary["revenue_by_month"] if row["paid_count"]}
+    raw_paid = {row["month"]: float(row["paid_amount"]) for row in raw["revenue_by_month"] if row["paid_amount"]}
+    totals = summary["classes"]
+    return (
+        paid == raw_paid
+        and summary["pending_payments"]["count"] == raw["pending_payments"]["count"]
+        and float(summary["pending_payments"]["amount"]) == float(raw["pending_payments"]["amount"])
+        and sum(row["attendance_records"] for row in totals) == raw["attendance"]["records"]
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=default_dsn())
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--professionals", type=int, default=10)
+    parser.add_argument("--classes-per-professional", type=int, default=8)
+    parser.add_argument("--students", type=int, default=15, help="Alunos inscritos em cada aula")
+    parser.add_argument("--months", type=int, default=12, help="Meses da série de faturamento")
+    parser.add_argument("--repetitions", type=int, default=30)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("informe --dsn ou BENCH_DATABASE_URL")
+
+    conn = await asyncpg.connect(args.dsn)
+    report: List[Dict[str, Any]] = []
+    try:
+        await reset_database(conn)
+        professional_ids = await seed_catalog(
+            conn, args.professionals, args.classes_per_professional, args.students
+        )
+        target = professional_ids[0]
+        seeded_months = 0
+        for years in sorted(args.years):
+            started = time.perf_counter()
+            await seed_history(conn, seeded_months, years * 12)
+            seed_seconds = time.perf_counter() - started
+            seeded_months = years * 12
+
+            summary = await measure(
+                conn, "SELECT public.professional_dashboard($1, $2)::TEXT", (target, args.months), args.repetitions
+            )
+            raw = await measure(conn, RAW_DASHBOARD_SQL + "::TEXT", (target, args.months), args.repetitions)
+            report.append(
+                {
+                    "years": years,
+                    "payments": await conn.fetchval("SELECT count(*) FROM public.payments"),
+                    "attendance": await conn.fetchval("SELECT count(*) FROM public.attendance"),
+                    "seed_seconds": round(seed_seconds, 2),
+                    "summary": {key: summary[key] for key in ("p50_ms", "p95_ms")},
+                    "raw": {key: raw[key] for key in ("p50_ms", "p95_ms")},
+                    "consistent": consistent(summary["result"], raw["result"]),
+                }
+            )
+    finally:
+        await conn.close()
+
+    print(json.dumps(report, indent=2))
+    return 0 if all(entry["consistent"] for entry in report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,226 @@
+"""
+Comportamento da API quando o Supabase degrada: fases de carga contra o stand-in com falhas
+injetadas (POST /__standin/faults), comparando a configuração padrão (circuit breaker, timeout
+adaptativo, hedge e respostas velhas do catálogo) com essas defesas desligadas.
+
+Fases, cada uma por --phase-seconds:
+    healthy    sem falhas
+    tail       uma fração das chamadas com latência extra (cauda longa: o hedge corta o p99)
+    slow       todas as chamadas lentas (timeout adaptativo e circuito limitam a espera)
+    down       todas as chamadas com 503 (o circuito abre; o catálogo serve a última página boa)
+    recovered  sem falhas de novo (a sonda fecha o circuito)
+
+Para cada fase e grupo de rotas (catálogo: aulas, demandas e posts do fórum; demais:
+inscrições e perfil) mede latência p50/p95/p99/máx, status, respostas velhas (header Warning)
+e chamadas ao upstream. A API roda num subprocesso uvicorn com CACHE_TTL_SECONDS curto, para
+o cache fresco não esconder a degradação.
+
+Uso (a partir de backend/):
+    python -m benchmarks.degradation --phase-seconds 15 --concurrency 20 --output degradation.json
+    python -m benchmarks.degradation --configs resilient --slow-ms 8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.load import BACKEND_DIR, free_port, git_revision, mint_token, percentile, standin_server
+from benchmarks.startup import wait_ready
+
+ROUTES = {
+    "catalog": ["/api/classes", "/api/demands", "/api/forum/posts"],
+    "other": ["/api/enrollments", "/api/me"],
+}
+CONFIGS = {
+    "resilient": {},
+    # circuito que nunca abre, timeout fixo, sem hedge e sem respostas velhas
+    "baseline": {
+        "HTTP_BREAKER_FAILURES": str(10**9),
+        "HTTP_ADAPTIVE_TIMEOUT_MULTIPLIER": "0",
+        "HTTP_HEDGE_QUANTILE": "0",
+        "CACHE_STALE_SECONDS": "0",
+        "CACHE_STALE_IF_ERROR_SECONDS": "0",
+    },
+}
+
+
+def phases(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    return [
+        {"name": "healthy", "faults": {}},
+        {"name": "tail", "faults": {"delay_ms": args.tail_ms, "delay_rate": args.tail_rate}},
+        {"name": "slow", "faults": {"delay_ms": args.slow_ms}},
+        {"name": "down", "faults": {"error_rate": 1.0, "status": 503}},
+        {"name": "recovered", "faults": {}},
+    ]
+
+
+def summarize(latencies: List[float], statuses: Counter, stale: int) -> Dict[str, Any]:
+    total = len(latencies)
+    if not total:
+        return {"requests": 0}
+    return {
+        "requests": total,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+            "max": round(max(latencies), 1),
+        },
+        "status": dict(statuses),
+        "ok_ratio": round(sum(n for code, n in statuses.items() if code.startswith(("2", "3"))) / total, 3),
+        "stale_ratio": round(stale / total, 3),
+    }
+
+
+async def run_phase(
+    client: httpx.AsyncClient,
+    control: httpx.AsyncClient,
+    phase: Dict[str, Any],
+    tokens: List[str],
+    args: argparse.Namespace,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    (await control.post("/__standin/faults", json=phase["faults"])).raise_for_status()
+    (await control.post("/__standin/reset")).raise_for_status()
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    stale: Counter = Counter()
+    deadline = time.perf_counter() + args.phase_seconds
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            group = rng.choice(list(ROUTES))
+            headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+            started = time.perf_counter()
+            try:
+                response = await client.get(rng.choice(ROUTES[group]), headers=headers)
+                status = str(response.status_code)
+                stale[group] += "warning" in response.headers
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            latencies[group].append((time.perf_counter() - started) * 1000)
+            statuses[group][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    upstream = (await control.get("/__standin/stats")).json()
+    return {
+        "phase": phase["name"],
+        "faults": phase["faults"],
+        "seconds": round(time.perf_counter() - started, 2),
+        "groups": {group: summarize(latencies[group], statuses[group], stale[group]) for group in ROUTES},
+        "upstream_calls": upstream["total"],
+    }
+
+
+async def run_config(
+    name: str, args: argparse.Namespace, standin_url: str, manifest: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "SUPABASE_URL": standin_url,
+        "SUPABASE_ANON_KEY": "bench",
+        "SUPABASE_SERVICE_KEY": "bench",
+        "SUPABASE_JWT_SECRET": manifest["jwt_secret"],
+        "RATE_LIMIT_ENABLED": "false",
+        "CACHE_TTL_SECONDS": str(args.cache_ttl),
+        **CONFIGS[name],
+    }
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    output = None if args.verbose else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=output,
+        stderr=output,
+    )
+    tokens = [mint_token(user_id, manifest["jwt_secret"]) for user_id in manifest["students"][:20]]
+    rng = random.Random(args.seed)
+    results = []
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=httpx.Timeout(args.timeout)
+        ) as client, httpx.AsyncClient(base_url=standin_url) as control:
+            await wait_ready(client, process, args.timeout)
+            for phase in phases(args):
+                result = await run_phase(client, control, phase, tokens, args, rng)
+                results.append(result)
+                for group, summary in result["groups"].items():
+                    if not summary["requests"]:
+                        continue
+                    latency = summary["latency_ms"]
+                    print(
+                        f"{name:<10}{phase['name']:<11}{group:<8}{summary['requests']:>6} req"
+                        f"  p50 {latency['p50']:>7.1f}  p99 {latency['p99']:>7.1f}  máx {latency['max']:>7.1f} ms"
+                        f"  ok {summary['ok_ratio']:>5.1%}  velhas {summary['stale_ratio']:>5.1%}"
+                        f"  {dict(summary['status'])}"
+                    )
+            (await control.post("/__standin/faults", json={})).raise_for_status()
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    # mais longa que HTTP_BREAKER_RESET_SECONDS, para a fase recovered ver o circuito fechar
+    parser.add_argument("--phase-seconds", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--tail-ms", type=float, default=300.0, help="Latência extra da fase tail")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="Fração das chamadas lentas na fase tail")
+    parser.add_argument("--slow-ms", type=float, default=5_000.0, help="Latência extra da fase slow")
+    parser.add_argument("--cache-ttl", type=float, default=1.0, help="CACHE_TTL_SECONDS da API")
+    parser.add_argument("--users", type=int, default=1_000, help="Tamanho do conjunto de dados do stand-in")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--standin-url", help="Usa um stand-in já em execução")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--env", action="append", default=[], metavar="NOME=VALOR", help="Ambiente extra da API")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os logs da API")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = {}
+    async with standin_server(args) as standin_url:
+        async with httpx.AsyncClient(base_url=standin_url) as control:
+            manifest = (await control.get("/__standin/manifest")).json()
+        for name in args.configs:
+            results[name] = await run_config(name, args, standin_url, manifest)
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "parameters": {key: value for key, value in vars(args).items() if key not in {"output", "verbose"}},
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,89 @@
+"""
+Teste de estresse da função public.enroll_student contra um Postgres local.
+
+Vários alunos disputam, ao mesmo tempo e em conexões distintas, as vagas de uma
+mesma aula (cada aluno tenta duas vezes). O resultado só é válido se exatamente
+`capacity` inscrições forem criadas e nenhum aluno ficar inscrito em duplicidade.
+
+Uso (a partir de backend/):
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.enrollment_stress --students 200 --capacity 25
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+
+import asyncpg
+
+from benchmarks.pg import create_user, default_dsn, reset_database
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=default_dsn())
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=25)
+    parser.add_argument("--connections", type=int, default=20)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("informe --dsn ou BENCH_DATABASE_URL")
+
+    conn = await asyncpg.connect(args.dsn)
+    await reset_database(conn)
+    professional_user = await create_user(conn, "pro@bench.local")
+    professional_id = await conn.fetchval(
+        """
+        INSERT INTO public.professionals (user_id, cref, full_name, birth_date, specialty, cpf)
+        VALUES ($1, 'CREF-1', 'Profissional', '1980-01-01', 'Yoga', '000')
+        RETURNING id
+        """,
+        professional_user,
+    )
+    class_id = await conn.fetchval(
+        """
+        INSERT INTO public.classes (professional_id, activity, schedule, max_students, location)
+        VALUES ($1, 'Yoga', 'Seg 8h', $2, 'Parque') RETURNING id
+        """,
+        professional_id,
+        args.capacity,
+    )
+    students = [await create_user(conn, f"aluno{i}@bench.local") for i in range(args.students)]
+    await conn.close()
+
+    pool = await asyncpg.create_pool(args.dsn, min_size=args.connections, max_size=args.connections)
+
+    async def enroll(student_id: str) -> str:
+        result = await pool.fetchval("SELECT public.enroll_student($1, $2)", class_id, student_id)
+        return json.loads(result)["status"]
+
+    attempts = students * 2
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(enroll(student) for student in attempts))
+    elapsed = time.perf_counter() - started
+
+    enrolled = await pool.fetchval("SELECT count(*) FROM public.enrollments WHERE class_id = $1", class_id)
+    distinct = await pool.fetchval(
+        "SELECT count(DISTINCT student_id) FROM public.enrollments WHERE class_id = $1", class_id
+    )
+    await pool.close()
+
+    expected = min(args.capacity, args.students)
+    report = {
+        "attempts": len(attempts),
+        "seconds": round(elapsed, 3),
+        "statuses": dict(Counter(statuses)),
+        "enrolled": enrolled,
+        "expected": expected,
+        "ok": enrolled == expected and distinct == enrolled,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
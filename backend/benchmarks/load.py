@@ -0,0 +1,399 @@
+"""
+Teste de carga offline: percorre as rotas de cada router (classes, enrollments, forum,
+messages, demands, me e dashboard) contra o stand-in local do Supabase
+(benchmarks/standin.py) e mede throughput, latência p50/p95/p99 e chamadas ao
+upstream por requisição.
+
+Por padrão sobe o stand-in num subprocesso e executa a API no próprio processo (via
+ASGI, com o lifespan da aplicação). Com --api-url o alvo é uma API já em execução, que
+deve apontar para o mesmo stand-in (SUPABASE_URL) e usar o mesmo SUPABASE_JWT_SECRET.
+
+O resultado é salvo em JSON (--output) com o commit e os parâmetros da execução; com
+--compare, cada cenário é comparado com um resultado anterior e regressões de latência,
+throughput ou chamadas ao upstream acima de --max-regression fazem o comando falhar.
+
+Uso (a partir de backend/):
+    python -m benchmarks.load --users 2000 --concurrency 10 50 --requests 500 --output load.json
+    python -m benchmarks.load --scenarios classes me --compare load.json
+    python -m benchmarks.load --env AUTH_MODE=remote --env CACHE_TTL_SECONDS=0
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import jwt
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+API_PREFIX = "/api"
+
+Manifest = Dict[str, Any]
+# (método, caminho, corpo JSON) de uma requisição
+Call = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    router: str
+    # "students", "professionals" ou "any": de quem é o token usado
+    users: str
+    build: Callable[[random.Random, Manifest], Call]
+
+
+def get(path: str) -> Call:
+    return "GET", path, None
+
+
+SCENARIOS = [
+    Scenario("classes.list", "classes", "any", lambda rng, m: get("/classes")),
+    Scenario("classes.detail", "classes", "any", lambda rng, m: get(f"/classes/{rng.choice(m['classes'])}")),
+    Scenario("classes.search", "classes", "any", lambda rng, m: get("/classes/search?q=yoga")),
+    Scenario("enrollments.mine", "enrollments", "students", lambda rng, m: get("/enrollments")),
+    Scenario(
+        "enrollments.class",
+        "enrollments",
+        "professionals",
+        lambda rng, m: get(f"/enrollments/class/{rng.choice(m['classes'])}"),
+    ),
+    Scenario("forum.posts", "forum", "any", lambda rng, m: get("/forum/posts")),
+    Scenario("forum.post", "forum", "any", lambda rng, m: get(f"/forum/posts/{rng.choice(m['posts'])}")),
+    Scenario("messages.conversations", "messages", "any", lambda rng, m: get("/messages/conversations")),
+    Scenario("messages.thread", "messages", "any", lambda rng, m: get(f"/messages/{rng.choice(m['students'])}")),
+    Scenario(
+        "messages.send",
+        "messages",
+        "any",
+        lambda rng, m: ("POST", "/messages", {"recipient_id": rng.choice(m["students"]), "content": "Até quinta!"}),
+    ),
+    Scenario("demands.list", "demands", "any", lambda rng, m: get("/demands")),
+    Scenario("demands.detail", "demands", "any", lambda rng, m: get(f"/demands/{rng.choice(m['demands'])}")),
+    Scenario("demands.search", "demands", "any", lambda rng, m: get("/demands/search?q=pilates")),
+    Scenario("me.profile", "me", "any", lambda rng, m: get("/me")),
+    Scenario("dashboard.summary", "dashboard", "professionals", lambda rng, m: get("/dashboard")),
+]
+
+
+def select_scenarios(names: Optional[Sequence[str]]) -> List[Scenario]:
+    if not names:
+        return SCENARIOS
+    selected = [scenario for scenario in SCENARIOS if scenario.name in names or scenario.router in names]
+    unknown = set(names) - {scenario.name for scenario in selected} - {scenario.router for scenario in selected}
+    if unknown:
+        raise SystemExit(f"cenários desconhecidos: {', '.join(sorted(unknown))}")
+    return selected
+
+
+def mint_token(user_id: str, secret: str, ttl: int = 3_600) -> str:
+    now = int(time.time())
+    claims = {"sub": user_id, "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + ttl}
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+
+
+@asynccontextmanager
+async def standin_server(args: argparse.Namespace) -> AsyncIterator[str]:
+    """URL de um stand-in pronto: o informado em --standin-url ou um subprocesso novo."""
+    if args.standin_url:
+        yield args.standin_url.rstrip("/")
+        return
+
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.standin",
+            "--port",
+            str(port),
+            "--users",
+            str(args.users),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--jitter-ms",
+            str(args.jitter_ms),
+        ],
+        cwd=BACKEND_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient() as client:
+            for _ in range(300):
+                if process.poll() is not None:
+                    raise SystemExit("o stand-in do Supabase terminou antes de ficar pronto")
+                try:
+                    (await client.get(f"{url}/__standin/stats")).raise_for_status()
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise SystemExit("o stand-in do Supabase não respondeu a tempo")
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@asynccontextmanager
+async def api_client(args: argparse.Namespace, standin_url: str, manifest: Manifest) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    timeout = httpx.Timeout(args.timeout)
+    if args.api_url:
+        async with httpx.AsyncClient(base_url=args.api_url.rstrip("/"), limits=limits, timeout=timeout) as client:
+            yield client
+        return
+
+    # a configuração é lida na importação da aplicação: o ambiente vem antes do import
+    os.environ.update(
+        {
+            "SUPABASE_URL": standin_url,
+            "SUPABASE_ANON_KEY": "bench",
+            "SUPABASE_SERVICE_KEY": "bench",
+            "SUPABASE_JWT_SECRET": manifest["jwt_secret"],
+            # todas as requisições saem do mesmo IP e de poucos usuários
+            "RATE_LIMIT_ENABLED": "false",
+        }
+    )
+    for item in args.env:
+        name, _, value = item.partition("=")
+        os.environ[name] = value
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://api.local", timeout=timeout) as client:
+            yield client
+
+
+async def upstream_stats(control: httpx.AsyncClient, reset: bool = False) -> Dict[str, Any]:
+    if reset:
+        (await control.post("/__standin/reset")).raise_for_status()
+        return {}
+    response = await control.get("/__standin/stats")
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    control: httpx.AsyncClient,
+    scenario: Scenario,
+    manifest: Manifest,
+    tokens: Dict[str, List[str]],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int,
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    pool = tokens[scenario.users]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def one(record: bool) -> None:
+        method, path, body = scenario.build(rng, manifest)
+        headers = {"Authorization": f"Bearer {rng.choice(pool)}", "Accept-Encoding": "gzip, br"}
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, API_PREFIX + path, json=body, headers=headers)
+            await response.aread()
+            status = str(response.status_code)
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        if record:
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+    async def worker(queue: List[None], record: bool) -> None:
+        while queue:
+            queue.pop()
+            await one(record)
+
+    async def drive(total: int, record: bool) -> float:
+        queue: List[None] = [None] * total
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(queue, record) for _ in range(min(concurrency, total))))
+        return time.perf_counter() - started
+
+    if warmup:
+        await drive(warmup, record=False)
+    await upstream_stats(control, reset=True)
+    seconds = await drive(requests, record=True)
+    upstream = await upstream_stats(control)
+
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "304")))
+    return {
+        "scenario": scenario.name,
+        "router": scenario.router,
+        "concurrency": concurrency,
+        "requests": requests,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(requests / seconds, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3),
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(max(latencies), 3),
+        },
+        "status": dict(statuses),
+        "errors": errors,
+        "upstream": {
+            "calls": upstream["total"],
+            "per_request": round(upstream["total"] / requests, 3),
+            "by_service": upstream["by_service"],
+            "by_route": upstream["by_route"],
+        },
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Imprime a comparação com um resultado anterior e devolve as regressões encontradas."""
+    previous = {(entry["scenario"], entry["concurrency"]): entry for entry in baseline["results"]}
+    regressions = []
+    print(f"comparando com {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})", file=sys.stderr)
+    print(f"{'cenário':<28}{'conc':>5}{'p50 ms':>18}{'p95 ms':>18}{'req/s':>18}{'upstream/req':>16}", file=sys.stderr)
+    for entry in results:
+        old = previous.get((entry["scenario"], entry["concurrency"]))
+        if old is None:
+            continue
+
+        def delta(new: float, before: float) -> str:
+            change = (new - before) / before * 100 if before else 0.0
+            return f"{new:.1f} ({change:+.0f}%)"
+
+        label = f"{entry['scenario']}@{entry['concurrency']}"
+        p95, old_p95 = entry["latency_ms"]["p95"], old["latency_ms"]["p95"]
+        throughput, old_throughput = entry["throughput_rps"], old["throughput_rps"]
+        calls, old_calls = entry["upstream"]["per_request"], old["upstream"]["per_request"]
+        print(
+            f"{entry['scenario']:<28}{entry['concurrency']:>5}"
+            f"{delta(entry['latency_ms']['p50'], old['latency_ms']['p50']):>18}"
+            f"{delta(p95, old_p95):>18}{delta(throughput, old_throughput):>18}"
+            f"{calls:>9.2f} ({old_calls:.2f})",
+            file=sys.stderr,
+        )
+        if p95 > old_p95 * (1 + max_regression):
+            regressions.append(f"{label}: p95 {old_p95} -> {p95} ms")
+        if throughput < old_throughput * (1 - max_regression):
+            regressions.append(f"{label}: throughput {old_throughput} -> {throughput} req/s")
+        # chamadas ao upstream não dependem de ruído de medição: qualquer aumento conta
+        if calls > old_calls + 0.01:
+            regressions.append(f"{label}: chamadas ao upstream por requisição {old_calls} -> {calls}")
+        if entry["errors"] > old["errors"]:
+            regressions.append(f"{label}: erros {old['errors']} -> {entry['errors']}")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", help="Nomes de cenário (ex.: classes.list) ou de router (ex.: forum)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--requests", type=int, default=300, help="Requisições medidas por cenário e concorrência")
+    parser.add_argument("--warmup", type=int, default=30, help="Requisições descartadas antes de medir")
+    parser.add_argument("--users", type=int, default=1_000, help="Tamanho do conjunto de dados do stand-in")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Latência simulada de cada chamada ao upstream")
+    parser.add_argument("--jitter-ms", type=float, default=1.0)
+    parser.add_argument("--token-users", type=int, default=50, help="Usuários distintos que fazem as requisições")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--standin-url", help="Stand-in já em execução (python -m benchmarks.standin)")
+    parser.add_argument("--api-url", help="API já em execução; sem ele, a API roda neste processo")
+    parser.add_argument("--env", action="append", default=[], metavar="NOME=VALOR", help="Configuração da API em processo")
+    parser.add_argument("--output", type=Path, help="Arquivo JSON com os resultados")
+    parser.add_argument("--compare", type=Path, help="Resultado anterior (JSON) para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Piora tolerada de p95/throughput (fração)")
+    args = parser.parse_args()
+    scenarios = select_scenarios(args.scenarios)
+
+    async with standin_server(args) as standin_url:
+        async with httpx.AsyncClient(base_url=standin_url) as control:
+            response = await control.get("/__standin/manifest")
+            response.raise_for_status()
+            manifest = response.json()
+            secret = manifest["jwt_secret"]
+            students = [mint_token(user, secret) for user in manifest["students"][: args.token_users]]
+            professionals = [mint_token(user, secret) for user in manifest["professionals"][: args.token_users]]
+            tokens = {"students": students, "professionals": professionals, "any": students + professionals}
+
+            results = []
+            async with api_client(args, standin_url, manifest) as client:
+                for concurrency in args.concurrency:
+                    for scenario in scenarios:
+                        result = await run_scenario(
+                            client, control, scenario, manifest, tokens, args.requests, concurrency, args.warmup, args.seed
+                        )
+                        results.append(result)
+                        print(
+                            f"{scenario.name:<28} c={concurrency:<4} {result['throughput_rps']:>8} req/s  "
+                            f"p50 {result['latency_ms']['p50']:>7} ms  p95 {result['latency_ms']['p95']:>7} ms  "
+                            f"p99 {result['latency_ms']['p99']:>7} ms  upstream/req {result['upstream']['per_request']}"
+                            + (f"  erros {result['errors']}" if result["errors"] else ""),
+                            file=sys.stderr,
+                        )
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "target": args.api_url or "in-process",
+            "dataset": manifest["rows"],
+            "parameters": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "compare") and not isinstance(value, Path)
+            },
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0 if not any(result["errors"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,45 @@
+"""
+Postgres local para benchmarks: recria o banco com o stand-in do Supabase e aplica
+todas as migrations de supabase/migrations, em ordem.
+
+A conexão vem de --dsn ou da variável BENCH_DATABASE_URL. O banco informado é
+apagado (schemas public, auth e storage), então use um banco descartável.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Sequence
+
+import asyncpg
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+MIGRATIONS_DIR = BENCHMARKS_DIR.parents[1] / "supabase" / "migrations"
+
+
+def default_dsn() -> str | None:
+    return os.environ.get("BENCH_DATABASE_URL")
+
+
+async def reset_database(conn: asyncpg.Connection, exclude: Sequence[str] = ()) -> None:
+    """Recria o banco; `exclude` lista prefixos de migrations a pular (ex.: para comparar planos)."""
+    await conn.execute(
+        """
+        DROP SCHEMA IF EXISTS public, auth, storage CASCADE;
+        DROP PUBLICATION IF EXISTS supabase_realtime;
+        CREATE SCHEMA public;
+        """
+    )
+    await conn.execute((BENCHMARKS_DIR / "supabase_stub.sql").read_text())
+
+    migrations = [path for path in sorted(MIGRATIONS_DIR.glob("*.sql")) if not path.name.startswith(tuple(exclude))]
+    for index, migration in enumerate(migrations):
+        await conn.execute(migration.read_text())
+        if index == 0:
+            await conn.execute((BENCHMARKS_DIR / "legacy_tables.sql").read_text())
+
+
+async def create_user(conn: asyncpg.Connection, email: str) -> str:
+    # o trigger on_auth_user_created cria o profile correspondente
+    return str(await conn.fetchval("INSERT INTO auth.users (email) VALUES ($1) RETURNING id", email))
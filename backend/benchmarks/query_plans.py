@@ -0,0 +1,630 @@
+"""
+Regressão de planos de consulta: reexecuta, num Postgres local com volume realista, cada
+consulta que os routers fazem ao PostgREST (no formato de LEFT JOIN LATERAL que o
+PostgREST gera para recursos embutidos) e cada função RPC que eles chamam, e captura
+EXPLAIN (ANALYZE, BUFFERS).
+
+Cada caso roda numa transação desfeita no final (escritas incluídas). Além do plano, a
+transação lê pg_stat_xact_user_tables: varreduras sequenciais feitas dentro de funções
+RPC e de triggers de chave estrangeira (ON DELETE CASCADE) não aparecem no plano de
+topo, mas aparecem ali.
+
+Falha quando um caso faz varredura sequencial numa tabela com pelo menos
+--seq-scan-min-rows linhas ou quando o custo do plano passa de --max-cost. Com
+--exclude-migration, o banco é montado sem as migrations indicadas, o que mostra quais
+falhas um índice resolve.
+
+Uso (a partir de backend/):
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.query_plans --users 5000 --output plans.json
+    python -m benchmarks.query_plans --exclude-migration 20251201180000 --verbose
+    python -m benchmarks.query_plans --rls   # consultas de tabela como `authenticated`, com RLS
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+import asyncpg
+
+from benchmarks.dashboard import seed_history
+from benchmarks.pg import default_dsn, reset_database
+
+# tamanho das páginas pedidas pelos routers (DEFAULT_PAGE_LIMIT + 1)
+PAGE = 51
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    name: str
+    route: str
+    sql: str
+    # chaves de `sample` usadas como $1, $2...
+    params: Sequence[str] = ()
+    # usuário do JWT com --rls; None para funções RPC, chamadas só com a service key
+    user: Optional[str] = None
+    max_cost: Optional[float] = None
+
+
+CLASS_EMBEDS = """
+  LEFT JOIN LATERAL (
+    SELECT p.full_name, p.user_id FROM public.professionals p WHERE p.id = c.professional_id
+  ) AS professionals ON true
+  LEFT JOIN LATERAL (
+    SELECT count(*) AS count FROM public.enrollments e WHERE e.class_id = c.id
+  ) AS enrollment_count ON true
+"""
+
+PROFILE_EMBED = """
+  LEFT JOIN LATERAL (
+    SELECT pr.full_name, pr.avatar_url FROM public.profiles pr WHERE pr.id = {alias}.{column}
+  ) AS {name} ON true
+"""
+
+CASES = [
+    PlanCase(
+        "classes.list",
+        "GET /classes",
+        f"""
+        SELECT c.*, to_jsonb(professionals) AS professionals, enrollment_count.count AS enrollment_count
+        FROM public.classes c {CLASS_EMBEDS}
+        ORDER BY c.created_at, c.id
+        LIMIT {PAGE}
+        """,
+        user="student",
+    ),
+    PlanCase(
+        "classes.list.cursor",
+        "GET /classes?cursor=",
+        f"""
+        SELECT c.*, to_jsonb(professionals) AS professionals, enrollment_count.count AS enrollment_count
+        FROM public.classes c {CLASS_EMBEDS}
+        WHERE c.created_at > $1 OR (c.created_at = $1 AND c.id > $2)
+        ORDER BY c.created_at, c.id
+        LIMIT {PAGE}
+        """,
+        ("class_created_at", "class_id"),
+        user="student",
+    ),
+    PlanCase(
+        "classes.detail",
+        "GET /classes/{id}",
+        f"""
+        SELECT c.*, to_jsonb(professionals) AS professionals, enrollment_count.count AS enrollment_count
+        FROM public.classes c {CLASS_EMBEDS}
+        WHERE c.id = $1
+        """,
+        ("class_id",),
+        user="student",
+    ),
+    PlanCase(
+        "classes.search",
+        "GET /classes/search",
+        f"SELECT * FROM public.search_classes('hidroginástica', _limit => {PAGE})",
+    ),
+    PlanCase(
+        "classes.update",
+        "PUT /classes/{id}",
+        "SELECT public.update_own_class($1, $2, '{\"price\": 10}'::jsonb)",
+        ("professional_user_id", "class_id"),
+    ),
+    PlanCase(
+        "classes.delete",
+        "DELETE /classes/{id}",
+        "SELECT public.delete_own_class($1, $2)",
+        ("professional_user_id", "class_id"),
+    ),
+    PlanCase(
+        "enrollments.mine",
+        "GET /enrollments",
+        f"""
+        SELECT e.*, to_jsonb(classes) AS classes
+        FROM public.enrollments e
+        LEFT JOIN LATERAL (
+          SELECT c.*, to_jsonb(professionals) AS professionals
+          FROM public.classes c
+          LEFT JOIN LATERAL (
+            SELECT p.full_name FROM public.professionals p WHERE p.id = c.professional_id
+          ) AS professionals ON true
+          WHERE c.id = e.class_id
+        ) AS classes ON true
+        WHERE e.student_id = $1
+        ORDER BY e.created_at DESC, e.id DESC
+        LIMIT {PAGE}
+        """,
+        ("student_user_id",),
+        user="student",
+    ),
+    PlanCase(
+        "enrollments.class",
+        "GET /enrollments/class/{id}",
+        """
+        SELECT e.*, to_jsonb(students) AS students
+        FROM public.enrollments e
+        LEFT JOIN LATERAL (
+          SELECT s.full_name, s.avatar_url FROM public.students s WHERE s.user_id = e.student_id
+        ) AS students ON true
+        WHERE e.class_id = $1
+        """,
+        ("class_id",),
+        user="professional",
+    ),
+    PlanCase(
+        "enrollments.create",
+        "POST /enrollments",
+        "SELECT public.enroll_student($1, $2)",
+        ("spare_class_id", "student_user_id"),
+    ),
+    PlanCase(
+        "enrollments.delete",
+        "DELETE /enrollments/{id}",
+        "DELETE FROM public.enrollments WHERE id = $1 AND student_id = $2 RETURNING *",
+        ("enrollment_id", "student_user_id"),
+        user="student",
+    ),
+    PlanCase(
+        "attendance.bulk",
+        "POST /attendance/bulk",
+        "SELECT public.record_attendance($1, $2, CURRENT_DATE + 1, $3::jsonb)",
+        ("professional_id", "class_id", "attendance_records"),
+    ),
+    PlanCase(
+        "dashboard",
+        "GET /dashboard",
+        "SELECT public.professional_dashboard($1, 12, 20)",
+        ("professional_id",),
+    ),
+    PlanCase(
+        "forum.posts",
+        "GET /forum/posts",
+        f"""
+        SELECT fp.*, to_jsonb(profiles) AS profiles, reply_count.count AS forum_replies
+        FROM public.forum_posts fp
+        {PROFILE_EMBED.format(alias="fp", column="user_id", name="profiles")}
+        LEFT JOIN LATERAL (
+          SELECT count(*) AS count FROM public.forum_replies fr WHERE fr.post_id = fp.id
+        ) AS reply_count ON true
+        ORDER BY fp.created_at DESC, fp.id DESC
+        LIMIT {PAGE}
+        """,
+        user="student",
+    ),
+    PlanCase(
+        "forum.post",
+        "GET /forum/posts/{id}",
+        f"""
+        SELECT fp.*, to_jsonb(profiles) AS profiles, replies.items AS replies, reply_count.count AS reply_count
+        FROM public.forum_posts fp
+        {PROFILE_EMBED.format(alias="fp", column="user_id", name="profiles")}
+        LEFT JOIN LATERAL (
+          SELECT coalesce(jsonb_agg(page ORDER BY page.created_at, page.id), '[]') AS items
+          FROM (
+            SELECT fr.*, to_jsonb(reply_profiles) AS profiles
+            FROM public.forum_replies fr
+            {PROFILE_EMBED.format(alias="fr", column="user_id", name="reply_profiles")}
+            WHERE fr.post_id = fp.id
+            ORDER BY fr.created_at, fr.id
+            LIMIT {PAGE}
+          ) AS page
+        ) AS replies ON true
+        LEFT JOIN LATERAL (
+          SELECT count(*) AS count FROM public.forum_replies fr WHERE fr.post_id = fp.id
+        ) AS reply_count ON true
+        WHERE fp.id = $1
+        """,
+        ("post_id",),
+        user="student",
+    ),
+    PlanCase(
+        "forum.delete",
+        "DELETE /forum/posts/{id}",
+        "DELETE FROM public.forum_posts WHERE id = $1 AND user_id = $2 RETURNING *",
+        ("post_id", "post_author_id"),
+        user="post_author",
+    ),
+    PlanCase(
+        "messages.conversations",
+        "GET /messages/conversations",
+        f"SELECT * FROM public.conversation_summaries($1, {PAGE})",
+        ("student_user_id",),
+    ),
+    PlanCase(
+        "messages.thread",
+        "GET /messages/{other_user_id}",
+        f"""
+        SELECT m.*, to_jsonb(sender) AS sender, to_jsonb(recipient) AS recipient
+        FROM public.messages m
+        {PROFILE_EMBED.format(alias="m", column="sender_id", name="sender")}
+        {PROFILE_EMBED.format(alias="m", column="recipient_id", name="recipient")}
+        WHERE (m.sender_id = $1 AND m.recipient_id = $2) OR (m.sender_id = $2 AND m.recipient_id = $1)
+        ORDER BY m.created_at DESC, m.id DESC
+        LIMIT {PAGE}
+        """,
+        ("student_user_id", "counterpart_id"),
+        user="student",
+    ),
+    PlanCase(
+        "messages.thread.after",
+        "GET /messages/{other_user_id}?after=",
+        f"""
+        SELECT m.*
+        FROM public.messages m
+        WHERE ((m.sender_id = $1 AND m.recipient_id = $2) OR (m.sender_id = $2 AND m.recipient_id = $1))
+          AND (m.created_at > now() - interval '7 days'
+               OR (m.created_at = now() - interval '7 days' AND m.id > $1))
+        ORDER BY m.created_at, m.id
+        LIMIT {PAGE}
+        """,
+        ("student_user_id", "counterpart_id"),
+        user="student",
+    ),
+    PlanCase(
+        "messages.read",
+        "PUT /messages/conversations/{id}/read",
+        "SELECT public.mark_conversation_read($1, $2, NULL)",
+        ("student_user_id", "counterpart_id"),
+    ),
+    PlanCase(
+        "demands.list",
+        "GET /demands",
+        f"""
+        SELECT d.*, to_jsonb(profiles) AS profiles
+        FROM public.demands d
+        {PROFILE_EMBED.format(alias="d", column="user_id", name="profiles")}
+        ORDER BY d.created_at DESC, d.id DESC
+        LIMIT {PAGE}
+        """,
+        user="student",
+    ),
+    PlanCase(
+        "demands.detail",
+        "GET /demands/{id}",
+        f"""
+        SELECT d.*, to_jsonb(profiles) AS profiles
+        FROM public.demands d
+        {PROFILE_EMBED.format(alias="d", column="user_id", name="profiles")}
+        WHERE d.id = $1
+        """,
+        ("demand_id",),
+        user="student",
+    ),
+    PlanCase(
+        "demands.search",
+        "GET /demands/search",
+        f"SELECT * FROM public.search_demands('pilates', _limit => {PAGE})",
+    ),
+    PlanCase(
+        "demands.delete",
+        "DELETE /demands/{id}",
+        "DELETE FROM public.demands WHERE id = $1 AND user_id = $2 RETURNING *",
+        ("demand_id", "demand_author_id"),
+        user="demand_author",
+    ),
+    PlanCase("me.identity", "GET /me", "SELECT public.get_identity($1)", ("student_user_id",)),
+    PlanCase(
+        "me.update",
+        "PUT /me",
+        "UPDATE public.profiles SET full_name = full_name || ' ' WHERE id = $1 RETURNING *",
+        ("student_user_id",),
+        user="student",
+    ),
+]
+
+
+async def seed(conn: asyncpg.Connection, users: int, months: int) -> None:
+    """Usuários (10% profissionais), aulas, inscrições, histórico, demandas, fórum e mensagens."""
+    await conn.execute("SELECT setseed(0.17)")
+    await conn.execute(
+        """
+        INSERT INTO auth.users (email, raw_user_meta_data)
+        SELECT 'user' || n || '@bench.local', jsonb_build_object('full_name', 'Usuário ' || n)
+        FROM generate_series(1, $1) AS n
+        """,
+        users,
+    )
+    await conn.execute(
+        """
+        CREATE TEMP TABLE seed_users AS
+        SELECT id, row_number() OVER (ORDER BY email) AS n FROM auth.users;
+
+        INSERT INTO public.professionals (user_id, cref, full_name, birth_date, specialty, cpf)
+        SELECT id, 'CREF-' || n, 'Profissional ' || n, '1980-01-01', 'Educação física', lpad(n::TEXT, 11, '0')
+        FROM seed_users WHERE n % 10 = 0;
+
+        INSERT INTO public.students (user_id, full_name, gender, phone, email, cpf, address, birth_date)
+        SELECT id, 'Aluno ' || n, 'F', '11 9' || lpad(n::TEXT, 8, '0'), 'user' || n || '@bench.local',
+               lpad(n::TEXT, 11, '0'), 'Rua ' || n, '1950-01-01'
+        FROM seed_users WHERE n % 10 <> 0;
+
+        INSERT INTO public.user_roles (user_id, role)
+        SELECT user_id, 'professional'::public.app_role FROM public.professionals
+        UNION ALL
+        SELECT user_id, 'student'::public.app_role FROM public.students;
+
+        INSERT INTO public.classes (
+          professional_id, activity, description, schedule, max_students, location, price, created_at
+        )
+        SELECT p.id,
+               (ARRAY['Hidroginástica', 'Yoga', 'Pilates', 'Caminhada', 'Alongamento'])[1 + k % 5],
+               'Turma para a terceira idade com acompanhamento próximo',
+               (ARRAY['Seg e Qua 9h', 'Ter e Qui 8h', 'Sex 10h'])[1 + k % 3],
+               30,
+               'Clube ' || (ARRAY['Pinheiros', 'Moema', 'Tatuapé', 'Lapa'])[1 + k % 4],
+               40 + 10 * k,
+               now() - random() * interval '365 days'
+        FROM public.professionals p CROSS JOIN generate_series(1, 4) AS k;
+
+        CREATE TEMP TABLE seed_classes AS
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM public.classes;
+
+        -- três aulas por aluno, espalhadas de forma determinística
+        INSERT INTO public.enrollments (class_id, student_id, created_at)
+        SELECT c.id, s.user_id, now() - random() * interval '365 days'
+        FROM (SELECT user_id, row_number() OVER (ORDER BY user_id) AS k FROM public.students) AS s
+        CROSS JOIN generate_series(0, 2) AS j
+        JOIN seed_classes c ON c.n = (s.k * 7 + j * 131) % (SELECT count(*) FROM seed_classes)
+        ON CONFLICT DO NOTHING;
+
+        INSERT INTO public.demands (activity, neighborhood, schedule, location, num_interested, user_id, created_at)
+        SELECT (ARRAY['Pilates', 'Tai chi', 'Dança de salão', 'Natação'])[1 + n % 4],
+               (ARRAY['Pinheiros', 'Moema', 'Tatuapé', 'Lapa'])[1 + n % 4],
+               'Ter 10h', 'Praça central', 1 + n % 40, u.id, now() - random() * interval '365 days'
+        FROM seed_users u WHERE n % 3 = 0;
+
+        INSERT INTO public.forum_posts (user_id, title, content, created_at)
+        SELECT id, 'Dúvida ' || n, 'Alguém recomenda um horário mais tranquilo?', now() - random() * interval '365 days'
+        FROM seed_users WHERE n % 2 = 0;
+
+        INSERT INTO public.forum_replies (post_id, user_id, content, created_at)
+        SELECT fp.id, u.id, 'Vou às terças e a turma é ótima.', fp.created_at + random() * interval '10 days'
+        FROM public.forum_posts fp
+        CROSS JOIN generate_series(1, 5) AS r
+        JOIN seed_users u ON u.n = 1 + (abs(hashtext(fp.id::TEXT)) + r * 17) % (SELECT count(*) FROM seed_users);
+        """
+    )
+    # cada usuário conversa com ~5 interlocutores; 20 mensagens por usuário
+    await conn.execute(
+        """
+        INSERT INTO public.messages (sender_id, recipient_id, content, read, created_at)
+        SELECT a.id, b.id, 'Oi! Ainda tem vaga na turma de quinta?', random() < 0.7, now() - random() * interval '90 days'
+        FROM (
+          SELECT 1 + (i % $1) AS a_n, 1 + ((i % $1) + 1 + (random() * 4)::INT * 37) % $1 AS b_n
+          FROM generate_series(0, $1 * 20 - 1) AS i
+        ) AS pair
+        JOIN seed_users a ON a.n = pair.a_n
+        JOIN seed_users b ON b.n = pair.b_n
+        """,
+        users,
+    )
+    # pagamentos mensais e presenças semanais, como no benchmark do painel (inclui VACUUM ANALYZE)
+    await seed_history(conn, 0, months)
+
+
+async def pick_sample(conn: asyncpg.Connection) -> Dict[str, Any]:
+    student = await conn.fetchrow(
+        """
+        SELECT m.sender_id AS student_user_id, m.recipient_id AS counterpart_id
+        FROM public.messages m
+        JOIN public.students s ON s.user_id = m.sender_id
+        GROUP BY 1, 2 ORDER BY count(*) DESC LIMIT 1
+        """
+    )
+    enrollment = await conn.fetchrow(
+        "SELECT id, class_id FROM public.enrollments WHERE student_id = $1 LIMIT 1", student["student_user_id"]
+    )
+    klass = await conn.fetchrow(
+        "SELECT c.id, c.created_at, c.professional_id, p.user_id FROM public.classes c "
+        "JOIN public.professionals p ON p.id = c.professional_id WHERE c.id = $1",
+        enrollment["class_id"],
+    )
+    spare_class = await conn.fetchval(
+        "SELECT c.id FROM public.classes c WHERE NOT EXISTS "
+        "(SELECT 1 FROM public.enrollments e WHERE e.class_id = c.id AND e.student_id = $1) LIMIT 1",
+        student["student_user_id"],
+    )
+    post = await conn.fetchrow(
+        "SELECT post_id, fp.user_id FROM public.forum_replies fr JOIN public.forum_posts fp ON fp.id = fr.post_id "
+        "GROUP BY 1, 2 ORDER BY count(*) DESC LIMIT 1"
+    )
+    demand = await conn.fetchrow(
+        "SELECT id, user_id FROM public.demands WHERE user_id IS NOT NULL ORDER BY created_at DESC LIMIT 1"
+    )
+    records = await conn.fetch("SELECT id FROM public.enrollments WHERE class_id = $1", klass["id"])
+    return {
+        "student_user_id": student["student_user_id"],
+        "counterpart_id": student["counterpart_id"],
+        "enrollment_id": enrollment["id"],
+        "class_id": klass["id"],
+        "class_created_at": klass["created_at"],
+        "professional_id": klass["professional_id"],
+        "professional_user_id": klass["user_id"],
+        "spare_class_id": spare_class,
+        "post_id": post["post_id"],
+        "post_author_id": post["user_id"],
+        "demand_id": demand["id"],
+        "demand_author_id": demand["user_id"],
+        "attendance_records": json.dumps([{"enrollment_id": str(row["id"]), "present": True} for row in records]),
+    }
+
+
+# usuário do JWT de cada caso com --rls
+CASE_USERS = {
+    "student": "student_user_id",
+    "professional": "professional_user_id",
+    "post_author": "post_author_id",
+    "demand_author": "demand_author_id",
+}
+
+
+def walk(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+async def table_scans(conn: asyncpg.Connection) -> Dict[str, asyncpg.Record]:
+    rows = await conn.fetch("SELECT relname, seq_scan, seq_tup_read, idx_scan FROM pg_stat_xact_user_tables")
+    return {row["relname"]: row for row in rows}
+
+
+async def explain(
+    conn: asyncpg.Connection, case: PlanCase, sample: Dict[str, Any], rls: bool, text: bool = False
+) -> Any:
+    """Plano do caso numa transação desfeita; com `text`, devolve o EXPLAIN legível."""
+    arguments = [sample[key] for key in case.params]
+    options = "ANALYZE, BUFFERS" + ("" if text else ", FORMAT JSON")
+    transaction = conn.transaction()
+    await transaction.start()
+    try:
+        if rls and case.user:
+            # mesmo papel e claims que o PostgREST usa para o JWT de um usuário logado
+            await conn.execute(
+                """
+                GRANT USAGE ON SCHEMA public, auth TO authenticated;
+                GRANT ALL ON ALL TABLES IN SCHEMA public TO authenticated;
+                SET LOCAL ROLE authenticated;
+                """
+            )
+            await conn.execute(
+                "SELECT set_config('request.jwt.claim.sub', $1, true)", str(sample[CASE_USERS[case.user]])
+            )
+        before = await table_scans(conn)
+        if text:
+            rows = await conn.fetch(f"EXPLAIN ({options}) {case.sql}", *arguments)
+            return "\n".join(row[0] for row in rows)
+        result = json.loads(await conn.fetchval(f"EXPLAIN ({options}) {case.sql}", *arguments))[0]
+        after = await table_scans(conn)
+    finally:
+        await transaction.rollback()
+
+    scans = {}
+    for table, row in after.items():
+        previous = before.get(table)
+        seq_scans = row["seq_scan"] - (previous["seq_scan"] if previous else 0)
+        if seq_scans:
+            scans[table] = {
+                "seq_scans": seq_scans,
+                "tuples_read": row["seq_tup_read"] - (previous["seq_tup_read"] if previous else 0),
+            }
+    result["table_seq_scans"] = scans
+    return result
+
+
+def evaluate(
+    case: PlanCase, result: Dict[str, Any], table_rows: Dict[str, float], min_rows: int, max_cost: float
+) -> Dict[str, Any]:
+    plan = result["Plan"]
+    nodes = list(walk(plan))
+    problems = []
+    plan_scans = sorted({node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"})
+    for table in sorted(set(plan_scans) | set(result["table_seq_scans"])):
+        rows = table_rows.get(table, 0)
+        if rows >= min_rows:
+            where = "no plano" if table in plan_scans else "em função/trigger"
+            problems.append(f"seq scan em {table} ({int(rows)} linhas, {where})")
+    limit = case.max_cost or max_cost
+    if plan["Total Cost"] > limit:
+        problems.append(f"custo {plan['Total Cost']:.0f} > {limit:.0f}")
+    return {
+        "name": case.name,
+        "route": case.route,
+        "cost": plan["Total Cost"],
+        "execution_ms": round(result["Execution Time"], 3),
+        "planning_ms": round(result["Planning Time"], 3),
+        "shared_hit": plan.get("Shared Hit Blocks", 0),
+        "shared_read": plan.get("Shared Read Blocks", 0),
+        "triggers": [
+            {"name": trigger["Trigger Name"], "calls": trigger["Calls"], "ms": round(trigger["Time"], 3)}
+            for trigger in result.get("Triggers", [])
+        ],
+        "seq_scans": result["table_seq_scans"],
+        "indexes": sorted({node["Index Name"] for node in nodes if "Index Name" in node}),
+        "problems": problems,
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=default_dsn())
+    parser.add_argument("--users", type=int, default=5_000, help="Usuários sintéticos (10%% profissionais)")
+    parser.add_argument("--months", type=int, default=12, help="Meses de pagamentos e presenças")
+    parser.add_argument("--seq-scan-min-rows", type=int, default=1_000, help="Tabelas menores podem ser varridas")
+    parser.add_argument("--max-cost", type=float, default=5_000.0, help="Custo máximo do plano de cada caso")
+    parser.add_argument("--cases", nargs="+", help="Só os casos com estes nomes ou prefixos (ex.: messages)")
+    parser.add_argument("--exclude-migration", nargs="+", default=[], metavar="PREFIXO")
+    parser.add_argument("--rls", action="store_true", help="Consultas de tabela como `authenticated`, sob RLS")
+    parser.add_argument("--verbose", action="store_true", help="Imprime o EXPLAIN dos casos que falharem")
+    parser.add_argument("--output", type=Path, help="Arquivo JSON com os planos e métricas")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("informe --dsn ou BENCH_DATABASE_URL")
+    cases = [case for case in CASES if not args.cases or case.name.startswith(tuple(args.cases))]
+
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        await reset_database(conn, exclude=args.exclude_migration)
+        started = time.perf_counter()
+        await seed(conn, args.users, args.months)
+        seed_seconds = time.perf_counter() - started
+        table_rows = {
+            row["relname"]: row["reltuples"]
+            for row in await conn.fetch(
+                "SELECT relname, reltuples FROM pg_class WHERE relnamespace = 'public'::regnamespace AND relkind = 'r'"
+            )
+        }
+        sample = await pick_sample(conn)
+
+        report = []
+        for case in cases:
+            entry = evaluate(
+                case,
+                await explain(conn, case, sample, args.rls),
+                table_rows,
+                args.seq_scan_min_rows,
+                args.max_cost,
+            )
+            report.append(entry)
+            status = "FALHA" if entry["problems"] else "ok"
+            print(
+                f"{status:<6}{case.name:<26}custo {entry['cost']:>10.1f}  {entry['execution_ms']:>8.2f} ms  "
+                f"buffers {entry['shared_hit'] + entry['shared_read']:>6}  {'; '.join(entry['problems'])}",
+                file=sys.stderr,
+            )
+            if entry["problems"] and args.verbose:
+                print(await explain(conn, case, sample, args.rls, text=True), file=sys.stderr)
+    finally:
+        await conn.close()
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "parameters": {
+                        "users": args.users,
+                        "months": args.months,
+                        "rls": args.rls,
+                        "exclude_migration": args.exclude_migration,
+                        "seq_scan_min_rows": args.seq_scan_min_rows,
+                        "max_cost": args.max_cost,
+                    },
+                    "rows": {table: int(rows) for table, rows in sorted(table_rows.items())},
+                    "seed_seconds": round(seed_seconds, 2),
+                    "cases": report,
+                },
+                indent=2,
+                ensure_ascii=False,
+            )
+        )
+    failures = [entry["name"] for entry in report if entry["problems"]]
+    print(f"{len(report) - len(failures)}/{len(report)} casos sem problemas", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
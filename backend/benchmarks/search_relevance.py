@@ -0,0 +1,219 @@
+"""
+Relevância e latência de public.search_classes / public.search_demands num Postgres local.
+
+Popula o banco com um catálogo sintético (atividades, descrições, locais e horários
+combinados aleatoriamente, com semente fixa) e roda um conjunto de consultas com
+resposta conhecida, incluindo erros de digitação e termos sem acento. Para cada
+consulta reporta precisão nos 10 primeiros, posição do primeiro resultado relevante
+(MRR) e latência p50/p95 da chamada à função.
+
+Requer a extensão pg_trgm no servidor (vem com o pacote contrib do Postgres).
+
+Uso (a partir de backend/):
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.search_relevance --classes 20000 --demands 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Sequence
+
+import asyncpg
+
+from benchmarks.pg import create_user, default_dsn, reset_database
+
+ACTIVITIES = [
+    "Hidroginástica",
+    "Yoga para idosos",
+    "Pilates",
+    "Caminhada orientada",
+    "Dança de salão",
+    "Alongamento",
+    "Tai chi chuan",
+    "Musculação leve",
+    "Natação",
+    "Ginástica funcional",
+]
+DESCRIPTIONS = [
+    "Aula em grupo com acompanhamento profissional",
+    "Exercícios de baixo impacto para melhorar o equilíbrio",
+    "Atividade ao ar livre com aquecimento e respiração",
+    "Turma reduzida, ideal para iniciantes",
+    "Foco em mobilidade e fortalecimento muscular",
+]
+LOCATIONS = [
+    "Parque Ibirapuera",
+    "Clube Pinheiros",
+    "Parque Villa-Lobos",
+    "Centro Comunitário da Lapa",
+    "Academia Vila Mariana",
+    "Praça da Árvore",
+]
+NEIGHBORHOODS = ["Moema", "Pinheiros", "Lapa", "Vila Mariana", "Santana", "Tatuapé", "Butantã"]
+SCHEDULES = ["Seg e Qua 8h", "Ter e Qui 9h", "Seg, Qua e Sex 7h", "Sáb 10h", "Ter 15h", "Qui 18h"]
+
+# (consulta, filtros extras, campo, valor esperado nos resultados relevantes)
+CLASS_QUERIES = [
+    ("hidroginástica", {}, "activity", "Hidroginástica"),
+    ("hidroginastica", {}, "activity", "Hidroginástica"),
+    ("pilatis", {}, "activity", "Pilates"),
+    ("caminhda", {}, "activity", "Caminhada orientada"),
+    ("dança", {}, "activity", "Dança de salão"),
+    ("ibirapuera", {}, "location", "Parque Ibirapuera"),
+    ("yoga", {"_schedule": "9h"}, "activity", "Yoga para idosos"),
+    ("natação", {"_max_price": 30}, "activity", "Natação"),
+]
+DEMAND_QUERIES = [
+    ("pilates", {}, "activity", "Pilates"),
+    ("alongamnto", {}, "activity", "Alongamento"),
+    ("tai chi", {"_neighborhood": "Moema"}, "activity", "Tai chi chuan"),
+    ("vila mariana", {}, "neighborhood", "Vila Mariana"),
+]
+
+
+async def seed(conn: asyncpg.Connection, classes: int, demands: int, professionals: int) -> None:
+    await conn.execute("SELECT setseed(0.42)")
+    for index in range(professionals):
+        user_id = await create_user(conn, f"pro{index}@bench.local")
+        await conn.execute(
+            """
+            INSERT INTO public.professionals (user_id, cref, full_name, birth_date, specialty, cpf)
+            VALUES ($1, $2, $3, '1980-01-01', 'Educação física', $4)
+            """,
+            user_id,
+            f"CREF-{index}",
+            f"Profissional {index}",
+            f"{index:011d}",
+        )
+
+    await conn.execute(
+        """
+        INSERT INTO public.demands (activity, neighborhood, schedule, location, num_interested)
+        SELECT
+          ($1::text[])[1 + floor(random() * array_length($1::text[], 1))::int],
+          ($2::text[])[1 + floor(random() * array_length($2::text[], 1))::int],
+          ($3::text[])[1 + floor(random() * array_length($3::text[], 1))::int],
+          ($4::text[])[1 + floor(random() * array_length($4::text[], 1))::int],
+          floor(random() * 40)::int
+        FROM generate_series(1, $5)
+        """,
+        ACTIVITIES,
+        NEIGHBORHOODS,
+        SCHEDULES,
+        LOCATIONS,
+        demands,
+    )
+    await conn.execute(
+        """
+        INSERT INTO public.classes (professional_id, activity, description, schedule, max_students, location, price)
+        SELECT
+          p.ids[1 + floor(random() * array_length(p.ids, 1))::int],
+          ($1::text[])[1 + floor(random() * array_length($1::text[], 1))::int],
+          ($2::text[])[1 + floor(random() * array_length($2::text[], 1))::int],
+          ($3::text[])[1 + floor(random() * array_length($3::text[], 1))::int],
+          10 + floor(random() * 20)::int,
+          ($4::text[])[1 + floor(random() * array_length($4::text[], 1))::int],
+          round((random() * 80)::numeric, 2)
+        FROM generate_series(1, $5), (SELECT array_agg(id) AS ids FROM public.professionals) AS p
+        """,
+        ACTIVITIES,
+        DESCRIPTIONS,
+        SCHEDULES,
+        LOCATIONS,
+        classes,
+    )
+    await conn.execute("ANALYZE public.classes; ANALYZE public.demands;")
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_queries(
+    conn: asyncpg.Connection,
+    function: str,
+    queries: Sequence[Any],
+    repetitions: int,
+) -> List[Dict[str, Any]]:
+    results = []
+    for text, filters, column, expected in queries:
+        arguments = {"_query": text, "_limit": 10, **filters}
+        call = ", ".join(f"{name} => ${position}" for position, name in enumerate(arguments, start=1))
+        sql = f"SELECT * FROM public.{function}({call})"
+
+        timings = []
+        rows: List[asyncpg.Record] = []
+        for _ in range(repetitions):
+            started = time.perf_counter()
+            rows = await conn.fetch(sql, *arguments.values())
+            timings.append((time.perf_counter() - started) * 1000)
+
+        relevant = [row[column] == expected for row in rows]
+        first = relevant.index(True) + 1 if any(relevant) else None
+        results.append(
+            {
+                "query": text,
+                "filters": filters,
+                "results": len(rows),
+                "precision_at_10": round(sum(relevant) / 10, 3),
+                "reciprocal_rank": round(1 / first, 3) if first else 0.0,
+                "p50_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(percentile(timings, 0.95), 3),
+            }
+        )
+    return results
+
+
+def summarize(results: Sequence[Dict[str, Any]]) -> Dict[str, float]:
+    return {
+        "mean_precision_at_10": round(statistics.mean(r["precision_at_10"] for r in results), 3),
+        "mrr": round(statistics.mean(r["reciprocal_rank"] for r in results), 3),
+        "p50_ms": round(statistics.median(r["p50_ms"] for r in results), 3),
+        "p95_ms": round(max(r["p95_ms"] for r in results), 3),
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=default_dsn())
+    parser.add_argument("--classes", type=int, default=20_000)
+    parser.add_argument("--demands", type=int, default=5_000)
+    parser.add_argument("--professionals", type=int, default=50)
+    parser.add_argument("--repetitions", type=int, default=30)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("informe --dsn ou BENCH_DATABASE_URL")
+
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        available = await conn.fetchval("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if not available:
+            print("pg_trgm não está disponível neste servidor", file=sys.stderr)
+            return 1
+        await reset_database(conn)
+        started = time.perf_counter()
+        await seed(conn, args.classes, args.demands, args.professionals)
+        seed_seconds = time.perf_counter() - started
+
+        classes = await run_queries(conn, "search_classes", CLASS_QUERIES, args.repetitions)
+        demands = await run_queries(conn, "search_demands", DEMAND_QUERIES, args.repetitions)
+    finally:
+        await conn.close()
+
+    report = {
+        "dataset": {"classes": args.classes, "demands": args.demands, "seed_seconds": round(seed_seconds, 2)},
+        "classes": {"summary": summarize(classes), "queries": classes},
+        "demands": {"summary": summarize(demands), "queries": demands},
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,115 @@
+"""
+Micro-benchmark da serialização de respostas grandes, do corpo recebido do PostgREST
+até os bytes enviados ao cliente.
+
+Modos comparados, para cada tamanho de página:
+- stdlib: json.loads + jsonable_encoder + JSONResponse (caminho anterior das rotas)
+- orjson_default: json.loads + jsonable_encoder + ORJSONResponse (rotas que devolvem dict/list)
+- page_response: json.loads + orjson direto, sem jsonable_encoder, mais o ETag (listagens paginadas)
+- passthrough: bytes do PostgREST, lidos inteiros e repassados sem decodificar, mais o ETag (rotas sem
+  pós-processamento)
+
+Uso (a partir de backend/):
+    python -m benchmarks.serialization --rows 50 200 1000 --seconds 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core.etag import etag_for_bytes
+
+
+def build_payload(rows: int) -> bytes:
+    # formato de uma página de list_classes, com o profissional embutido
+    return json.dumps(
+        [
+            {
+                "id": f"6f1c2f9e-0000-4000-8000-{index:012d}",
+                "professional_id": "0b7e4f3a-1111-4000-8000-000000000001",
+                "activity": "Hidroginástica",
+                "description": "Exercícios de baixo impacto na piscina aquecida, com acompanhamento profissional.",
+                "schedule": "Seg e Qua 9h",
+                "max_students": 20,
+                "location": "Clube Pinheiros",
+                "price": 49.9,
+                "demand_id": None,
+                "created_at": "2025-11-08T22:39:54.123456+00:00",
+                "professionals": {"full_name": "Ana Souza"},
+                "enrollment_count": index % 20,
+            }
+            for index in range(rows)
+        ]
+    ).encode()
+
+
+def stdlib(body: bytes) -> bytes:
+    return JSONResponse(jsonable_encoder(json.loads(body))).body
+
+
+def orjson_default(body: bytes) -> bytes:
+    return ORJSONResponse(jsonable_encoder(json.loads(body))).body
+
+
+def page_response(body: bytes) -> bytes:
+    rendered = orjson.dumps(json.loads(body))
+    etag_for_bytes(rendered)
+    return rendered
+
+
+def passthrough(body: bytes) -> bytes:
+    # o corpo recebido segue sem decodificar; só o hash do ETag é calculado sobre ele
+    etag_for_bytes(body)
+    return body
+
+
+MODES: Dict[str, Callable[[bytes], bytes]] = {
+    "stdlib": stdlib,
+    "orjson_default": orjson_default,
+    "page_response": page_response,
+    "passthrough": passthrough,
+}
+
+
+def measure(function: Callable[[bytes], bytes], body: bytes, seconds: float) -> Dict[str, float]:
+    function(body)
+    iterations = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        function(body)
+        iterations += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "ops_per_second": round(iterations / elapsed, 1),
+        "mb_per_second": round(iterations * len(body) / elapsed / 1_000_000, 1),
+        "us_per_op": round(elapsed / iterations * 1_000_000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    report: List[Dict[str, object]] = []
+    for rows in args.rows:
+        body = build_payload(rows)
+        results = {name: measure(function, body, args.seconds) for name, function in MODES.items()}
+        baseline = results["stdlib"]["ops_per_second"]
+        for result in results.values():
+            result["speedup"] = round(result["ops_per_second"] / baseline, 2)
+        report.append({"rows": rows, "payload_bytes": len(body), "modes": results})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
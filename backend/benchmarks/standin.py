@@ -0,0 +1,916 @@
+"""
+Stand-in local do Supabase para os benchmarks de carga: GoTrue, PostgREST e Storage falsos,
+servidos de um conjunto de dados sintético em memória.
+
+Cobre apenas o que os routers usam: `select` com recursos embutidos (inclusive alias,
+`!hint` e `(count)`), filtros `eq/neq/lt/lte/gt/gte/is/ilike` e `or=(...)` com `and(...)`,
+`order`, `limit`, parâmetros de recurso embutido (`replies.limit`...), objeto único via
+`Accept: application/vnd.pgrst.object+json`, `Prefer: count=exact`, escritas com
+`return=representation` e as funções RPC chamadas pela API. O Storage aceita upload, listagem
+e remoção de objetos, mas guarda só os metadados (o corpo é lido e descartado). Cada chamada é
+contada por serviço e rota, e a latência do upstream é simulada com um atraso configurável.
+
+Endpoints de controle (fora das rotas do Supabase):
+    GET  /__standin/manifest   ids de exemplo e segredo JWT, para montar as requisições
+    GET  /__standin/stats      chamadas recebidas desde o último reset
+    POST /__standin/reset      zera os contadores
+    POST /__standin/faults     simula degradação (latência extra, erros); corpo vazio remove
+
+Uso (a partir de backend/):
+    python -m benchmarks.standin --port 54321 --users 1000 --latency-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import re
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import jwt
+import orjson
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+DEFAULT_JWT_SECRET = "fitsenior-bench-secret"
+OBJECT_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+
+# relações embutíveis: tabela -> nome (ou alias) -> (tabela alvo, coluna local, coluna remota, muitos?)
+RELATIONS: Dict[str, Dict[str, Tuple[str, str, str, bool]]] = {
+    "classes": {
+        "professionals": ("professionals", "professional_id", "id", False),
+        "enrollments": ("enrollments", "id", "class_id", True),
+    },
+    "enrollments": {
+        "classes": ("classes", "class_id", "id", False),
+        "students": ("students", "student_id", "user_id", False),
+    },
+    "forum_posts": {
+        "profiles": ("profiles", "user_id", "id", False),
+        "forum_replies": ("forum_replies", "id", "post_id", True),
+    },
+    "forum_replies": {"profiles": ("profiles", "user_id", "id", False)},
+    "demands": {"profiles": ("profiles", "user_id", "id", False)},
+    "messages": {
+        "sender": ("profiles", "sender_id", "id", False),
+        "recipient": ("profiles", "recipient_id", "id", False),
+    },
+}
+
+ACTIVITIES = ["Hidroginástica", "Yoga", "Pilates", "Caminhada", "Alongamento", "Dança de salão", "Tai chi"]
+SCHEDULES = ["Seg e Qua 9h", "Ter e Qui 8h", "Sex 10h", "Seg a Sex 7h", "Sáb 9h"]
+NEIGHBORHOODS = ["Pinheiros", "Moema", "Tatuapé", "Santana", "Lapa", "Butantã"]
+CONTROL_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def timestamp(moment: datetime) -> str:
+    # sempre com microssegundos: as comparações de created_at são lexicográficas
+    return moment.isoformat(timespec="microseconds")
+
+
+class Dataset:
+    """Tabelas em memória, ordenadas por (created_at, id), com índices de igualdade sob demanda."""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], roles: Dict[str, List[str]]):
+        self.tables = tables
+        self.roles = roles
+        self._indexes: Dict[Tuple[str, str], Dict[Any, List[Dict[str, Any]]]] = {}
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def lookup(self, table: str, column: str, value: Any) -> List[Dict[str, Any]]:
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = self._indexes[(table, column)] = defaultdict(list)
+            for row in self.rows(table):
+                index[row.get(column)].append(row)
+        return index.get(value, [])
+
+    def insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = {"id": str(uuid.uuid4()), "created_at": timestamp(datetime.now(timezone.utc)), **row}
+        self.rows(table).append(row)
+        for (indexed_table, column), index in self._indexes.items():
+            if indexed_table == table:
+                index[row.get(column)].append(row)
+        return row
+
+    def delete(self, table: str, doomed: Sequence[Dict[str, Any]]) -> None:
+        ids = {id(row) for row in doomed}
+        self.tables[table] = [row for row in self.rows(table) if id(row) not in ids]
+        self._drop_indexes(table)
+
+    def touched(self, table: str) -> None:
+        # atualização em colunas indexadas: mais simples reconstruir do que corrigir o índice
+        self._drop_indexes(table)
+
+    def _drop_indexes(self, table: str) -> None:
+        for key in [key for key in self._indexes if key[0] == table]:
+            del self._indexes[key]
+
+
+def build_dataset(users: int, seed: int = 42) -> Dataset:
+    """Usuários (20% profissionais), aulas, inscrições, demandas, fórum e mensagens."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def created(days: float = 365) -> str:
+        return timestamp(now - timedelta(seconds=rng.uniform(60, days * 86_400)))
+
+    tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    roles: Dict[str, List[str]] = {}
+    professional_ids: List[str] = []
+    student_user_ids: List[str] = []
+
+    for index in range(max(users, 5)):
+        user_id = new_id()
+        full_name = f"Usuário {index}"
+        avatar_url = f"https://storage.local/avatars/{user_id}.jpg"
+        tables["profiles"].append(
+            {"id": user_id, "full_name": full_name, "avatar_url": avatar_url, "created_at": created()}
+        )
+        if index % 5 == 0:
+            roles[user_id] = ["professional"]
+            professional_id = new_id()
+            professional_ids.append(professional_id)
+            tables["professionals"].append(
+                {
+                    "id": professional_id,
+                    "user_id": user_id,
+                    "cref": f"CREF-{index:06d}",
+                    "full_name": full_name,
+                    "specialty": "Educação física",
+                    "avatar_url": avatar_url,
+                    "created_at": created(),
+                }
+            )
+        else:
+            roles[user_id] = ["student"]
+            student_user_ids.append(user_id)
+            tables["students"].append(
+                {
+                    "id": new_id(),
+                    "user_id": user_id,
+                    "full_name": full_name,
+                    "avatar_url": avatar_url,
+                    "phone": f"11 9{index:08d}",
+                    "created_at": created(),
+                }
+            )
+
+    for professional_id in professional_ids:
+        for _ in range(4):
+            activity = rng.choice(ACTIVITIES)
+            tables["classes"].append(
+                {
+                    "id": new_id(),
+                    "professional_id": professional_id,
+                    "activity": activity,
+                    "description": f"{activity} para a terceira idade, turmas pequenas e acompanhamento próximo.",
+                    "schedule": rng.choice(SCHEDULES),
+                    "max_students": 20,
+                    "location": f"Clube {rng.choice(NEIGHBORHOODS)}",
+                    "price": float(rng.randrange(40, 160, 5)),
+                    "demand_id": None,
+                    "created_at": created(),
+                }
+            )
+
+    class_ids = [row["id"] for row in tables["classes"]]
+    for student_id in student_user_ids:
+        for class_id in rng.sample(class_ids, min(3, len(class_ids))):
+            tables["enrollments"].append(
+                {"id": new_id(), "class_id": class_id, "student_id": student_id, "status": "active", "created_at": created()}
+            )
+
+    user_ids = [row["id"] for row in tables["profiles"]]
+    for _ in range(users // 2):
+        tables["demands"].append(
+            {
+                "id": new_id(),
+                "user_id": rng.choice(user_ids),
+                "activity": rng.choice(ACTIVITIES),
+                "neighborhood": rng.choice(NEIGHBORHOODS),
+                "schedule": rng.choice(SCHEDULES),
+                "num_interested": rng.randrange(1, 40),
+                "location": f"Praça {rng.choice(NEIGHBORHOODS)}",
+                "created_at": created(),
+            }
+        )
+
+    for index in range(users // 2):
+        post_id = new_id()
+        tables["forum_posts"].append(
+            {
+                "id": post_id,
+                "user_id": rng.choice(user_ids),
+                "title": f"Dúvida {index} sobre {rng.choice(ACTIVITIES).lower()}",
+                "content": "Alguém recomenda um horário mais tranquilo? " * 3,
+                "created_at": created(),
+            }
+        )
+        for _ in range(rng.randrange(0, 10)):
+            tables["forum_replies"].append(
+                {
+                    "id": new_id(),
+                    "post_id": post_id,
+                    "user_id": rng.choice(user_ids),
+                    "content": "Vou às terças e a turma é ótima.",
+                    "created_at": created(),
+                }
+            )
+
+    for _ in range(users * 5):
+        sender_id, recipient_id = rng.sample(user_ids, 2)
+        tables["messages"].append(
+            {
+                "id": new_id(),
+                "sender_id": sender_id,
+                "recipient_id": recipient_id,
+                "content": "Oi! Ainda tem vaga na turma de quinta?",
+                "read": rng.random() < 0.7,
+                "created_at": created(90),
+            }
+        )
+
+    for rows in tables.values():
+        rows.sort(key=lambda row: (row["created_at"], row["id"]))
+    return Dataset(dict(tables), roles)
+
+
+# --- select -------------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Embed:
+    key: str
+    relation: str
+    inner: str
+
+
+def split_top_level(text: str) -> List[str]:
+    """Separa por vírgulas fora de parênteses e aspas."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+@lru_cache(maxsize=256)
+def parse_select(select: str) -> Tuple[Any, ...]:
+    items: List[Any] = []
+    for part in split_top_level(select):
+        if "(" not in part:
+            items.append(part)
+            continue
+        head, inner = part.split("(", 1)
+        alias, _, relation = head.rpartition(":")
+        relation = relation.split("!", 1)[0].strip()
+        items.append(Embed(key=alias.strip() or relation, relation=relation, inner=inner[:-1].strip()))
+    return tuple(items)
+
+
+# --- filtros ------------------------------------------------------------------------------
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def coerce(row_value: Any, raw: str) -> Tuple[Any, Any]:
+    if isinstance(row_value, bool):
+        return row_value, raw.lower() == "true"
+    if isinstance(row_value, (int, float)):
+        try:
+            return row_value, float(raw)
+        except ValueError:
+            return str(row_value), raw
+    return ("" if row_value is None else str(row_value)), raw
+
+
+def compare(op: str, column: str, raw: str) -> Predicate:
+    raw = raw[1:-1] if len(raw) >= 2 and raw[0] == raw[-1] == '"' else raw
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}.get(raw.lower())
+        return lambda row: row.get(column) is expected
+    if op in ("like", "ilike"):
+        pattern = re.compile(re.escape(raw).replace(r"\*", ".*").replace("%", ".*"), re.IGNORECASE if op == "ilike" else 0)
+        return lambda row: bool(pattern.fullmatch(str(row.get(column) or "")))
+    if op == "in":
+        values = {value.strip('"') for value in split_top_level(raw.strip("()"))}
+        return lambda row: str(row.get(column)) in values
+
+    def check(row: Dict[str, Any]) -> bool:
+        value = row.get(column)
+        if value is None:
+            return False
+        left, right = coerce(value, raw)
+        if op == "eq":
+            return left == right
+        if op == "neq":
+            return left != right
+        if op == "lt":
+            return left < right
+        if op == "lte":
+            return left <= right
+        if op == "gt":
+            return left > right
+        if op == "gte":
+            return left >= right
+        raise ValueError(f"operador não suportado: {op}")
+
+    return check
+
+
+def parse_condition(text: str) -> Predicate:
+    """`col.op.valor`, `and(...)` ou `or(...)`, como dentro de `or=(...)`."""
+    for group, combine in (("and(", all), ("or(", any)):
+        if text.startswith(group) and text.endswith(")"):
+            predicates = [parse_condition(part) for part in split_top_level(text[len(group):-1])]
+            return lambda row, predicates=predicates, combine=combine: combine(p(row) for p in predicates)
+    column, op, raw = text.split(".", 2)
+    if op == "not":
+        op, raw = raw.split(".", 1)
+        inner = compare(op, column, raw)
+        return lambda row: not inner(row)
+    return compare(op, column, raw)
+
+
+INDEXED_COLUMNS = ("id", "class_id", "student_id", "post_id", "user_id", "sender_id", "recipient_id")
+
+
+def or_lookups(value: str) -> Optional[List[Tuple[str, str]]]:
+    """(coluna, valor) indexáveis que cobrem todos os ramos de um `or=(...)`, ex.: as duas
+    direções de uma conversa; None quando algum ramo exige percorrer a tabela."""
+    lookups = []
+    for branch in split_top_level(value[1:-1]):
+        conditions = split_top_level(branch[4:-1]) if branch.startswith("and(") else [branch]
+        for condition in conditions:
+            column, _, rest = condition.partition(".")
+            if column in INDEXED_COLUMNS and rest.startswith("eq."):
+                lookups.append((column, rest[3:].strip('"')))
+                break
+        else:
+            return None
+    return lookups
+
+
+def build_filters(params: Iterable[Tuple[str, str]]) -> Tuple[Optional[str], List[Predicate]]:
+    """Predicados e, se houver, a coluna/valor de um `eq` que pode usar índice."""
+    predicates: List[Predicate] = []
+    indexed: Optional[str] = None
+    for name, value in params:
+        if name in ("or", "and"):
+            predicates.append(parse_condition(f"{name}{value}"))
+        elif name in ("not.or", "not.and"):
+            inner = parse_condition(f"{name[4:]}{value}")
+            predicates.append(lambda row, inner=inner: not inner(row))
+        else:
+            if indexed is None and value.startswith("eq.") and name in INDEXED_COLUMNS:
+                indexed = f"{name}={value[3:]}"
+            op, _, raw = value.partition(".")
+            if op == "not":
+                inner = parse_condition(f"{name}.{raw}")
+                predicates.append(lambda row, inner=inner: not inner(row))
+            else:
+                predicates.append(compare(op, name, raw))
+    return indexed, predicates
+
+
+def ordered(rows: List[Dict[str, Any]], order: Optional[str]) -> Iterable[Dict[str, Any]]:
+    if not order:
+        return rows
+    terms = [term.split(".") for term in order.split(",")]
+    columns = [term[0] for term in terms]
+    directions = {"desc" in term[1:] for term in terms}
+    # as tabelas já estão em ordem de (created_at, id): basta percorrer num sentido ou no outro
+    if columns in (["created_at", "id"], ["created_at"]) and len(directions) == 1:
+        return reversed(rows) if directions.pop() else rows
+    result = list(rows)
+    for column, *modifiers in reversed(terms):
+        result.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse="desc" in modifiers)
+    return result
+
+
+# --- aplicação ----------------------------------------------------------------------------
+
+
+@dataclass
+class CallStats:
+    by_service: Counter = field(default_factory=Counter)
+    by_route: Counter = field(default_factory=Counter)
+    started_at: float = field(default_factory=time.monotonic)
+
+    def record(self, service: str, route: str) -> None:
+        self.by_service[service] += 1
+        self.by_route[route] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total": sum(self.by_service.values()),
+            "by_service": dict(self.by_service),
+            "by_route": dict(self.by_route.most_common()),
+            "seconds": round(time.monotonic() - self.started_at, 3),
+        }
+
+
+@dataclass
+class Faults:
+    """Degradação simulada do Supabase, configurada via POST /__standin/faults."""
+
+    # trecho do caminho afetado (ex.: "/rest/v1/classes"); vazio afeta GoTrue, PostgREST e Storage
+    match: str = ""
+    # latência extra em uma fração das chamadas
+    delay_ms: float = 0.0
+    delay_rate: float = 1.0
+    # fração das chamadas que falham com `status`, como o gateway do Supabase (corpo sem `code`)
+    error_rate: float = 0.0
+    status: int = 503
+
+    def applies(self, path: str) -> bool:
+        return path.startswith(("/auth/v1", "/rest/v1", "/storage/v1")) and self.match in path
+
+
+class PostgrestError(Exception):
+    def __init__(self, status_code: int, code: str, message: str, details: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = {"code": code, "message": message, "details": details, "hint": None}
+
+
+def json_response(payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(
+        orjson.dumps(payload), status_code=status_code, headers=headers, media_type="application/json; charset=utf-8"
+    )
+
+
+class SupabaseStandIn:
+    def __init__(self, dataset: Dataset, latency: float = 0.0, jitter: float = 0.0, jwt_secret: str = DEFAULT_JWT_SECRET):
+        self.dataset = dataset
+        self.latency = latency
+        self.jitter = jitter
+        self.jwt_secret = jwt_secret
+        self.stats = CallStats()
+        self.faults = Faults()
+        # (bucket, caminho) -> metadados do objeto
+        self.objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    async def delay(self) -> None:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+    # -- GoTrue --
+
+    async def auth_user(self, request: Request) -> Response:
+        self.stats.record("auth", "GET /auth/v1/user")
+        await self.delay()
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        try:
+            claims = jwt.decode(token, self.jwt_secret, algorithms=["HS256"], audience="authenticated")
+        except jwt.InvalidTokenError as exc:
+            return json_response({"code": 401, "msg": str(exc)}, 401)
+        user = {"id": claims["sub"], "aud": claims["aud"], "role": claims.get("role"), "email": claims.get("email")}
+        # o GoTrue devolve o usuário no topo; `fetch_remote_user` lê a chave `user`
+        return json_response({**user, "user": user})
+
+    async def auth_jwks(self, request: Request) -> Response:
+        self.stats.record("auth", "GET /auth/v1/.well-known/jwks.json")
+        await self.delay()
+        return json_response({"keys": []})
+
+    async def auth_health(self, request: Request) -> Response:
+        self.stats.record("auth", f"{request.method} /auth/v1/health")
+        await self.delay()
+        return json_response({"name": "GoTrue", "description": "stand-in"})
+
+    # -- PostgREST --
+
+    async def rest_root(self, request: Request) -> Response:
+        # a raiz devolve o OpenAPI do schema; o aquecimento das conexões usa só o HEAD
+        self.stats.record("rest", f"{request.method} /rest/v1/")
+        await self.delay()
+        return json_response({"swagger": "2.0", "paths": {}})
+
+    async def rest(self, request: Request) -> Response:
+        table = request.path_params["table"]
+        self.stats.record("rest", f"{request.method} /rest/v1/{table}")
+        await self.delay()
+        try:
+            if request.method == "GET":
+                return self.read(table, request)
+            return await self.write(table, request)
+        except PostgrestError as exc:
+            return json_response(exc.body, exc.status_code)
+
+    def split_params(self, request: Request) -> Tuple[List[Tuple[str, str]], Dict[str, List[Tuple[str, str]]]]:
+        # "replies.limit=10" vai para o recurso embutido "replies"
+        top: List[Tuple[str, str]] = []
+        embedded: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        for name, value in request.query_params.multi_items():
+            head, dot, rest = name.partition(".")
+            if dot and head != "not":
+                embedded[head].append((rest, value))
+            else:
+                top.append((name, value))
+        return top, embedded
+
+    def query(
+        self, table: str, params: List[Tuple[str, str]], candidates: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Linhas filtradas, ordenadas e limitadas, mais o total antes do limite."""
+        control = {name: value for name, value in params if name in CONTROL_PARAMS}
+        indexed, predicates = build_filters([(name, value) for name, value in params if name not in CONTROL_PARAMS])
+        if candidates is None:
+            either = next((value for name, value in params if name == "or"), None)
+            lookups = or_lookups(either) if either and not indexed else None
+            if indexed:
+                column, value = indexed.split("=", 1)
+                candidates = self.dataset.lookup(table, column, value)
+            elif lookups:
+                found = {id(row): row for column, value in lookups for row in self.dataset.lookup(table, column, value)}
+                candidates = sorted(found.values(), key=lambda row: (row["created_at"], row["id"]))
+            else:
+                candidates = self.dataset.rows(table)
+        limit = int(control["limit"]) if "limit" in control else None
+        offset = int(control.get("offset", 0))
+        selected: List[Dict[str, Any]] = []
+        total = 0
+        for row in ordered(candidates, control.get("order")):
+            if all(predicate(row) for predicate in predicates):
+                total += 1
+                if total > offset and (limit is None or len(selected) < limit):
+                    selected.append(row)
+        return selected, total
+
+    def project(
+        self, table: str, row: Dict[str, Any], select: str, embedded: Dict[str, List[Tuple[str, str]]]
+    ) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for item in parse_select(select or "*"):
+            if item == "*":
+                result.update(row)
+            elif isinstance(item, str):
+                result[item] = row.get(item)
+            else:
+                result[item.key] = self.embed(table, row, item, embedded.get(item.key, []))
+        return result
+
+    def embed(self, table: str, row: Dict[str, Any], item: Embed, params: List[Tuple[str, str]]) -> Any:
+        relations = RELATIONS.get(table, {})
+        spec = relations.get(item.key) or relations.get(item.relation)
+        if spec is None:
+            raise PostgrestError(400, "PGRST200", f"Could not find a relationship between '{table}' and '{item.relation}'")
+        target, local, remote, many = spec
+        targets = self.dataset.lookup(target, remote, row.get(local))
+        if item.inner == "count":
+            return [{"count": len(targets)}]
+        if not many:
+            return self.project(target, targets[0], item.inner, {}) if targets else None
+        rows, _ = self.query(target, params, candidates=targets)
+        return [self.project(target, child, item.inner, {}) for child in rows]
+
+    def read(self, table: str, request: Request) -> Response:
+        top, embedded = self.split_params(request)
+        rows, total = self.query(table, top)
+        select = request.query_params.get("select", "*")
+        body = [self.project(table, row, select, embedded) for row in rows]
+        headers = {}
+        if "count=" in request.headers.get("prefer", ""):
+            headers["Content-Range"] = f"0-{len(body) - 1}/{total}" if body else f"*/{total}"
+        return self.respond(request, body, headers=headers)
+
+    def respond(self, request: Request, body: List[Dict[str, Any]], status_code: int = 200, headers=None) -> Response:
+        if OBJECT_MEDIA_TYPE in request.headers.get("accept", ""):
+            if len(body) != 1:
+                raise PostgrestError(
+                    406,
+                    "PGRST116",
+                    "JSON object requested, multiple (or no) rows returned",
+                    f"The result contains {len(body)} rows",
+                )
+            return json_response(body[0], status_code, headers)
+        return json_response(body, status_code, headers)
+
+    async def write(self, table: str, request: Request) -> Response:
+        top, _ = self.split_params(request)
+        select = request.query_params.get("select", "*")
+        if request.method == "POST":
+            payload = orjson.loads(await request.body())
+            rows = [self.dataset.insert(table, row) for row in (payload if isinstance(payload, list) else [payload])]
+            status_code = 201
+        else:
+            rows, _ = self.query(table, top)
+            if request.method == "PATCH":
+                changes = orjson.loads(await request.body())
+                for row in rows:
+                    row.update(changes)
+                self.dataset.touched(table)
+            else:
+                self.dataset.delete(table, rows)
+            status_code = 200
+        if "return=minimal" in request.headers.get("prefer", ""):
+            return Response(status_code=204 if status_code == 200 else status_code)
+        return self.respond(request, [self.project(table, row, select, {}) for row in rows], status_code)
+
+    # -- RPC --
+
+    async def rpc(self, request: Request) -> Response:
+        name = request.path_params["function"]
+        self.stats.record("rpc", f"POST /rest/v1/rpc/{name}")
+        await self.delay()
+        handler = getattr(self, f"rpc_{name}", None)
+        if handler is None:
+            return json_response(
+                {"code": "PGRST202", "message": f"Could not find the function public.{name}", "details": None, "hint": None},
+                404,
+            )
+        args = orjson.loads(await request.body() or b"{}")
+        result = handler(args)
+        select = request.query_params.get("select")
+        if select and isinstance(result, list):
+            result = [self.project("", row, select, {}) for row in result]
+        return json_response(result)
+
+    def rpc_get_identity(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        user_id = args["_user_id"]
+        professional = self.dataset.lookup("professionals", "user_id", user_id)
+        student = self.dataset.lookup("students", "user_id", user_id)
+        profile = self.dataset.lookup("profiles", "id", user_id)
+        return {
+            "roles": self.dataset.roles.get(user_id, []),
+            "professional_id": professional[0]["id"] if professional else None,
+            "student_id": student[0]["id"] if student else None,
+            "profile": profile[0] if profile else None,
+        }
+
+    def rpc_conversation_summaries(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        user_id = args["_user_id"]
+        latest: Dict[str, Dict[str, Any]] = {}
+        unread: Counter = Counter()
+        for message in self.dataset.lookup("messages", "sender_id", user_id) + self.dataset.lookup(
+            "messages", "recipient_id", user_id
+        ):
+            counterpart = message["recipient_id"] if message["sender_id"] == user_id else message["sender_id"]
+            if message["recipient_id"] == user_id and not message["read"]:
+                unread[counterpart] += 1
+            current = latest.get(counterpart)
+            if current is None or (message["created_at"], message["id"]) > (current["created_at"], current["id"]):
+                latest[counterpart] = message
+        rows = [
+            {
+                "id": message["id"],
+                "counterpart_id": counterpart,
+                "content": message["content"],
+                "created_at": message["created_at"],
+                "unread_count": unread[counterpart],
+            }
+            for counterpart, message in latest.items()
+        ]
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        if args.get("_before_created_at"):
+            cursor = (args["_before_created_at"], args["_before_id"])
+            rows = [row for row in rows if (row["created_at"], row["id"]) < cursor]
+        return rows[: args.get("_limit", 50)]
+
+    def search(self, table: str, columns: Sequence[str], args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        terms = (args.get("_query") or "").lower().split()
+        results = []
+        for row in self.dataset.rows(table):
+            text = " ".join(str(row.get(column) or "") for column in columns).lower()
+            hits = sum(text.count(term) for term in terms)
+            if terms and not hits:
+                continue
+            results.append({**row, "score": round(hits / (1 + len(text) / 100), 6)})
+        results.sort(key=lambda row: (row["score"], row["id"]), reverse=True)
+        if args.get("_after_score") is not None:
+            cursor = (args["_after_score"], args["_after_id"])
+            results = [row for row in results if (row["score"], row["id"]) < cursor]
+        return results[: args.get("_limit", 50)]
+
+    def rpc_search_classes(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.search("classes", ("activity", "description", "location"), args)
+
+    def rpc_search_demands(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.search("demands", ("activity", "neighborhood", "location"), args)
+
+    def rpc_enroll_student(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        enrolled = self.dataset.lookup("enrollments", "class_id", args["_class_id"])
+        if any(row["student_id"] == args["_student_id"] for row in enrolled):
+            return {"status": "already_enrolled"}
+        enrollment = self.dataset.insert(
+            "enrollments", {"class_id": args["_class_id"], "student_id": args["_student_id"], "status": "active"}
+        )
+        return {"status": "enrolled", "enrollment": enrollment}
+
+    def owned_class(self, args: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str]:
+        found = self.dataset.lookup("classes", "id", args["_class_id"])
+        if not found:
+            return None, "class_not_found"
+        owners = self.dataset.lookup("professionals", "id", found[0]["professional_id"])
+        if not owners or owners[0]["user_id"] != args["_user_id"]:
+            return None, "forbidden"
+        return found[0], "ok"
+
+    def rpc_update_own_class(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        allowed = {"activity", "description", "schedule", "max_students", "location", "price", "demand_id"}
+        unknown = sorted(set(args["_changes"]) - allowed)
+        if unknown:
+            return {"status": "invalid_columns", "columns": unknown}
+        row, outcome = self.owned_class(args)
+        if row is None:
+            return {"status": outcome}
+        row.update(args["_changes"])
+        self.dataset.touched("classes")
+        return {"status": "updated", "class": row}
+
+    def rpc_delete_own_class(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        row, outcome = self.owned_class(args)
+        if row is None:
+            return {"status": outcome}
+        self.dataset.delete("classes", [row])
+        return {"status": "deleted"}
+
+    def rpc_mark_conversation_read(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        ids = []
+        for message in self.dataset.lookup("messages", "recipient_id", args["_user_id"]):
+            if message["sender_id"] == args["_counterpart_id"] and not message["read"]:
+                message["read"] = True
+                ids.append(message["id"])
+        return {"status": "ok", "ids": ids}
+
+    def rpc_professional_dashboard(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        classes = self.dataset.lookup("classes", "professional_id", args["_professional_id"])
+        summaries = []
+        for row in classes:
+            enrolled = len(self.dataset.lookup("enrollments", "class_id", row["id"]))
+            summaries.append(
+                {
+                    "class_id": row["id"],
+                    "activity": row["activity"],
+                    "enrolled": enrolled,
+                    "occupancy_rate": round(enrolled / row["max_students"], 3),
+                    "attendance_rate": 0.8,
+                }
+            )
+        return {
+            "revenue_by_month": [],
+            "pending_payments": {"count": 0, "amount": 0, "oldest": []},
+            "classes": summaries,
+            "totals": {"classes": len(summaries), "students": sum(row["enrolled"] for row in summaries)},
+        }
+
+    # -- Storage --
+
+    async def storage_status(self, request: Request) -> Response:
+        self.stats.record("storage", f"{request.method} /storage/v1/status")
+        await self.delay()
+        return Response(status_code=200)
+
+    async def storage_upload(self, request: Request) -> Response:
+        bucket, path = request.path_params["bucket"], request.path_params["path"]
+        self.stats.record("storage", f"POST /storage/v1/object/{bucket}")
+        await self.delay()
+        if (bucket, path) in self.objects and request.headers.get("x-upsert") != "true":
+            return json_response({"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"}, 409)
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        self.objects[(bucket, path)] = {
+            "size": size,
+            "content_type": request.headers.get("content-type"),
+            "cache_control": request.headers.get("cache-control"),
+            "updated_at": timestamp(datetime.now(timezone.utc)),
+        }
+        return json_response({"Key": f"{bucket}/{path}", "Id": str(uuid.uuid4())})
+
+    async def storage_list(self, request: Request) -> Response:
+        bucket = request.path_params["bucket"]
+        self.stats.record("storage", f"POST /storage/v1/object/list/{bucket}")
+        await self.delay()
+        folder = orjson.loads(await request.body()).get("prefix", "").strip("/") + "/"
+        names = [path[len(folder) :] for stored, path in self.objects if stored == bucket and path.startswith(folder)]
+        return json_response([{"name": name, "id": None} for name in sorted(names) if "/" not in name])
+
+    async def storage_delete(self, request: Request) -> Response:
+        bucket = request.path_params["bucket"]
+        self.stats.record("storage", f"DELETE /storage/v1/object/{bucket}")
+        await self.delay()
+        removed = [path for path in orjson.loads(await request.body())["prefixes"] if self.objects.pop((bucket, path), None)]
+        return json_response([{"name": path, "bucket_id": bucket} for path in removed])
+
+    # -- controle --
+
+    async def manifest(self, request: Request) -> Response:
+        tables = self.dataset.tables
+        sample = int(request.query_params.get("sample", 200))
+        professionals = {row["user_id"] for row in tables["professionals"]}
+        users = [row["id"] for row in tables["profiles"]]
+        return json_response(
+            {
+                "jwt_secret": self.jwt_secret,
+                "rows": {table: len(rows) for table, rows in tables.items()},
+                "students": [user for user in users if user not in professionals][:sample],
+                "professionals": [user for user in users if user in professionals][:sample],
+                "classes": [row["id"] for row in tables["classes"][-sample:]],
+                "demands": [row["id"] for row in tables["demands"][-sample:]],
+                "posts": [row["id"] for row in tables["forum_posts"][-sample:]],
+            }
+        )
+
+    async def stats_view(self, request: Request) -> Response:
+        return json_response(self.stats.snapshot())
+
+    async def reset(self, request: Request) -> Response:
+        self.stats = CallStats()
+        return Response(status_code=204)
+
+    async def set_faults(self, request: Request) -> Response:
+        # corpo vazio remove as falhas
+        self.faults = Faults(**orjson.loads(await request.body() or b"{}"))
+        return Response(status_code=204)
+
+    def asgi(self) -> Callable:
+        app = self.routes()
+
+        async def faulty(scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+            faults = self.faults
+            if scope["type"] == "http" and faults.applies(scope["path"]):
+                if faults.delay_ms and random.random() < faults.delay_rate:
+                    await asyncio.sleep(faults.delay_ms / 1000)
+                if random.random() < faults.error_rate:
+                    self.stats.record("fault", f"{scope['method']} {scope['path']} -> {faults.status}")
+                    response = json_response({"message": "upstream indisponível (falha simulada)"}, faults.status)
+                    await response(scope, receive, send)
+                    return
+            await app(scope, receive, send)
+
+        return faulty
+
+    def routes(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/auth/v1/user", self.auth_user, methods=["GET"]),
+                Route("/auth/v1/.well-known/jwks.json", self.auth_jwks, methods=["GET"]),
+                Route("/auth/v1/health", self.auth_health, methods=["GET"]),
+                Route("/rest/v1/", self.rest_root, methods=["GET"]),
+                Route("/rest/v1/rpc/{function}", self.rpc, methods=["POST"]),
+                Route("/rest/v1/{table}", self.rest, methods=["GET", "POST", "PATCH", "DELETE"]),
+                Route("/storage/v1/status", self.storage_status, methods=["GET"]),
+                # a listagem antes do upload: "list/<bucket>" também casaria com "<bucket>/<caminho>"
+                Route("/storage/v1/object/list/{bucket}", self.storage_list, methods=["POST"]),
+                Route("/storage/v1/object/{bucket}", self.storage_delete, methods=["DELETE"]),
+                Route("/storage/v1/object/{bucket}/{path:path}", self.storage_upload, methods=["POST"]),
+                Route("/__standin/manifest", self.manifest, methods=["GET"]),
+                Route("/__standin/stats", self.stats_view, methods=["GET"]),
+                Route("/__standin/reset", self.reset, methods=["POST"]),
+                Route("/__standin/faults", self.set_faults, methods=["POST"]),
+            ]
+        )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--users", type=int, default=1_000, help="Tamanho do conjunto de dados (usuários)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Latência fixa de cada chamada")
+    parser.add_argument("--jitter-ms", type=float, default=1.0, help="Latência extra aleatória (uniforme)")
+    parser.add_argument("--jwt-secret", default=DEFAULT_JWT_SECRET)
+    args = parser.parse_args()
+
+    standin = SupabaseStandIn(
+        build_dataset(args.users, args.seed),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        jwt_secret=args.jwt_secret,
+    )
+    uvicorn.run(standin.asgi(), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Tempo de inicialização e latência das primeiras requisições, por modo de execução.
+
+Mede, num processo novo a cada vez:
+- o import de app.main (o custo que cada worker paga sem preload);
+- o tempo do spawn até o primeiro /health com 200;
+- a primeira requisição autenticada (GET /api/classes) e a mediana das seguintes;
+- a memória (PSS somado do mestre e dos workers, só Linux);
+- o tempo de desligamento com um stream SSE aberto (SIGTERM até o processo sair).
+
+Modos: `uvicorn` (um processo, como o docker-compose sem --reload), `serve` (python -m
+app.serve com --workers e preload) e `serve-no-preload`. Cada modo roda com e sem o
+aquecimento das conexões no startup (SERVE_WARMUP). O Supabase é o stand-in local
+(benchmarks/standin.py), num subprocesso ou em --standin-url.
+
+Uso (a partir de backend/):
+    python -m benchmarks.startup --workers 2 --runs 3 --output startup.json
+    python -m benchmarks.startup --modes serve --latency-ms 20 --env HTTP_POOL_HTTP2=false
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.load import BACKEND_DIR, free_port, git_revision, mint_token, percentile, standin_server
+
+MODES = ("uvicorn", "serve", "serve-no-preload")
+
+
+def command(mode: str, port: int) -> List[str]:
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)]
+    # o modo serve lê a porta e os workers do ambiente (BACKEND_PORT, WEB_CONCURRENCY)
+    return [sys.executable, "-m", "app.serve"]
+
+
+def import_seconds(env: Dict[str, str], runs: int) -> List[float]:
+    code = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def process_tree(pid: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for stat_path in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # o nome do processo vem entre parênteses e pode conter espaços: o ppid vem depois
+            fields = stat_path.read_text().rpartition(")")[2].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(stat_path.parent.name))
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        pending += children.get(current, [])
+    return pids
+
+
+def pss_megabytes(pid: int) -> Optional[float]:
+    # PSS reparte as páginas compartilhadas (copy-on-write do preload) entre os processos
+    total_kb = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/smaps_rollup") as handle:
+                for line in handle:
+                    if line.startswith("Pss:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise SystemExit(f"o servidor terminou durante o startup (código {process.returncode})")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.01)
+    raise SystemExit("o servidor não ficou pronto a tempo")
+
+
+async def timed_get(client: httpx.AsyncClient, path: str, token: str) -> float:
+    started = time.perf_counter()
+    response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+    await response.aread()
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def shutdown_with_stream(
+    base_url: str, process: subprocess.Popen, token: str, timeout: float
+) -> Dict[str, Any]:
+    """Abre um stream SSE, envia SIGTERM ao processo raiz e mede até ele sair (ou até o timeout)."""
+    closed_with = None
+
+    async def drain(response: httpx.Response, lines: Any) -> None:
+        nonlocal closed_with
+        try:
+            async for line in lines:
+                if line.startswith("event:"):
+                    closed_with = line.partition(":")[2].strip()
+        except httpx.HTTPError:
+            pass
+        await asyncio.get_running_loop().run_in_executor(None, process.wait)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(timeout, read=None)) as client:
+        ticket = await client.post("/api/realtime/ticket", headers={"Authorization": f"Bearer {token}"})
+        ticket.raise_for_status()
+        async with client.stream("GET", "/api/realtime/stream", params={"ticket": ticket.json()["ticket"]}) as response:
+            lines = response.aiter_lines()
+            await lines.__anext__()  # "retry: ...": a inscrição já existe
+            started = time.perf_counter()
+            process.send_signal(signal.SIGTERM)
+            try:
+                await asyncio.wait_for(drain(response, lines), timeout)
+            except asyncio.TimeoutError:
+                # sem drenagem o stream segura o processo até alguém mandar SIGKILL
+                return {"shutdown_seconds": None, "stream_closed_with": f"timeout de {timeout:.0f}s"}
+    return {"shutdown_seconds": round(time.perf_counter() - started, 3), "stream_closed_with": closed_with}
+
+
+async def run_once(
+    args: argparse.Namespace, mode: str, warmup: bool, env: Dict[str, str], tokens: List[str]
+) -> Dict[str, Any]:
+    port = free_port()
+    env = {
+        **env,
+        "BACKEND_PORT": str(port),
+        "SERVE_HOST": "127.0.0.1",
+        "WEB_CONCURRENCY": str(args.workers),
+        "SERVE_PRELOAD": str(mode != "serve-no-preload").lower(),
+        "SERVE_WARMUP": str(warmup).lower(),
+        # só mede a subida: caches divergentes entre workers não afetam o resultado
+        "SERVE_REQUIRE_SHARED_INVALIDATION": "false",
+    }
+    output = None if args.verbose else subprocess.DEVNULL
+    process = subprocess.Popen(command(mode, port), cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(args.timeout)) as client:
+            ready = await wait_ready(client, process, args.timeout)
+            first = await timed_get(client, "/api/classes", tokens[0])
+            warm = [await timed_get(client, "/api/classes", tokens[i % len(tokens)]) for i in range(args.requests)]
+        memory = pss_megabytes(process.pid)
+        shutdown = await shutdown_with_stream(base_url, process, tokens[0], args.shutdown_timeout)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    return {
+        "ready_seconds": round(ready, 3),
+        "first_request_ms": round(first, 2),
+        "warm_p50_ms": round(statistics.median(warm), 2),
+        "warm_p95_ms": round(percentile(warm, 0.95), 2),
+        "pss_mb": memory,
+        **shutdown,
+    }
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {}
+    for key, value in runs[0].items():
+        if isinstance(value, (int, float)) and all(run.get(key) is not None for run in runs):
+            summary[key] = round(statistics.median(run[key] for run in runs), 3)
+        else:
+            summary[key] = value
+    return summary
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--workers", type=int, default=2, help="WEB_CONCURRENCY dos modos serve")
+    parser.add_argument("--runs", type=int, default=3, help="Execuções por combinação (usa a mediana)")
+    parser.add_argument("--import-runs", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=30, help="Requisições quentes após a primeira")
+    parser.add_argument("--users", type=int, default=1_000, help="Tamanho do conjunto de dados do stand-in")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--jitter-ms", type=float, default=1.0)
+    parser.add_argument("--standin-url", help="Usa um stand-in já em execução")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--shutdown-timeout", type=float, default=15.0, help="Espera máxima após o SIGTERM")
+    parser.add_argument("--env", action="append", default=[], metavar="NOME=VALOR", help="Ambiente extra da API")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os logs dos servidores")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    async with standin_server(args) as standin_url:
+        async with httpx.AsyncClient(base_url=standin_url) as control:
+            manifest = (await control.get("/__standin/manifest")).json()
+        tokens = [mint_token(user_id, manifest["jwt_secret"]) for user_id in manifest["students"][:10]]
+        env = {
+            **os.environ,
+            "SUPABASE_URL": standin_url,
+            "SUPABASE_ANON_KEY": "bench",
+            "SUPABASE_SERVICE_KEY": "bench",
+            "SUPABASE_JWT_SECRET": manifest["jwt_secret"],
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        for item in args.env:
+            name, _, value = item.partition("=")
+            env[name] = value
+
+        imports = import_seconds(env, args.import_runs)
+        print(f"import app.main: mediana {statistics.median(imports) * 1000:.0f} ms ({args.import_runs} execuções)")
+
+        results = []
+        for mode in args.modes:
+            for warmup in (False, True):
+                runs = [await run_once(args, mode, warmup, env, tokens) for _ in range(args.runs)]
+                result = {"mode": mode, "warmup": warmup, **summarize(runs), "runs": runs}
+                results.append(result)
+                print(
+                    f"{mode:<17} warmup={'on ' if warmup else 'off'} pronto {result['ready_seconds']:.2f}s"
+                    f"  1ª req {result['first_request_ms']:7.1f} ms  quente p50 {result['warm_p50_ms']:6.1f} ms"
+                    f"  PSS {result['pss_mb']} MB  shutdown {result['shutdown_seconds'] or '-'}s"
+                    f" ({result['stream_closed_with'] or 'stream sem aviso'})"
+                )
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "parameters": {
+                key: value for key, value in vars(args).items() if key not in {"output", "verbose"}
+            },
+        },
+        "import_seconds": {"median": round(statistics.median(imports), 3), "samples": imports},
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,271 @@
+"""
+Memória e responsividade da API sob uploads simultâneos (PUT /api/me/avatar e
+/api/me/health-certificate) contra o Storage do stand-in.
+
+Para cada tipo de upload e nível de simultaneidade mede:
+- a memória do processo da API e dos processos do pool de imagens (PSS, amostrado durante a
+  carga): ociosa, pico e o acréscimo por upload simultâneo, comparado ao tamanho do arquivo
+  (guardar o corpo inteiro custaria pelo menos 1× o arquivo por upload em andamento);
+- latência e vazão dos uploads;
+- a latência de GET /health em paralelo, que mostra se o event loop ficou bloqueado (a
+  miniatura é gerada num pool de processos, fora do loop).
+
+A API roda num subprocesso uvicorn (um worker); os arquivos são gerados uma vez e enviados em
+streaming pelo cliente, que fica fora da medição.
+
+Uso (a partir de backend/):
+    python -m benchmarks.uploads --levels 1 8 32 --rounds 3 --output uploads.json
+    python -m benchmarks.uploads --kinds avatar --avatar-size 4000x3000 --env UPLOAD_IMAGE_WORKERS=2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.load import BACKEND_DIR, free_port, git_revision, mint_token, percentile, standin_server
+from benchmarks.startup import process_tree, wait_ready
+
+KINDS = {
+    "avatar": ("/api/me/avatar", "avatar.jpg", "image/jpeg"),
+    "certificate": ("/api/me/health-certificate", "certificate.pdf", "application/pdf"),
+}
+
+
+def build_files(directory: Path, args: argparse.Namespace) -> Dict[str, Path]:
+    from PIL import Image
+
+    width, height = (int(side) for side in args.avatar_size.split("x"))
+    avatar = directory / "avatar.jpg"
+    # ruído comprime mal: o JPEG fica perto do limite de 5 MB com poucos megapixels
+    Image.effect_noise((width, height), 40).convert("RGB").save(avatar, quality=args.avatar_quality)
+    certificate = directory / "certificate.pdf"
+    with open(certificate, "wb") as handle:
+        handle.write(b"%PDF-1.4\n")
+        handle.write(os.urandom(int(args.certificate_mb * 1024 * 1024) - 9))
+    return {"avatar": avatar, "certificate": certificate}
+
+
+def pss_by_process(pid: int) -> Dict[int, float]:
+    sizes = {}
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/smaps_rollup") as handle:
+                for line in handle:
+                    if line.startswith("Pss:"):
+                        sizes[member] = int(line.split()[1]) / 1024
+                        break
+        except OSError:
+            continue
+    return sizes
+
+
+class MemorySampler:
+    """Amostra o PSS da API (processo principal e filhos) até ser parado."""
+
+    def __init__(self, pid: int, interval: float):
+        self.pid = pid
+        self.interval = interval
+        self.main: List[float] = []
+        self.total: List[float] = []
+
+    async def run(self, stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            sizes = await loop.run_in_executor(None, pss_by_process, self.pid)
+            self.main.append(sizes.get(self.pid, 0.0))
+            self.total.append(sum(sizes.values()))
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    pid: int,
+    kind: str,
+    path: Path,
+    concurrency: int,
+    tokens: List[str],
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    route, filename, content_type = KINDS[kind]
+    idle = pss_by_process(pid)
+    stop = asyncio.Event()
+    sampler = MemorySampler(pid, args.sample_interval)
+    sampling = asyncio.create_task(sampler.run(stop))
+    probing = asyncio.create_task(probe_health(client, stop, args.sample_interval))
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def worker(index: int) -> None:
+        # um usuário por cliente: a cota de requisições simultâneas é por usuário
+        headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            try:
+                with open(path, "rb") as handle:
+                    response = await client.put(
+                        route, headers=headers, files={"file": (filename, handle, content_type)}
+                    )
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampling
+    health = await probing
+
+    size_mb = path.stat().st_size / (1024 * 1024)
+    idle_total = sum(idle.values())
+    peak_total = max(sampler.total, default=idle_total)
+    growth = max(0.0, max(sampler.main, default=0.0) - idle.get(pid, 0.0)) / concurrency
+    return {
+        "kind": kind,
+        "concurrency": concurrency,
+        "uploads": len(latencies),
+        "file_mb": round(size_mb, 2),
+        "status": statuses,
+        "seconds": round(elapsed, 2),
+        "throughput_mb_s": round(len(latencies) * size_mb / elapsed, 1),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+        },
+        "memory_mb": {
+            "idle_main": round(idle.get(pid, 0.0), 1),
+            "peak_main": round(max(sampler.main, default=0.0), 1),
+            "idle_total": round(idle_total, 1),
+            "peak_total": round(peak_total, 1),
+            # acréscimo do processo da API por upload em andamento, em MB e em múltiplos do arquivo
+            "main_growth_per_upload": round(growth, 2),
+            "main_growth_per_upload_vs_file": round(growth / size_mb, 3),
+        },
+        "health_ms": {
+            "p50": round(statistics.median(health), 1) if health else None,
+            "p99": round(percentile(health, 0.99), 1) if health else None,
+            "max": round(max(health), 1) if health else None,
+        },
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kinds", nargs="+", choices=list(KINDS), default=list(KINDS))
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 8, 32], help="Uploads simultâneos")
+    parser.add_argument("--rounds", type=int, default=3, help="Uploads por cliente em cada nível")
+    parser.add_argument("--avatar-size", default="1600x1200", help="Dimensões do JPEG de teste")
+    parser.add_argument("--avatar-quality", type=int, default=90)
+    parser.add_argument("--certificate-mb", type=float, default=8.0)
+    parser.add_argument("--sample-interval", type=float, default=0.02, help="Segundos entre amostras de memória")
+    parser.add_argument("--users", type=int, default=1_000, help="Tamanho do conjunto de dados do stand-in")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--jitter-ms", type=float, default=1.0)
+    parser.add_argument("--standin-url", help="Usa um stand-in já em execução")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--env", action="append", default=[], metavar="NOME=VALOR", help="Ambiente extra da API")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os logs da API")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="fitsenior-uploads-") as directory:
+        files = build_files(Path(directory), args)
+        for kind in args.kinds:
+            print(f"{kind}: arquivo de {files[kind].stat().st_size / (1024 * 1024):.2f} MB")
+
+        async with standin_server(args) as standin_url:
+            async with httpx.AsyncClient(base_url=standin_url) as control:
+                manifest = (await control.get("/__standin/manifest")).json()
+            tokens = [mint_token(user_id, manifest["jwt_secret"]) for user_id in manifest["students"][: max(args.levels)]]
+            port = free_port()
+            env = {
+                **os.environ,
+                "SUPABASE_URL": standin_url,
+                "SUPABASE_ANON_KEY": "bench",
+                "SUPABASE_SERVICE_KEY": "bench",
+                "SUPABASE_JWT_SECRET": manifest["jwt_secret"],
+                "RATE_LIMIT_ENABLED": "false",
+            }
+            for item in args.env:
+                name, _, value = item.partition("=")
+                env[name] = value
+            output = None if args.verbose else subprocess.DEVNULL
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--no-access-log"],
+                cwd=BACKEND_DIR,
+                env=env,
+                stdout=output,
+                stderr=output,
+            )
+            try:
+                limits = httpx.Limits(max_connections=max(args.levels) + 1)
+                async with httpx.AsyncClient(
+                    base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=httpx.Timeout(args.timeout)
+                ) as client:
+                    await wait_ready(client, process, args.timeout)
+                    for kind in args.kinds:
+                        for concurrency in args.levels:
+                            result = await run_level(
+                                client, process.pid, kind, files[kind], concurrency, tokens, args
+                            )
+                            results.append(result)
+                            memory, health = result["memory_mb"], result["health_ms"]
+                            print(
+                                f"{kind:<12}x{concurrency:<4}{result['uploads']:>4} uploads  {result['status']}"
+                                f"  p50 {result['latency_ms']['p50']:>7.1f} ms  {result['throughput_mb_s']:>6.1f} MB/s"
+                                f"  API {memory['idle_main']:.0f}→{memory['peak_main']:.0f} MB"
+                                f" (+{memory['main_growth_per_upload']:.2f} MB/upload,"
+                                f" {memory['main_growth_per_upload_vs_file']:.2f}× o arquivo)"
+                                f"  com pool {memory['idle_total']:.0f}→{memory['peak_total']:.0f} MB"
+                                f"  /health p99 {health['p99']} ms"
+                            )
+            finally:
+                process.terminate()
+                process.wait()
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "parameters": {key: value for key, value in vars(args).items() if key not in {"output", "verbose"}},
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,80 @@
+"""
+Testes da API contra o stand-in local do Supabase (benchmarks/standin.py), que sobe num
+subprocesso uma vez por sessão; a aplicação roda no próprio processo, com o lifespan.
+
+Uso (a partir de backend/):
+    pip install -r tests/requirements.txt
+    python -m pytest tests
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterator
+
+import httpx
+import pytest
+
+from benchmarks.load import BACKEND_DIR, free_port, mint_token
+from benchmarks.standin import DEFAULT_JWT_SECRET
+
+STANDIN_PORT = free_port()
+
+# a configuração é lida na importação da aplicação: o ambiente vem antes de qualquer import de app
+os.environ.update(
+    {
+        "SUPABASE_URL": f"http://127.0.0.1:{STANDIN_PORT}",
+        "SUPABASE_ANON_KEY": "bench",
+        "SUPABASE_SERVICE_KEY": "bench",
+        "SUPABASE_JWT_SECRET": DEFAULT_JWT_SECRET,
+        "RATE_LIMIT_ENABLED": "false",
+    }
+)
+
+
+@pytest.fixture(scope="session")
+def standin() -> Iterator[httpx.Client]:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.standin", "--port", str(STANDIN_PORT), "--users", "200", "--latency-ms", "0"],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        with httpx.Client(base_url=os.environ["SUPABASE_URL"]) as client:
+            for _ in range(300):
+                if process.poll() is not None:
+                    pytest.fail("o stand-in do Supabase terminou antes de ficar pronto")
+                try:
+                    client.get("/__standin/stats").raise_for_status()
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            else:
+                pytest.fail("o stand-in do Supabase não respondeu a tempo")
+            yield client
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture(scope="session")
+def manifest(standin: httpx.Client) -> Dict[str, Any]:
+    return standin.get("/__standin/manifest").json()
+
+
+@pytest.fixture(scope="session")
+def api(standin: httpx.Client):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app, base_url="http://api.local") as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def auth():
+    def headers(user_id: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {mint_token(user_id, DEFAULT_JWT_SECRET)}"}
+
+    return headers
@@ -0,0 +1,16 @@
+import uuid
+
+from app.core.security import token_verifier
+
+
+def test_tokens_confirmed_by_gotrue_are_cached(api, standin, auth, monkeypatch):
+    # HS256 sem segredo configurado: a primeira requisição confere o token em /auth/v1/user
+    monkeypatch.setattr(token_verifier, "secret", None)
+    user_id = str(uuid.uuid4())
+    standin.post("/rest/v1/profiles", json={"id": user_id, "full_name": "Novo usuário"})
+    headers = auth(user_id)
+
+    standin.post("/__standin/reset")
+    for _ in range(3):
+        assert api.get("/api/me", headers=headers).status_code == 200
+    assert standin.get("/__standin/stats").json()["by_route"].get("GET /auth/v1/user") == 1
@@ -0,0 +1,60 @@
+import asyncio
+
+from app.core.cache import MemoryBackend, ResponseCache
+from app.core.metrics import registry
+from app.core.pubsub import MemoryBroker
+
+
+def test_invalidations_reach_the_other_workers():
+    async def scenario():
+        # dois workers com cache em memória, ligados pelo mesmo broker
+        peers = MemoryBroker(max_queue=10)
+        workers = [ResponseCache(MemoryBackend(max_size=10, ttl=60), ttl=60, peers=peers) for _ in range(2)]
+        watchers = [asyncio.create_task(cache.watch_peers()) for cache in workers]
+        await asyncio.sleep(0)
+
+        version = {"value": 1}
+
+        async def fetch():
+            return version["value"]
+
+        for cache in workers:
+            assert await cache.get_or_fetch("classes", "list", fetch) == 1
+            assert await cache.get_or_fetch("profile", "user", fetch) == 1
+
+        version["value"] = 2
+        await workers[0].invalidate("classes")
+        await workers[0].discard("profile", "user")
+        # o aviso passa pela fila da inscrição de cada worker
+        await asyncio.sleep(0.05)
+
+        try:
+            for cache in workers:
+                assert await cache.get_or_fetch("classes", "list", fetch) == 2
+                assert await cache.get_or_fetch("profile", "user", fetch) == 2
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_cache_events_are_exported_as_counters():
+    def sample(event):
+        return registry.get_sample_value("fitsenior_cache_events_total", {"namespace": "metrics", "event": event}) or 0
+
+    async def scenario():
+        cache = ResponseCache(MemoryBackend(max_size=10, ttl=60), ttl=60)
+
+        async def fetch():
+            return 1
+
+        for _ in range(3):
+            await cache.get_or_fetch("metrics", "key", fetch)
+        await cache.invalidate("metrics")
+        return cache.snapshot()["metrics"]
+
+    before = {event: sample(event) for event in ("hits", "misses", "invalidations")}
+    stats = asyncio.run(scenario())
+    for event, value in before.items():
+        assert sample(event) - value == stats[event]
@@ -0,0 +1,32 @@
+DEMAND = {"activity": "Hidroginástica", "neighborhood": "Moema", "schedule": "Seg 9h", "location": "Clube"}
+
+
+def test_bulk_accepts_the_same_columns_as_single_insert(api, manifest, auth):
+    headers = auth(manifest["students"][0])
+    items = [
+        DEMAND,
+        {**DEMAND, "num_interested": 3},
+        {**DEMAND, "location": ""},
+        {**DEMAND, "profiles": {"full_name": "Ana"}},
+    ]
+    response = api.post("/api/demands/bulk", json=items, headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status"] for result in results] == ["created", "created", "invalid", "invalid"]
+    assert results[1]["data"]["num_interested"] == 3
+
+
+
+def test_server_owned_columns_are_ignored(api, manifest, auth):
+    user_id = manifest["students"][0]
+    headers = auth(user_id)
+    forged = {"id": "00000000-0000-0000-0000-000000000001", "created_at": "2000-01-01T00:00:00Z", "user_id": "outro"}
+
+    single = api.post("/api/demands", json={**DEMAND, **forged}, headers=headers)
+    assert single.status_code == 201
+    bulk = api.post("/api/demands/bulk", json=[{**DEMAND, **forged}], headers=headers).json()
+    assert bulk[0]["status"] == "created"
+    for row in (single.json(), bulk[0]["data"]):
+        assert row["id"] != forged["id"]
+        assert not row["created_at"].startswith("2000")
+        assert row["user_id"] == user_id
@@ -0,0 +1,69 @@
+import uuid
+
+CLASS = {"activity": "Pilates", "schedule": "Ter 8h", "location": "Parque", "max_students": 10}
+
+
+def new_user(standin) -> str:
+    user_id = str(uuid.uuid4())
+    assert standin.post("/rest/v1/profiles", json={"id": user_id, "full_name": "Novo usuário"}).status_code == 201
+    return user_id
+
+
+def test_new_professional_is_not_denied_by_a_cached_snapshot(api, standin, auth):
+    user_id = new_user(standin)
+    headers = auth(user_id)
+    # sem papel: nega, mas o resultado não fica em cache
+    assert api.get("/api/dashboard", headers=headers).status_code == 403
+
+    standin.post("/rest/v1/professionals", json={"user_id": user_id, "full_name": "Novo usuário"})
+    assert api.get("/api/dashboard", headers=headers).status_code == 200
+
+
+def test_student_who_becomes_professional_reaches_the_dashboard(api, standin, auth):
+    user_id = new_user(standin)
+    headers = auth(user_id)
+    standin.post("/rest/v1/students", json={"user_id": user_id, "full_name": "Novo usuário"})
+    assert api.get("/api/me", headers=headers).status_code == 200
+
+    # o snapshot em cache ainda diz "só aluno"; a negação é conferida no banco
+    standin.post("/rest/v1/professionals", json={"user_id": user_id, "full_name": "Novo usuário"})
+    assert api.get("/api/dashboard", headers=headers).status_code == 200
+
+
+def professional(standin, auth):
+    user_id = new_user(standin)
+    standin.post("/rest/v1/professionals", json={"user_id": user_id, "full_name": "Novo usuário"})
+    return auth(user_id)
+
+
+def test_class_writes_check_ownership_in_a_single_call(api, standin, auth):
+    owner, other = professional(standin, auth), professional(standin, auth)
+    created = api.post("/api/classes", json=CLASS, headers=owner)
+    assert created.status_code == 201
+    class_id = created.json()["id"]
+    # aquece o snapshot de identidade para contar só a escrita
+    assert api.get("/api/dashboard", headers=owner).status_code == 200
+
+    standin.post("/__standin/reset")
+    updated = api.put(f"/api/classes/{class_id}", json={"price": 30}, headers=owner)
+    assert updated.status_code == 200
+    assert float(updated.json()["price"]) == 30
+    assert standin.get("/__standin/stats").json()["by_route"] == {"POST /rest/v1/rpc/update_own_class": 1}
+
+    assert api.put(f"/api/classes/{class_id}", json={"price": 1}, headers=other).status_code == 403
+    assert api.delete(f"/api/classes/{class_id}", headers=other).status_code == 403
+    assert api.put(f"/api/classes/{uuid.uuid4()}", json={"price": 1}, headers=owner).status_code == 404
+    assert api.delete(f"/api/classes/{class_id}", headers=owner).status_code == 204
+    assert api.delete(f"/api/classes/{class_id}", headers=owner).status_code == 404
+
+
+def test_class_writes_follow_a_role_removed_in_the_database(api, standin, auth):
+    user_id = new_user(standin)
+    headers = auth(user_id)
+    standin.post("/rest/v1/professionals", json={"user_id": user_id, "full_name": "Novo usuário"})
+    class_id = api.post("/api/classes", json=CLASS, headers=headers).json()["id"]
+
+    # papel removido direto no banco: o snapshot em cache ainda é de profissional, mas a posse
+    # é conferida na própria escrita
+    standin.delete("/rest/v1/professionals", params={"user_id": f"eq.{user_id}"})
+    assert api.put(f"/api/classes/{class_id}", json={"price": 1}, headers=headers).status_code == 403
@@ -0,0 +1,30 @@
+import uuid
+
+# depois de todas as mensagens do conjunto gerado: a tabela do stand-in segue ordenada
+SAME_TIMESTAMP = "2099-01-01T00:00:00.000000+00:00"
+
+
+def test_sync_points_break_timestamp_ties_by_id(api, standin, manifest, auth):
+    student, other = manifest["students"][:2]
+    ids = sorted(str(uuid.uuid4()) for _ in range(3))
+    for message_id in ids:
+        response = standin.post(
+            "/rest/v1/messages",
+            json={
+                "id": message_id,
+                "sender_id": other,
+                "recipient_id": student,
+                "content": "mesmo horário",
+                "created_at": SAME_TIMESTAMP,
+            },
+        )
+        assert response.status_code == 201
+
+    headers = auth(student)
+    after = api.get(f"/api/messages/{other}", params={"after": ids[0]}, headers=headers)
+    assert after.status_code == 200
+    assert [message["id"] for message in after.json()] == ids[1:]
+
+    before = api.get(f"/api/messages/{other}", params={"before": ids[2], "limit": 2}, headers=headers)
+    assert before.status_code == 200
+    assert [message["id"] for message in before.json()] == ids[:2]
@@ -0,0 +1,27 @@
+import uuid
+
+from app.core.config import settings
+from app.core.ratelimit import rate_limiter
+
+
+def test_stream_rejects_access_tokens_in_the_query_string(api, auth):
+    token = auth(str(uuid.uuid4()))["Authorization"].removeprefix("Bearer ")
+    assert api.get("/api/realtime/stream", params={"access_token": token}).status_code == 401
+    assert api.get("/api/realtime/stream", params={"ticket": token}).status_code == 401
+
+
+def test_open_streams_are_capped_per_user(api, auth, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    user_id = str(uuid.uuid4())
+    ticket = api.post("/api/realtime/ticket", headers=auth(user_id)).json()["ticket"]
+
+    # streams já abertos pelo usuário neste worker
+    for _ in range(rate_limiter.user_streams):
+        rate_limiter.open_stream(user_id)
+    try:
+        response = api.get("/api/realtime/stream", params={"ticket": ticket})
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+    finally:
+        for _ in range(rate_limiter.user_streams):
+            rate_limiter.close_stream(user_id)
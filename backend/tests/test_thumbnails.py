@@ -0,0 +1,35 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.core.thumbnails import ImageTooLarge, render_thumbnail
+
+MAX_PIXELS = 10_000
+
+
+def save_png(path, width: int, height: int):
+    Image.new("RGB", (width, height), "teal").save(path, "PNG")
+    return path
+
+
+def test_limit_is_exact_not_twice_the_setting(tmp_path):
+    # 1,5× o limite: o Pillow sozinho só avisaria e decodificaria
+    with pytest.raises(ImageTooLarge):
+        render_thumbnail(str(save_png(tmp_path / "big.png", 150, 100)), 64, 80, MAX_PIXELS)
+
+    thumbnail = render_thumbnail(str(save_png(tmp_path / "ok.png", 100, 100)), 64, 80, MAX_PIXELS)
+    assert Image.open(io.BytesIO(thumbnail)).size == (64, 64)
+
+
+def test_avatar_above_the_pixel_limit_is_rejected(api, manifest, auth, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_image_max_pixels", MAX_PIXELS)
+    path = save_png(tmp_path / "avatar.png", 150, 100)
+    with open(path, "rb") as handle:
+        response = api.put(
+            "/api/me/avatar",
+            files={"file": ("avatar.png", handle, "image/png")},
+            headers=auth(manifest["students"][0]),
+        )
+    assert response.status_code == 413
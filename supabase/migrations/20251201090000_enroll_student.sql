@@ -0,0 +1,53 @@
+-- Inscrição atômica: verifica duplicidade e capacidade e insere numa única transação.
+-- A linha da aula é travada (FOR UPDATE), então inscrições concorrentes na mesma aula
+-- são serializadas e a última vaga não pode ser ocupada duas vezes.
+CREATE OR REPLACE FUNCTION public.enroll_student(_class_id UUID, _student_id UUID)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  _capacity INTEGER;
+  _taken INTEGER;
+  _enrollment public.enrollments;
+BEGIN
+  SELECT max_students INTO _capacity
+  FROM public.classes
+  WHERE id = _class_id
+  FOR UPDATE;
+
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('status', 'class_not_found');
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM public.enrollments
+    WHERE class_id = _class_id AND student_id = _student_id
+  ) THEN
+    RETURN jsonb_build_object('status', 'already_enrolled');
+  END IF;
+
+  SELECT count(*) INTO _taken
+  FROM public.enrollments
+  WHERE class_id = _class_id;
+
+  IF _capacity IS NOT NULL AND _taken >= _capacity THEN
+    RETURN jsonb_build_object('status', 'class_full');
+  END IF;
+
+  INSERT INTO public.enrollments (class_id, student_id)
+  VALUES (_class_id, _student_id)
+  RETURNING * INTO _enrollment;
+
+  RETURN jsonb_build_object('status', 'enrolled', 'enrollment', to_jsonb(_enrollment));
+EXCEPTION
+  WHEN unique_violation THEN
+    RETURN jsonb_build_object('status', 'already_enrolled');
+END;
+$$;
+
+-- O backend chama com a service role informando o aluno autenticado;
+-- clientes diretos não podem inscrever terceiros.
+REVOKE ALL ON FUNCTION public.enroll_student(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.enroll_student(UUID, UUID) TO service_role;
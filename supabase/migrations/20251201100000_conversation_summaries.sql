@@ -0,0 +1,79 @@
+-- Índices usados pelo inbox: mensagens enviadas/recebidas em ordem cronológica
+-- e contagem de não lidas por remetente.
+CREATE INDEX IF NOT EXISTS messages_sender_created_at_idx
+  ON public.messages (sender_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS messages_recipient_created_at_idx
+  ON public.messages (recipient_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS messages_unread_idx
+  ON public.messages (recipient_id, sender_id)
+  WHERE NOT read;
+
+-- Uma linha por interlocutor: última mensagem da conversa, perfis e total de não lidas.
+-- Paginação por keyset em (created_at, id) da última mensagem.
+CREATE OR REPLACE FUNCTION public.conversation_summaries(
+  _user_id UUID,
+  _limit INTEGER DEFAULT 50,
+  _before_created_at TIMESTAMPTZ DEFAULT NULL,
+  _before_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  sender_id UUID,
+  recipient_id UUID,
+  content TEXT,
+  read BOOLEAN,
+  created_at TIMESTAMPTZ,
+  counterpart_id UUID,
+  unread_count BIGINT,
+  sender JSONB,
+  recipient JSONB
+)
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH last_messages AS (
+    SELECT DISTINCT ON (thread.counterpart_id) thread.*
+    FROM (
+      SELECT m.*, m.recipient_id AS counterpart_id
+      FROM public.messages m
+      WHERE m.sender_id = _user_id
+      UNION ALL
+      SELECT m.*, m.sender_id AS counterpart_id
+      FROM public.messages m
+      WHERE m.recipient_id = _user_id
+    ) AS thread
+    ORDER BY thread.counterpart_id, thread.created_at DESC, thread.id DESC
+  ),
+  unread AS (
+    SELECT m.sender_id AS counterpart_id, count(*) AS unread_count
+    FROM public.messages m
+    WHERE m.recipient_id = _user_id AND NOT m.read
+    GROUP BY m.sender_id
+  )
+  SELECT
+    lm.id,
+    lm.sender_id,
+    lm.recipient_id,
+    lm.content,
+    lm.read,
+    lm.created_at,
+    lm.counterpart_id,
+    coalesce(u.unread_count, 0) AS unread_count,
+    jsonb_build_object('id', s.id, 'full_name', s.full_name, 'avatar_url', s.avatar_url) AS sender,
+    jsonb_build_object('id', r.id, 'full_name', r.full_name, 'avatar_url', r.avatar_url) AS recipient
+  FROM last_messages lm
+  LEFT JOIN unread u ON u.counterpart_id = lm.counterpart_id
+  LEFT JOIN public.profiles s ON s.id = lm.sender_id
+  LEFT JOIN public.profiles r ON r.id = lm.recipient_id
+  WHERE _before_created_at IS NULL
+     OR (lm.created_at, lm.id) < (_before_created_at, _before_id)
+  ORDER BY lm.created_at DESC, lm.id DESC
+  LIMIT _limit;
+$$;
+
+REVOKE ALL ON FUNCTION public.conversation_summaries(UUID, INTEGER, TIMESTAMPTZ, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.conversation_summaries(UUID, INTEGER, TIMESTAMPTZ, UUID) TO service_role;
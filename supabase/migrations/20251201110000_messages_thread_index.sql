@@ -0,0 +1,4 @@
+-- Histórico entre dois usuários: filtro por (sender_id, recipient_id) em cada sentido
+-- e intervalo em created_at (sincronização incremental com after/before).
+CREATE INDEX IF NOT EXISTS messages_thread_created_at_idx
+  ON public.messages (sender_id, recipient_id, created_at);
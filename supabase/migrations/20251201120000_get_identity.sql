@@ -0,0 +1,18 @@
+-- Papéis e vínculos (profissional/aluno) de um usuário numa única chamada,
+-- usados pelo backend para autorizar escritas sem consultas adicionais.
+CREATE OR REPLACE FUNCTION public.get_identity(_user_id UUID)
+RETURNS JSONB
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT jsonb_build_object(
+    'roles', coalesce((SELECT jsonb_agg(ur.role ORDER BY ur.role) FROM public.user_roles ur WHERE ur.user_id = _user_id), '[]'::jsonb),
+    'professional_id', (SELECT p.id FROM public.professionals p WHERE p.user_id = _user_id),
+    'student_id', (SELECT s.id FROM public.students s WHERE s.user_id = _user_id)
+  )
+$$;
+
+REVOKE ALL ON FUNCTION public.get_identity(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_identity(UUID) TO service_role;
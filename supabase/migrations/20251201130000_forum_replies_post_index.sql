@@ -0,0 +1,4 @@
+-- Detalhe do post: respostas paginadas por (created_at, id) dentro de um post
+-- e contagem agregada de respostas.
+CREATE INDEX IF NOT EXISTS forum_replies_post_created_at_idx
+  ON public.forum_replies (post_id, created_at, id);
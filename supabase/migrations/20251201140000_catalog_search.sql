@@ -0,0 +1,223 @@
+-- Busca no catálogo (aulas e demandas): texto completo em português com ranking,
+-- similaridade por trigramas para tolerar erros de digitação e filtros estruturados.
+CREATE SCHEMA IF NOT EXISTS extensions;
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+-- Documentos de busca como funções IMMUTABLE: os índices GIN usam a mesma expressão
+-- das consultas, sem expor uma coluna extra no `select *` das listagens.
+CREATE OR REPLACE FUNCTION public.class_search_vector(_activity TEXT, _description TEXT, _location TEXT)
+RETURNS tsvector
+LANGUAGE SQL
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT setweight(to_tsvector('portuguese'::regconfig, coalesce(_activity, '')), 'A')
+      || setweight(to_tsvector('portuguese'::regconfig, coalesce(_description, '')), 'B')
+      || setweight(to_tsvector('portuguese'::regconfig, coalesce(_location, '')), 'C')
+$$;
+
+CREATE OR REPLACE FUNCTION public.demand_search_vector(_activity TEXT, _neighborhood TEXT, _location TEXT)
+RETURNS tsvector
+LANGUAGE SQL
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT setweight(to_tsvector('portuguese'::regconfig, coalesce(_activity, '')), 'A')
+      || setweight(to_tsvector('portuguese'::regconfig, coalesce(_neighborhood, '')), 'B')
+      || setweight(to_tsvector('portuguese'::regconfig, coalesce(_location, '')), 'C')
+$$;
+
+CREATE INDEX IF NOT EXISTS classes_search_idx
+  ON public.classes USING GIN (public.class_search_vector(activity, description, location));
+CREATE INDEX IF NOT EXISTS classes_activity_trgm_idx
+  ON public.classes USING GIN (activity extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS classes_location_trgm_idx
+  ON public.classes USING GIN (location extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS classes_schedule_trgm_idx
+  ON public.classes USING GIN (schedule extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS classes_price_idx
+  ON public.classes (price);
+
+CREATE INDEX IF NOT EXISTS demands_search_idx
+  ON public.demands USING GIN (public.demand_search_vector(activity, neighborhood, location));
+CREATE INDEX IF NOT EXISTS demands_activity_trgm_idx
+  ON public.demands USING GIN (activity extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS demands_neighborhood_trgm_idx
+  ON public.demands USING GIN (neighborhood extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS demands_location_trgm_idx
+  ON public.demands USING GIN (location extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS demands_schedule_trgm_idx
+  ON public.demands USING GIN (schedule extensions.gin_trgm_ops);
+
+-- Escapa curingas do LIKE para filtrar por trecho literal do horário.
+CREATE OR REPLACE FUNCTION public.like_contains(_value TEXT)
+RETURNS TEXT
+LANGUAGE SQL
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT '%' || replace(replace(replace(_value, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+$$;
+
+-- Aulas ordenadas por relevância (score DESC, id) com paginação por keyset.
+-- Sem `_query`, todas as aulas que passam nos filtros têm score 0.
+-- A consulta é montada só com os filtros informados (EXECUTE planeja com os valores
+-- reais), para que o planner escolha o índice de cada filtro em vez de um plano genérico.
+CREATE OR REPLACE FUNCTION public.search_classes(
+  _query TEXT DEFAULT NULL,
+  _schedule TEXT DEFAULT NULL,
+  _location TEXT DEFAULT NULL,
+  _min_price NUMERIC DEFAULT NULL,
+  _max_price NUMERIC DEFAULT NULL,
+  _limit INTEGER DEFAULT 50,
+  _after_score REAL DEFAULT NULL,
+  _after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  professional_id UUID,
+  activity TEXT,
+  description TEXT,
+  schedule TEXT,
+  max_students INTEGER,
+  location TEXT,
+  price NUMERIC,
+  demand_id UUID,
+  created_at TIMESTAMPTZ,
+  professionals JSONB,
+  enrollment_count BIGINT,
+  score REAL
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public, extensions
+AS $$
+DECLARE
+  _q TEXT := nullif(trim(_query), '');
+  _score TEXT := '0';
+  _filters TEXT[] := ARRAY['true'];
+BEGIN
+  IF _q IS NOT NULL THEN
+    _score := 'ts_rank_cd(public.class_search_vector(c.activity, c.description, c.location), websearch_to_tsquery(''portuguese'', $1))'
+      || ' + greatest(word_similarity($1, c.activity), word_similarity($1, c.location))';
+    _filters := _filters || ('(public.class_search_vector(c.activity, c.description, c.location) @@ websearch_to_tsquery(''portuguese'', $1)'
+      || ' OR $1 <% c.activity OR $1 <% c.location)')::TEXT;
+  END IF;
+  IF _schedule IS NOT NULL THEN
+    _filters := _filters || 'c.schedule ILIKE public.like_contains($2)'::TEXT;
+  END IF;
+  IF _location IS NOT NULL THEN
+    _filters := _filters || '$3 <% c.location'::TEXT;
+  END IF;
+  IF _min_price IS NOT NULL THEN
+    _filters := _filters || 'c.price >= $4'::TEXT;
+  END IF;
+  IF _max_price IS NOT NULL THEN
+    _filters := _filters || 'c.price <= $5'::TEXT;
+  END IF;
+
+  RETURN QUERY EXECUTE format(
+    $sql$
+      WITH matches AS (
+        SELECT c.*, (%s)::REAL AS score
+        FROM public.classes c
+        WHERE %s
+      )
+      SELECT
+        m.id,
+        m.professional_id,
+        m.activity,
+        m.description,
+        m.schedule,
+        m.max_students,
+        m.location,
+        m.price,
+        m.demand_id,
+        m.created_at,
+        jsonb_build_object('full_name', p.full_name),
+        (SELECT count(*) FROM public.enrollments e WHERE e.class_id = m.id),
+        m.score
+      FROM matches m
+      LEFT JOIN public.professionals p ON p.id = m.professional_id
+      WHERE $7::REAL IS NULL
+         OR m.score < $7
+         OR (m.score = $7 AND m.id > $8)
+      ORDER BY m.score DESC, m.id
+      LIMIT $6
+    $sql$,
+    _score,
+    array_to_string(_filters, ' AND ')
+  )
+  USING _q, _schedule, _location, _min_price, _max_price, _limit, _after_score, _after_id;
+END;
+$$;
+
+-- Demandas ordenadas por relevância, com os mesmos critérios de paginação.
+CREATE OR REPLACE FUNCTION public.search_demands(
+  _query TEXT DEFAULT NULL,
+  _schedule TEXT DEFAULT NULL,
+  _neighborhood TEXT DEFAULT NULL,
+  _limit INTEGER DEFAULT 50,
+  _after_score REAL DEFAULT NULL,
+  _after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  activity TEXT,
+  neighborhood TEXT,
+  schedule TEXT,
+  num_interested INTEGER,
+  location TEXT,
+  created_at TIMESTAMPTZ,
+  score REAL
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public, extensions
+AS $$
+DECLARE
+  _q TEXT := nullif(trim(_query), '');
+  _score TEXT := '0';
+  _filters TEXT[] := ARRAY['true'];
+BEGIN
+  IF _q IS NOT NULL THEN
+    _score := 'ts_rank_cd(public.demand_search_vector(d.activity, d.neighborhood, d.location), websearch_to_tsquery(''portuguese'', $1))'
+      || ' + greatest(word_similarity($1, d.activity), word_similarity($1, d.neighborhood))';
+    _filters := _filters || ('(public.demand_search_vector(d.activity, d.neighborhood, d.location) @@ websearch_to_tsquery(''portuguese'', $1)'
+      || ' OR $1 <% d.activity OR $1 <% d.neighborhood)')::TEXT;
+  END IF;
+  IF _schedule IS NOT NULL THEN
+    _filters := _filters || 'd.schedule ILIKE public.like_contains($2)'::TEXT;
+  END IF;
+  IF _neighborhood IS NOT NULL THEN
+    _filters := _filters || '$3 <% d.neighborhood'::TEXT;
+  END IF;
+
+  RETURN QUERY EXECUTE format(
+    $sql$
+      WITH matches AS (
+        SELECT d.*, (%s)::REAL AS score
+        FROM public.demands d
+        WHERE %s
+      )
+      SELECT m.id, m.activity, m.neighborhood, m.schedule, m.num_interested, m.location, m.created_at, m.score
+      FROM matches m
+      WHERE $5::REAL IS NULL
+         OR m.score < $5
+         OR (m.score = $5 AND m.id > $6)
+      ORDER BY m.score DESC, m.id
+      LIMIT $4
+    $sql$,
+    _score,
+    array_to_string(_filters, ' AND ')
+  )
+  USING _q, _schedule, _neighborhood, _limit, _after_score, _after_id;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.search_classes(TEXT, TEXT, TEXT, NUMERIC, NUMERIC, INTEGER, REAL, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.search_classes(TEXT, TEXT, TEXT, NUMERIC, NUMERIC, INTEGER, REAL, UUID) TO service_role;
+REVOKE ALL ON FUNCTION public.search_demands(TEXT, TEXT, TEXT, INTEGER, REAL, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.search_demands(TEXT, TEXT, TEXT, INTEGER, REAL, UUID) TO service_role;
@@ -0,0 +1,125 @@
+-- Marca como lidas, numa única instrução, as mensagens recebidas de um interlocutor
+-- até uma mensagem da conversa (inclusive), ou todas quando `_up_to_id` é nulo.
+-- Usa o índice parcial messages_unread_idx (recipient_id, sender_id) WHERE NOT read.
+CREATE OR REPLACE FUNCTION public.mark_conversation_read(
+  _user_id UUID,
+  _counterpart_id UUID,
+  _up_to_id UUID DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  _up_to_created_at TIMESTAMPTZ;
+  _ids JSONB;
+BEGIN
+  IF _up_to_id IS NOT NULL THEN
+    SELECT m.created_at INTO _up_to_created_at
+    FROM public.messages m
+    WHERE m.id = _up_to_id
+      AND (
+        (m.sender_id = _counterpart_id AND m.recipient_id = _user_id)
+        OR (m.sender_id = _user_id AND m.recipient_id = _counterpart_id)
+      );
+
+    IF NOT FOUND THEN
+      RETURN jsonb_build_object('status', 'message_not_found');
+    END IF;
+  END IF;
+
+  WITH updated AS (
+    UPDATE public.messages m
+    SET read = true
+    WHERE m.recipient_id = _user_id
+      AND m.sender_id = _counterpart_id
+      AND NOT m.read
+      AND (_up_to_id IS NULL OR (m.created_at, m.id) <= (_up_to_created_at, _up_to_id))
+    RETURNING m.id
+  )
+  SELECT coalesce(jsonb_agg(updated.id), '[]'::jsonb) INTO _ids FROM updated;
+
+  RETURN jsonb_build_object('status', 'ok', 'ids', _ids);
+END;
+$$;
+
+-- Registra a presença de vários alunos de uma aula numa data, numa única instrução.
+-- `_records` é um array de {"enrollment_id", "present"}; o resultado traz um item por
+-- entrada, na mesma ordem: recorded, enrollment_not_found (inscrição de outra aula ou
+-- inexistente) ou duplicate (a mesma inscrição repetida no lote; vale a última).
+-- Registrar de novo a mesma data sobrescreve a presença (UNIQUE(enrollment_id, date)).
+CREATE OR REPLACE FUNCTION public.record_attendance(
+  _professional_id UUID,
+  _class_id UUID,
+  _date DATE,
+  _records JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  _owner UUID;
+  _results JSONB;
+BEGIN
+  SELECT c.professional_id INTO _owner
+  FROM public.classes c
+  WHERE c.id = _class_id;
+
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('status', 'class_not_found');
+  END IF;
+  IF _owner IS DISTINCT FROM _professional_id THEN
+    RETURN jsonb_build_object('status', 'forbidden');
+  END IF;
+
+  WITH input AS (
+    SELECT
+      (r.ordinality - 1)::INTEGER AS index,
+      lower(r.value->>'enrollment_id') AS enrollment_id,
+      coalesce((r.value->>'present')::BOOLEAN, false) AS present
+    FROM jsonb_array_elements(_records) WITH ORDINALITY AS r(value, ordinality)
+  ),
+  valid AS (
+    SELECT DISTINCT ON (e.id) i.index, e.id AS enrollment_id, i.present
+    FROM input i
+    JOIN public.enrollments e ON e.id::TEXT = i.enrollment_id AND e.class_id = _class_id
+    ORDER BY e.id, i.index DESC
+  ),
+  saved AS (
+    INSERT INTO public.attendance (enrollment_id, date, present)
+    SELECT v.enrollment_id, coalesce(_date, CURRENT_DATE), v.present
+    FROM valid v
+    ON CONFLICT (enrollment_id, date) DO UPDATE SET present = EXCLUDED.present
+    RETURNING *
+  )
+  SELECT coalesce(
+    jsonb_agg(
+      jsonb_build_object(
+        'index', i.index,
+        'enrollment_id', i.enrollment_id,
+        'status', CASE
+          WHEN v.index = i.index THEN 'recorded'
+          WHEN v.index IS NOT NULL THEN 'duplicate'
+          ELSE 'enrollment_not_found'
+        END,
+        'attendance', CASE WHEN v.index = i.index THEN to_jsonb(s) END
+      )
+      ORDER BY i.index
+    ),
+    '[]'::jsonb
+  ) INTO _results
+  FROM input i
+  LEFT JOIN valid v ON v.enrollment_id::TEXT = i.enrollment_id
+  LEFT JOIN saved s ON s.enrollment_id = v.enrollment_id;
+
+  RETURN jsonb_build_object('status', 'ok', 'results', _results);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.mark_conversation_read(UUID, UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.mark_conversation_read(UUID, UUID, UUID) TO service_role;
+REVOKE ALL ON FUNCTION public.record_attendance(UUID, UUID, DATE, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.record_attendance(UUID, UUID, DATE, JSONB) TO service_role;
@@ -0,0 +1,71 @@
+-- Snapshot do usuário para o cache do backend: o perfil passa a vir junto com papéis e
+-- vínculos, e o GET /me deixa de consultar profiles a cada chamada.
+CREATE OR REPLACE FUNCTION public.get_identity(_user_id UUID)
+RETURNS JSONB
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT jsonb_build_object(
+    'roles', coalesce((SELECT jsonb_agg(ur.role ORDER BY ur.role) FROM public.user_roles ur WHERE ur.user_id = _user_id), '[]'::jsonb),
+    'professional_id', (SELECT p.id FROM public.professionals p WHERE p.user_id = _user_id),
+    'student_id', (SELECT s.id FROM public.students s WHERE s.user_id = _user_id),
+    'profile', (SELECT to_jsonb(pr) FROM public.profiles pr WHERE pr.id = _user_id)
+  )
+$$;
+
+-- Avisa os workers (canal app_events, o mesmo do realtime) que o snapshot de um usuário
+-- mudou, inclusive quando a escrita é feita direto pelo frontend via Supabase.
+CREATE OR REPLACE FUNCTION public.notify_identity_change()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  _column TEXT := CASE TG_TABLE_NAME WHEN 'profiles' THEN 'id' ELSE 'user_id' END;
+  _new_user TEXT;
+  _old_user TEXT;
+BEGIN
+  IF TG_OP <> 'DELETE' THEN
+    _new_user := to_jsonb(NEW)->>_column;
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    _old_user := to_jsonb(OLD)->>_column;
+  END IF;
+
+  IF _new_user IS NOT NULL THEN
+    PERFORM pg_notify('app_events', jsonb_build_object(
+      'channel', 'identity',
+      'event', jsonb_build_object('type', 'identity_changed', 'data', jsonb_build_object('user_id', _new_user))
+    )::TEXT);
+  END IF;
+  IF _old_user IS NOT NULL AND _old_user IS DISTINCT FROM _new_user THEN
+    PERFORM pg_notify('app_events', jsonb_build_object(
+      'channel', 'identity',
+      'event', jsonb_build_object('type', 'identity_changed', 'data', jsonb_build_object('user_id', _old_user))
+    )::TEXT);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS profiles_identity_change ON public.profiles;
+CREATE TRIGGER profiles_identity_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.profiles
+  FOR EACH ROW EXECUTE FUNCTION public.notify_identity_change();
+
+DROP TRIGGER IF EXISTS professionals_identity_change ON public.professionals;
+CREATE TRIGGER professionals_identity_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.professionals
+  FOR EACH ROW EXECUTE FUNCTION public.notify_identity_change();
+
+DROP TRIGGER IF EXISTS students_identity_change ON public.students;
+CREATE TRIGGER students_identity_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.students
+  FOR EACH ROW EXECUTE FUNCTION public.notify_identity_change();
+
+DROP TRIGGER IF EXISTS user_roles_identity_change ON public.user_roles;
+CREATE TRIGGER user_roles_identity_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.user_roles
+  FOR EACH ROW EXECUTE FUNCTION public.notify_identity_change();
@@ -0,0 +1,257 @@
+-- Painel do profissional: faturamento por mês, pagamentos pendentes, frequência e ocupação.
+-- Os totais ficam em tabelas de resumo mantidas por triggers (só o delta de cada escrita),
+-- então a leitura não depende do tamanho do histórico de payments/attendance.
+
+CREATE INDEX IF NOT EXISTS classes_professional_id_idx
+  ON public.classes (professional_id);
+
+-- pendências mais antigas do painel, sem varrer pagamentos já quitados
+CREATE INDEX IF NOT EXISTS payments_pending_class_idx
+  ON public.payments (class_id, created_at)
+  WHERE status = 'pending';
+
+-- Totais por aula e mês. O mês é o de payment_date, ou o da criação enquanto não há data.
+CREATE TABLE IF NOT EXISTS public.dashboard_monthly_revenue (
+  class_id UUID NOT NULL REFERENCES public.classes(id) ON DELETE CASCADE,
+  month DATE NOT NULL,
+  paid_amount NUMERIC(12,2) NOT NULL DEFAULT 0,
+  paid_count INTEGER NOT NULL DEFAULT 0,
+  pending_amount NUMERIC(12,2) NOT NULL DEFAULT 0,
+  pending_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (class_id, month)
+);
+
+-- Presenças registradas por inscrição (a taxa por aula soma as inscrições da aula).
+CREATE TABLE IF NOT EXISTS public.dashboard_enrollment_attendance (
+  enrollment_id UUID PRIMARY KEY REFERENCES public.enrollments(id) ON DELETE CASCADE,
+  records INTEGER NOT NULL DEFAULT 0,
+  present INTEGER NOT NULL DEFAULT 0
+);
+
+-- só o backend (service_role) lê os resumos, via professional_dashboard
+ALTER TABLE public.dashboard_monthly_revenue ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.dashboard_enrollment_attendance ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.dashboard_track_payment()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  -- remove a contribuição antiga; só UPDATE, porque num DELETE em cascata a aula
+  -- (e o resumo dela) pode já ter sido apagada
+  IF TG_OP IN ('UPDATE', 'DELETE') AND coalesce(OLD.status, 'pending') IN ('paid', 'pending') THEN
+    UPDATE public.dashboard_monthly_revenue r
+    SET
+      paid_amount = r.paid_amount - CASE WHEN OLD.status = 'paid' THEN OLD.amount ELSE 0 END,
+      paid_count = r.paid_count - CASE WHEN OLD.status = 'paid' THEN 1 ELSE 0 END,
+      pending_amount = r.pending_amount - CASE WHEN OLD.status = 'paid' THEN 0 ELSE OLD.amount END,
+      pending_count = r.pending_count - CASE WHEN OLD.status = 'paid' THEN 0 ELSE 1 END
+    WHERE r.class_id = OLD.class_id
+      AND r.month = date_trunc('month', coalesce(OLD.payment_date, OLD.created_at::DATE))::DATE;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND coalesce(NEW.status, 'pending') IN ('paid', 'pending') THEN
+    INSERT INTO public.dashboard_monthly_revenue AS r
+      (class_id, month, paid_amount, paid_count, pending_amount, pending_count)
+    VALUES (
+      NEW.class_id,
+      date_trunc('month', coalesce(NEW.payment_date, NEW.created_at::DATE))::DATE,
+      CASE WHEN NEW.status = 'paid' THEN NEW.amount ELSE 0 END,
+      CASE WHEN NEW.status = 'paid' THEN 1 ELSE 0 END,
+      CASE WHEN NEW.status = 'paid' THEN 0 ELSE NEW.amount END,
+      CASE WHEN NEW.status = 'paid' THEN 0 ELSE 1 END
+    )
+    ON CONFLICT (class_id, month) DO UPDATE SET
+      paid_amount = r.paid_amount + EXCLUDED.paid_amount,
+      paid_count = r.paid_count + EXCLUDED.paid_count,
+      pending_amount = r.pending_amount + EXCLUDED.pending_amount,
+      pending_count = r.pending_count + EXCLUDED.pending_count;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.dashboard_track_attendance()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE public.dashboard_enrollment_attendance a
+    SET
+      records = a.records - 1,
+      present = a.present - CASE WHEN OLD.present THEN 1 ELSE 0 END
+    WHERE a.enrollment_id = OLD.enrollment_id;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO public.dashboard_enrollment_attendance AS a (enrollment_id, records, present)
+    VALUES (NEW.enrollment_id, 1, CASE WHEN NEW.present THEN 1 ELSE 0 END)
+    ON CONFLICT (enrollment_id) DO UPDATE SET
+      records = a.records + 1,
+      present = a.present + EXCLUDED.present;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS payments_dashboard ON public.payments;
+CREATE TRIGGER payments_dashboard
+  AFTER INSERT OR DELETE OR UPDATE OF class_id, amount, status, payment_date, created_at ON public.payments
+  FOR EACH ROW EXECUTE FUNCTION public.dashboard_track_payment();
+
+DROP TRIGGER IF EXISTS attendance_dashboard ON public.attendance;
+CREATE TRIGGER attendance_dashboard
+  AFTER INSERT OR DELETE OR UPDATE OF enrollment_id, present ON public.attendance
+  FOR EACH ROW EXECUTE FUNCTION public.dashboard_track_attendance();
+
+-- carga inicial a partir do histórico existente
+TRUNCATE public.dashboard_monthly_revenue, public.dashboard_enrollment_attendance;
+
+INSERT INTO public.dashboard_monthly_revenue (class_id, month, paid_amount, paid_count, pending_amount, pending_count)
+SELECT
+  p.class_id,
+  date_trunc('month', coalesce(p.payment_date, p.created_at::DATE))::DATE,
+  coalesce(sum(p.amount) FILTER (WHERE p.status = 'paid'), 0),
+  count(*) FILTER (WHERE p.status = 'paid'),
+  coalesce(sum(p.amount) FILTER (WHERE coalesce(p.status, 'pending') = 'pending'), 0),
+  count(*) FILTER (WHERE coalesce(p.status, 'pending') = 'pending')
+FROM public.payments p
+WHERE coalesce(p.status, 'pending') IN ('paid', 'pending')
+GROUP BY 1, 2;
+
+INSERT INTO public.dashboard_enrollment_attendance (enrollment_id, records, present)
+SELECT a.enrollment_id, count(*), count(*) FILTER (WHERE a.present)
+FROM public.attendance a
+GROUP BY a.enrollment_id;
+
+-- Painel de um profissional. `_months` limita a série de faturamento aos meses mais
+-- recentes (incluindo o atual); os demais totais vêm dos resumos, por aula.
+CREATE OR REPLACE FUNCTION public.professional_dashboard(
+  _professional_id UUID,
+  _months INTEGER DEFAULT 12,
+  _pending_limit INTEGER DEFAULT 20
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  -- plpgsql guarda o plano da consulta entre chamadas; em SQL ela seria replanejada a cada uma
+  RETURN (
+    WITH own_classes AS (
+      SELECT c.id, c.activity, c.schedule, c.location, c.max_students, c.price
+      FROM public.classes c
+      WHERE c.professional_id = _professional_id
+    ),
+    first_month AS (
+      SELECT (date_trunc('month', CURRENT_DATE) - make_interval(months => greatest(_months, 1) - 1))::DATE AS month
+    ),
+    revenue AS (
+      SELECT
+        r.month,
+        sum(r.paid_amount) AS paid_amount,
+        sum(r.paid_count) AS paid_count,
+        sum(r.pending_amount) AS pending_amount,
+        sum(r.pending_count) AS pending_count
+      FROM public.dashboard_monthly_revenue r
+      JOIN own_classes c ON c.id = r.class_id
+      WHERE r.month >= (SELECT month FROM first_month)
+      GROUP BY r.month
+    ),
+    pending_totals AS (
+      SELECT coalesce(sum(r.pending_amount), 0) AS amount, coalesce(sum(r.pending_count), 0) AS count
+      FROM public.dashboard_monthly_revenue r
+      JOIN own_classes c ON c.id = r.class_id
+    ),
+    oldest_pending AS (
+      SELECT p.id, p.class_id, c.activity, p.enrollment_id, p.amount, p.payment_date, p.created_at
+      FROM own_classes c
+      CROSS JOIN LATERAL (
+        SELECT *
+        FROM public.payments p
+        WHERE p.class_id = c.id AND p.status = 'pending'
+        ORDER BY p.created_at
+        LIMIT _pending_limit
+      ) p
+      ORDER BY p.created_at
+      LIMIT _pending_limit
+    ),
+    class_stats AS (
+      SELECT
+        c.id AS class_id,
+        c.activity,
+        c.schedule,
+        c.location,
+        c.max_students,
+        c.price,
+        count(e.id) FILTER (WHERE coalesce(e.status, 'active') = 'active') AS enrolled,
+        coalesce(sum(a.records), 0) AS attendance_records,
+        coalesce(sum(a.present), 0) AS attendance_present
+      FROM own_classes c
+      LEFT JOIN public.enrollments e ON e.class_id = c.id
+      LEFT JOIN public.dashboard_enrollment_attendance a ON a.enrollment_id = e.id
+      GROUP BY c.id, c.activity, c.schedule, c.location, c.max_students, c.price
+    )
+    SELECT jsonb_build_object(
+      'revenue_by_month', coalesce((
+        SELECT jsonb_agg(jsonb_build_object(
+          'month', to_char(m.month, 'YYYY-MM'),
+          'paid_amount', coalesce(r.paid_amount, 0),
+          'paid_count', coalesce(r.paid_count, 0),
+          'pending_amount', coalesce(r.pending_amount, 0),
+          'pending_count', coalesce(r.pending_count, 0)
+        ) ORDER BY m.month)
+        FROM generate_series(
+          (SELECT month FROM first_month),
+          date_trunc('month', CURRENT_DATE)::DATE,
+          INTERVAL '1 month'
+        ) AS m(month)
+        LEFT JOIN revenue r ON r.month = m.month::DATE
+      ), '[]'::jsonb),
+      'pending_payments', jsonb_build_object(
+        'count', (SELECT count FROM pending_totals),
+        'amount', (SELECT amount FROM pending_totals),
+        'oldest', coalesce((SELECT jsonb_agg(to_jsonb(o) ORDER BY o.created_at) FROM oldest_pending o), '[]'::jsonb)
+      ),
+      'classes', coalesce((
+        SELECT jsonb_agg(jsonb_build_object(
+          'class_id', s.class_id,
+          'activity', s.activity,
+          'schedule', s.schedule,
+          'location', s.location,
+          'max_students', s.max_students,
+          'price', s.price,
+          'enrolled', s.enrolled,
+          'occupancy_rate', CASE WHEN s.max_students > 0 THEN round(s.enrolled::NUMERIC / s.max_students, 4) END,
+          'attendance_records', s.attendance_records,
+          'attendance_rate', CASE WHEN s.attendance_records > 0
+            THEN round(s.attendance_present::NUMERIC / s.attendance_records, 4) END
+        ) ORDER BY s.activity, s.class_id)
+        FROM class_stats s
+      ), '[]'::jsonb),
+      'totals', (
+        SELECT jsonb_build_object(
+          'classes', count(*),
+          'enrolled', coalesce(sum(s.enrolled), 0),
+          'capacity', coalesce(sum(s.max_students), 0),
+          'occupancy_rate', CASE WHEN sum(s.max_students) > 0
+            THEN round(sum(s.enrolled)::NUMERIC / sum(s.max_students), 4) END,
+          'attendance_rate', CASE WHEN sum(s.attendance_records) > 0
+            THEN round(sum(s.attendance_present)::NUMERIC / sum(s.attendance_records), 4) END
+        )
+        FROM class_stats s
+      )
+    )
+  );
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.professional_dashboard(UUID, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.professional_dashboard(UUID, INTEGER, INTEGER) TO service_role;
@@ -0,0 +1,42 @@
+-- Índices apontados por backend/benchmarks/query_plans.py (EXPLAIN ANALYZE das consultas
+-- dos routers com volume realista). Sem eles, cada caso abaixo fazia varredura sequencial.
+
+-- Listagens do catálogo e do fórum: páginas por keyset em (created_at, id), nos dois
+-- sentidos (o btree é percorrido de trás para frente nas listagens decrescentes).
+CREATE INDEX IF NOT EXISTS classes_created_at_id_idx
+  ON public.classes (created_at, id);
+
+CREATE INDEX IF NOT EXISTS demands_created_at_id_idx
+  ON public.demands (created_at, id);
+
+CREATE INDEX IF NOT EXISTS forum_posts_created_at_id_idx
+  ON public.forum_posts (created_at, id);
+
+-- GET /enrollments: inscrições do aluno, mais recentes primeiro. O UNIQUE (class_id,
+-- student_id) só atende filtros por class_id.
+CREATE INDEX IF NOT EXISTS enrollments_student_created_at_idx
+  ON public.enrollments (student_id, created_at, id);
+
+-- Chaves estrangeiras com ON DELETE CASCADE / SET NULL: sem índice no lado referenciador,
+-- apagar uma aula, inscrição, demanda ou post varre a tabela filha inteira.
+CREATE INDEX IF NOT EXISTS payments_class_id_idx
+  ON public.payments (class_id);
+
+CREATE INDEX IF NOT EXISTS payments_enrollment_id_idx
+  ON public.payments (enrollment_id);
+
+CREATE INDEX IF NOT EXISTS classes_demand_id_idx
+  ON public.classes (demand_id)
+  WHERE demand_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS forum_messages_class_id_idx
+  ON public.forum_messages (class_id);
+
+CREATE INDEX IF NOT EXISTS demands_user_id_idx
+  ON public.demands (user_id);
+
+CREATE INDEX IF NOT EXISTS forum_posts_user_id_idx
+  ON public.forum_posts (user_id);
+
+CREATE INDEX IF NOT EXISTS forum_replies_user_id_idx
+  ON public.forum_replies (user_id);
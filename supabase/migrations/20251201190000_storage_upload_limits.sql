@@ -0,0 +1,5 @@
+-- Limites de tamanho dos buckets, iguais aos da API (UPLOAD_AVATAR_MAX_BYTES e
+-- UPLOAD_CERTIFICATE_MAX_BYTES): valem também para os uploads feitos direto pelo frontend,
+-- que hoje só validam o tamanho no navegador.
+UPDATE storage.buckets SET file_size_limit = 5 * 1024 * 1024 WHERE id = 'avatars';
+UPDATE storage.buckets SET file_size_limit = 10 * 1024 * 1024 WHERE id = 'health-certificates';
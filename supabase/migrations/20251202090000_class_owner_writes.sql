@@ -0,0 +1,75 @@
+-- Atualização e remoção de aulas com a posse conferida na própria instrução: a aula só é
+-- alterada se o profissional dono dela pertencer ao usuário informado (professionals.user_id).
+-- Sem linha afetada, a mesma chamada distingue aula inexistente de aula de outro profissional,
+-- então cada escrita custa uma única ida ao banco e não depende de um professional_id em cache.
+CREATE OR REPLACE FUNCTION public.update_own_class(_user_id UUID, _class_id UUID, _changes JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  _unknown TEXT[];
+  _class public.classes;
+BEGIN
+  SELECT array_agg(k ORDER BY k) INTO _unknown
+  FROM jsonb_object_keys(_changes) AS k
+  WHERE k NOT IN ('activity', 'description', 'schedule', 'max_students', 'location', 'price', 'demand_id');
+
+  IF _unknown IS NOT NULL THEN
+    RETURN jsonb_build_object('status', 'invalid_columns', 'columns', to_jsonb(_unknown));
+  END IF;
+
+  UPDATE public.classes c
+  SET
+    activity = CASE WHEN _changes ? 'activity' THEN _changes->>'activity' ELSE c.activity END,
+    description = CASE WHEN _changes ? 'description' THEN _changes->>'description' ELSE c.description END,
+    schedule = CASE WHEN _changes ? 'schedule' THEN _changes->>'schedule' ELSE c.schedule END,
+    max_students = CASE WHEN _changes ? 'max_students' THEN (_changes->>'max_students')::INTEGER ELSE c.max_students END,
+    location = CASE WHEN _changes ? 'location' THEN _changes->>'location' ELSE c.location END,
+    price = CASE WHEN _changes ? 'price' THEN (_changes->>'price')::DECIMAL(10,2) ELSE c.price END,
+    demand_id = CASE WHEN _changes ? 'demand_id' THEN (_changes->>'demand_id')::UUID ELSE c.demand_id END
+  FROM public.professionals p
+  WHERE c.id = _class_id
+    AND p.id = c.professional_id
+    AND p.user_id = _user_id
+  RETURNING c.* INTO _class;
+
+  IF FOUND THEN
+    RETURN jsonb_build_object('status', 'updated', 'class', to_jsonb(_class));
+  END IF;
+  IF EXISTS (SELECT 1 FROM public.classes WHERE id = _class_id) THEN
+    RETURN jsonb_build_object('status', 'forbidden');
+  END IF;
+  RETURN jsonb_build_object('status', 'class_not_found');
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.delete_own_class(_user_id UUID, _class_id UUID)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  DELETE FROM public.classes c
+  USING public.professionals p
+  WHERE c.id = _class_id
+    AND p.id = c.professional_id
+    AND p.user_id = _user_id;
+
+  IF FOUND THEN
+    RETURN jsonb_build_object('status', 'deleted');
+  END IF;
+  IF EXISTS (SELECT 1 FROM public.classes WHERE id = _class_id) THEN
+    RETURN jsonb_build_object('status', 'forbidden');
+  END IF;
+  RETURN jsonb_build_object('status', 'class_not_found');
+END;
+$$;
+
+-- O backend chama com a service role informando o usuário autenticado.
+REVOKE ALL ON FUNCTION public.update_own_class(UUID, UUID, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.update_own_class(UUID, UUID, JSONB) TO service_role;
+REVOKE ALL ON FUNCTION public.delete_own_class(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.delete_own_class(UUID, UUID) TO service_role;